@@ -3,36 +3,39 @@ from datetime import datetime, timedelta
 import frappe
 import frappe.utils
 
+from bank_integration.common.correlation import log_error
+from bank_integration.common.sync_settings import SETTINGS_DOCTYPE
+from bank_integration.common.token_refresh import single_flight_refresh
+
 from .base_api import AirwallexAPIError, AirwallexBase
 
 
 class AirwallexAuthenticator(AirwallexBase):
-	def __init__(self, client_id=None, api_key=None, api_url=None):
+	def __init__(self, client_id=None, api_key=None, api_url=None, correlation_id=None, settings=None):
 		"""Initialize with specific client credentials for authentication"""
-		super().__init__(client_id=client_id, api_key=api_key, api_url=api_url, use_auth_headers=True)
+		super().__init__(
+			client_id=client_id,
+			api_key=api_key,
+			api_url=api_url,
+			use_auth_headers=True,
+			correlation_id=correlation_id,
+			settings=settings,
+		)
 
-	def authenticate(self):
-		"""Authenticate with Airwallex API, checking database token first"""
+	def authenticate(self, stale_token=None):
+		"""Authenticate with Airwallex API, checking database token first.
+
+		A cached token equal to `stale_token` (one the API rejected) is not reused.
+		"""
 		try:
 			# First check if we have a valid token in the database
 			cached_token = self._get_cached_token_from_db()
-			if cached_token:
+			if cached_token and cached_token != stale_token:
 				return {"token": cached_token}
 
-			# If no valid token, authenticate and get a new one
-			response_data = self.post(endpoint="authentication/login", json=None)
-
-			if response_data and response_data.get("token"):
-				self._cache_token_to_db(response_data)
-				return response_data
-			else:
-				# Short error log title
-				error_title = f"Auth-{self.client_id[:6]}"
-				frappe.log_error(
-					f"Authentication response missing token for client {self.client_id}: {response_data}",
-					error_title,
-				)
-				return None
+			# If no valid token, get a new one; concurrent workers share a single login
+			token = self.refresh_token(stale_token)
+			return {"token": token} if token else None
 
 		except AirwallexAPIError as e:
 			# Handle API errors with very short titles
@@ -44,8 +47,10 @@ class AirwallexAuthenticator(AirwallexBase):
 			if len(error_message) > 300:
 				error_message = error_message[:300] + "..."
 
-			frappe.log_error(
-				f"Authentication failed for client {self.client_id}: {error_message}", error_title
+			log_error(
+				f"Authentication failed for client {self.client_id}: {error_message}",
+				error_title,
+				correlation_id=self.correlation_id,
 			)
 			return None
 
@@ -54,11 +59,43 @@ class AirwallexAuthenticator(AirwallexBase):
 			client_short = self.client_id[:6] if self.client_id else "unknown"
 			error_title = f"Auth-{client_short}"
 
-			frappe.log_error(
-				f"Unexpected authentication error for client {self.client_id}: {str(e)[:300]}", error_title
+			log_error(
+				f"Unexpected authentication error for client {self.client_id}: {str(e)[:300]}",
+				error_title,
+				correlation_id=self.correlation_id,
 			)
 			return None
 
+	def login(self):
+		"""Request a new token and cache it; a cached token stays usable until it is replaced"""
+		response_data = self.post(endpoint="authentication/login", json=None)
+
+		if response_data and response_data.get("token"):
+			self._cache_token_to_db(response_data)
+			return response_data
+
+		# Short error log title
+		error_title = f"Auth-{self.client_id[:6]}"
+		log_error(
+			f"Authentication response missing token for client {self.client_id}: {response_data}",
+			error_title,
+			correlation_id=self.correlation_id,
+		)
+		return None
+
+	def refresh_token(self, stale_token=None):
+		"""New token for this client; one worker logs in while the others wait for its token"""
+		return single_flight_refresh(
+			"Airwallex", self.client_id, lambda: (self.login() or {}).get("token"), stale_token
+		)
+
+	def get_token_expiry(self):
+		"""Expiry of the cached token, or None when no token was cached"""
+		client_doc = self._get_client_doc()
+		if not client_doc or not client_doc.token or not client_doc.token_expiry:
+			return None
+		return frappe.utils.get_datetime(client_doc.token_expiry)
+
 	def _get_cached_token_from_db(self):
 		"""Get cached token from database if still valid"""
 		try:
@@ -80,7 +117,11 @@ class AirwallexAuthenticator(AirwallexBase):
 			return None
 
 		except Exception as e:
-			frappe.log_error(f"Failed to get cached token from database: {e}", "Token DB Error")
+			log_error(
+				f"Failed to get cached token from database: {e}",
+				"Token DB Error",
+				correlation_id=self.correlation_id,
+			)
 			return None
 
 	def _cache_token_to_db(self, token_data):
@@ -88,8 +129,10 @@ class AirwallexAuthenticator(AirwallexBase):
 		try:
 			client_doc = self._get_client_doc()
 			if not client_doc:
-				frappe.log_error(
-					f"Client document not found for client_id: {self.client_id}", "Token Cache Error"
+				log_error(
+					f"Client document not found for client_id: {self.client_id}",
+					"Token Cache Error",
+					correlation_id=self.correlation_id,
 				)
 				return
 
@@ -97,30 +140,37 @@ class AirwallexAuthenticator(AirwallexBase):
 			expires_in = token_data.get("expires_in", 3600)  # Default to 1 hour
 			expiry_time = frappe.utils.now_datetime() + timedelta(seconds=expires_in)
 
-			# Update the client document
-			client_doc.token = token_data.get("token")
-			client_doc.token_expiry = expiry_time
-			client_doc.save(ignore_permissions=True)
+			# Write the token columns only; saving the whole Settings would bump modified
+			frappe.db.set_value(
+				"Airwallex Client",
+				client_doc.name,
+				{"token": token_data.get("token"), "token_expiry": expiry_time},
+				update_modified=False,
+			)
 			frappe.db.commit()
 
 		except Exception as e:
-			frappe.log_error(f"Failed to cache token to database: {e}", "Token Cache Error")
+			log_error(
+				f"Failed to cache token to database: {e}",
+				"Token Cache Error",
+				correlation_id=self.correlation_id,
+			)
 
 	def _get_client_doc(self):
-		"""Get the Airwallex Client document for this client_id"""
+		"""Name and token columns of the Airwallex Client row for this client_id"""
 		try:
-			# Get the Bank Integration Setting document
-			settings = frappe.get_single("Bank Integration Setting")
-
-			# Find the client with matching client_id
-			for client in settings.airwallex_clients:
-				if client.airwallex_client_id == self.client_id:
-					return client
-
-			return None
+			# Tokens change mid-job, so they are read fresh rather than from the settings snapshot
+			return frappe.db.get_value(
+				"Airwallex Client",
+				{"airwallex_client_id": self.client_id, "parenttype": SETTINGS_DOCTYPE},
+				["name", "token", "token_expiry"],
+				as_dict=True,
+			)
 
 		except Exception as e:
-			frappe.log_error(f"Failed to get client document: {e}", "Client Doc Error")
+			log_error(
+				f"Failed to get client document: {e}", "Client Doc Error", correlation_id=self.correlation_id
+			)
 			return None
 
 	def _cache_token(self, token_data):
@@ -132,38 +182,42 @@ class AirwallexAuthenticator(AirwallexBase):
 		try:
 			client_doc = self._get_client_doc()
 			if client_doc:
-				client_doc.token = None
-				client_doc.token_expiry = None
-				client_doc.save(ignore_permissions=True)
+				frappe.db.set_value(
+					"Airwallex Client",
+					client_doc.name,
+					{"token": None, "token_expiry": None},
+					update_modified=False,
+				)
 				frappe.db.commit()
 		except Exception as e:
-			frappe.log_error(f"Failed to clear cached token from database: {e}", "Token Cache Error")
+			log_error(
+				f"Failed to clear cached token from database: {e}",
+				"Token Cache Error",
+				correlation_id=self.correlation_id,
+			)
 
 	def get_fresh_token(self):
 		"""Get a fresh token, bypassing cache"""
-		self.clear_cached_token()
-		auth_response = self.authenticate()
-		if auth_response and auth_response.get("token"):
-			return auth_response.get("token")
-		return None
+		# The cached token stays usable by other workers until the new one replaces it
+		return self.get_valid_token(stale_token=self._get_cached_token_from_db())
 
 	def is_token_valid(self):
 		"""Check if the current token is still valid without authenticating"""
 		cached_token = self._get_cached_token_from_db()
 		return cached_token is not None
 
-	def get_valid_token(self):
+	def get_valid_token(self, stale_token=None):
 		"""Get a valid token (from cache if available, otherwise authenticate)"""
-		auth_response = self.authenticate()
+		auth_response = self.authenticate(stale_token)
 		if auth_response and auth_response.get("token"):
 			return auth_response.get("token")
 		return None
 
-	def handle_token_invalidation(self):
-		"""Handle when a token is found to be invalid - clear cache and get fresh token"""
-		frappe.log_error(
-			f"Token invalidated for client {self.client_id}, clearing cache and getting fresh token",
+	def handle_token_invalidation(self, stale_token=None):
+		"""Handle when a token is found to be invalid - get a fresh token in its place"""
+		log_error(
+			f"Token invalidated for client {self.client_id}, getting fresh token",
 			f"Token-Invalid-{self.client_id[:6]}",
+			correlation_id=self.correlation_id,
 		)
-		self.clear_cached_token()
-		return self.get_valid_token()
+		return self.get_valid_token(stale_token)
@@ -0,0 +1,32 @@
+from bank_integration.airwallex.api.base_api import AirwallexBase
+
+
+class Balances(AirwallexBase):
+	"""API class for Airwallex Balances endpoint"""
+
+	def __init__(self, client_id=None, api_key=None, api_url=None, correlation_id=None, settings=None):
+		super().__init__(
+			client_id=client_id,
+			api_key=api_key,
+			api_url=api_url,
+			correlation_id=correlation_id,
+			settings=settings,
+		)
+
+	def get_current(self):
+		"""
+		Get the current balance of every currency held in the wallet
+
+		Balances are compared against synced transactions, so they are never cached.
+
+		Returns:
+		    list: One dict per currency with available_amount, pending_amount,
+		    reserved_amount and total_amount
+		"""
+		return self.get(endpoint="balances/current")
+
+
+def test_get_balances():
+	# bench execute bank_integration.airwallex.api.balances.test_get_balances
+	response = Balances().get_current()
+	print(response)
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timedelta
 from enum import Enum
 from urllib.parse import urljoin
@@ -7,6 +8,19 @@ import requests
 from frappe import _
 from frappe.utils.background_jobs import enqueue
 
+from bank_integration.bank_integration.doctype.bank_integration_log.bank_integration_log import (
+	LOG_MESSAGE_LENGTH,
+	message_preview,
+)
+from bank_integration.common.correlation import log_error
+from bank_integration.common.json_stream import JSONItemStream
+from bank_integration.common.response_cache import get_response_cache
+from bank_integration.common.sync_metrics import track
+from bank_integration.common.sync_settings import get_sync_settings
+
+# Bytes read from the socket at a time when a list response is streamed
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class SupportedHTTPMethod(Enum):
 	GET = "GET"
@@ -19,25 +33,39 @@ class SupportedHTTPMethod(Enum):
 class AirwallexBase:
 	BASE_PATH = ""
 
-	def __init__(self, client_id=None, api_key=None, api_url=None, use_auth_headers=False):
+	def __init__(
+		self,
+		client_id=None,
+		api_key=None,
+		api_url=None,
+		use_auth_headers=False,
+		correlation_id=None,
+		settings=None,
+	):
 		"""Initialize with specific client credentials"""
+		# Settings snapshot of the job; built on first use when the caller has none
+		self.settings = settings or get_sync_settings()
+
 		if client_id and api_key:
 			self.client_id = client_id
 			self.api_key = api_key
 			self.api_url = api_url or self._get_api_url()
 		else:
 			# Fallback to first client for backward compatibility
-			settings = frappe.get_single("Bank Integration Setting")
-			if settings.airwallex_clients:
-				first_client = settings.airwallex_clients[0]
+			if self.settings.airwallex_clients:
+				first_client = self.settings.airwallex_clients[0]
 				self.client_id = first_client.airwallex_client_id
-				self.api_key = first_client.airwallex_api_key
-				self.api_url = settings.api_url
+				self.api_key = first_client.api_key
+				self.api_url = self.settings.api_url
 			else:
 				frappe.throw("No Airwallex clients configured")
 
 		self.base_url = self.api_url
 		self.enable_api_log = True
+		# Optional SyncMetrics collector attached by the sync loop
+		self.metrics = None
+		# Sync run correlation id stamped on every log row and error this client writes
+		self.correlation_id = correlation_id
 
 		# Set headers based on whether this is for authentication or API calls
 		if use_auth_headers:
@@ -59,33 +87,47 @@ class AirwallexBase:
 		"""Authenticate and cache the token using database storage"""
 		from bank_integration.airwallex.api.airwallex_authenticator import AirwallexAuthenticator
 
-		auth = AirwallexAuthenticator(client_id=self.client_id, api_key=self.api_key, api_url=self.api_url)
+		auth = AirwallexAuthenticator(
+			client_id=self.client_id,
+			api_key=self.api_key,
+			api_url=self.api_url,
+			correlation_id=self.correlation_id,
+			settings=self.settings,
+		)
 
+		stale_token = None
 		if force_fresh:
-			# Clear any existing cached token
-			auth.clear_cached_token()
+			# A forced refresh replaces the cached token without clearing it first
+			stale_token = self._bearer_token() or auth._get_cached_token_from_db()
 
-		auth_response = auth.authenticate()
+		auth_response = auth.authenticate(stale_token=stale_token)
 
 		if not auth_response or not auth_response.get("token"):
 			client_short = self.client_id[:8] if self.client_id else "unknown"
-			frappe.log_error(
+			log_error(
 				f"Failed to authenticate with Airwallex API for client {self.client_id}",
 				f"Auth Failed - {client_short}",
+				correlation_id=self.correlation_id,
 			)
 			return None
 
 		return auth_response["token"]
 
-	def get_valid_token(self, force_fresh=False):
+	def get_valid_token(self, force_fresh=False, stale_token=None):
 		"""Get a valid bearer token using database-based token storage"""
 		from bank_integration.airwallex.api.airwallex_authenticator import AirwallexAuthenticator
 
-		auth = AirwallexAuthenticator(client_id=self.client_id, api_key=self.api_key, api_url=self.api_url)
+		auth = AirwallexAuthenticator(
+			client_id=self.client_id,
+			api_key=self.api_key,
+			api_url=self.api_url,
+			correlation_id=self.correlation_id,
+			settings=self.settings,
+		)
 
 		if force_fresh:
-			auth.clear_cached_token()
-			return self.authenticate_and_cache_token(force_fresh=True)
+			# The rejected token stays cached until the single-flight refresh replaces it
+			return auth.get_valid_token(stale_token=stale_token or auth._get_cached_token_from_db())
 
 		# Use the authenticator's method to get a valid token
 		return auth.get_valid_token()
@@ -94,10 +136,16 @@ class AirwallexBase:
 		"""Refresh token when we get unauthorized error"""
 		from bank_integration.airwallex.api.airwallex_authenticator import AirwallexAuthenticator
 
-		auth = AirwallexAuthenticator(client_id=self.client_id, api_key=self.api_key, api_url=self.api_url)
+		auth = AirwallexAuthenticator(
+			client_id=self.client_id,
+			api_key=self.api_key,
+			api_url=self.api_url,
+			correlation_id=self.correlation_id,
+			settings=self.settings,
+		)
 
 		# Handle token invalidation and get fresh token
-		token = auth.handle_token_invalidation()
+		token = auth.handle_token_invalidation(stale_token=self._bearer_token())
 		if token:
 			self.headers["Authorization"] = f"Bearer {token}"
 			return True
@@ -107,9 +155,11 @@ class AirwallexBase:
 		"""Ensure headers have valid bearer token"""
 		if force_fresh:
 			# Force fresh token - clear headers and get new token
+			stale_token = self._bearer_token()
 			if "Authorization" in self.headers:
 				del self.headers["Authorization"]
-			token = self.get_valid_token(force_fresh=True)
+			with track(self.metrics, "token"):
+				token = self.get_valid_token(force_fresh=True, stale_token=stale_token)
 			if token:
 				self.headers["Authorization"] = f"Bearer {token}"
 			else:
@@ -117,7 +167,8 @@ class AirwallexBase:
 				raise AirwallexAPIError(f"Authentication failed for client {client_short}", 401)
 		elif "Authorization" not in self.headers:
 			# No auth header exists - try to get a valid token (could be cached)
-			token = self.get_valid_token(force_fresh=False)
+			with track(self.metrics, "token"):
+				token = self.get_valid_token(force_fresh=False)
 			if token:
 				self.headers["Authorization"] = f"Bearer {token}"
 			else:
@@ -125,21 +176,55 @@ class AirwallexBase:
 				raise AirwallexAPIError(f"Authentication failed for client {client_short}", 401)
 		# If Authorization header exists and force_fresh=False, do nothing
 
-	def get(self, endpoint=None, params=None, headers=None):
+	def _bearer_token(self):
+		"""Token this client currently sends, or None"""
+		return (self.headers.get("Authorization") or "").removeprefix("Bearer ") or None
+
+	def get(self, endpoint=None, params=None, headers=None, stream=False, cache_ttl=None, use_cache=True):
+		"""GET request; with stream=True a list response is returned as a JSONItemStream.
+
+		With cache_ttl the response is cached for that many seconds per client, URL and
+		params; use_cache=False skips the cached copy and fetches a fresh one.
+		"""
 		# Ensure we have auth token for API calls (not auth endpoints)
 		if not self.is_auth_instance:
 			self.ensure_authenticated_headers()
 
+		cache = None
+		if not stream:
+			cache = get_response_cache(
+				"Airwallex",
+				self.client_id,
+				self._build_url(endpoint, SupportedHTTPMethod.GET),
+				params,
+				cache_ttl,
+				use_cache,
+			)
+			if cache and cache.fresh:
+				if self.metrics:
+					self.metrics.incr("cache_hits")
+				return cache.data
+
 		try:
 			return self._make_request(
-				SupportedHTTPMethod.GET, endpoint=endpoint, params=params, headers=headers
+				SupportedHTTPMethod.GET,
+				endpoint=endpoint,
+				params=params,
+				headers=headers,
+				stream=stream,
+				cache=cache,
 			)
 		except AirwallexAPIError as e:
 			# If unauthorized and not an auth instance, try with fresh token
 			if e.status_code == 401 and not self.is_auth_instance:
 				if self.refresh_token_on_unauthorized():
 					return self._make_request(
-						SupportedHTTPMethod.GET, endpoint=endpoint, params=params, headers=headers
+						SupportedHTTPMethod.GET,
+						endpoint=endpoint,
+						params=params,
+						headers=headers,
+						stream=stream,
+						cache=cache,
 					)
 			raise
 
@@ -192,32 +277,72 @@ class AirwallexBase:
 					)
 			raise
 
-	def _make_request(self, method: SupportedHTTPMethod, endpoint=None, params=None, json=None, headers=None):
+	def _make_request(
+		self,
+		method: SupportedHTTPMethod,
+		endpoint=None,
+		params=None,
+		json=None,
+		headers=None,
+		stream=False,
+		cache=None,
+	):
 		"""Base method for making HTTP requests."""
 		url = self._build_url(endpoint, method)
 		request_headers = {**self.headers, **(headers or {})}
+		if cache and cache.etag:
+			# A stale cached copy is revalidated rather than downloaded again
+			request_headers["If-None-Match"] = cache.etag
 
 		params = params or {}
 		self._prepare_log(url, params, json, request_headers)
 		response = None
 
 		try:
-			response = requests.request(method.value, url, params=params, json=json, headers=request_headers)
-
-			try:
-				response_data = response.json()
-			except ValueError:
-				response_data = response.text
-
-			self.create_connection_log(
-				status=str(response.status_code),
-				message=str(response.text),
-				response=response_data,
-				method=method.value,
-				headers=request_headers,
-				payload=str(params) if json is None else str(json),
-				url=url,
-			)
+			started = time.perf_counter()
+			with track(self.metrics, "http"):
+				response = requests.request(
+					method.value, url, params=params, json=json, headers=request_headers, stream=stream
+				)
+
+			# Error bodies are small; only successful list bodies are streamed
+			if stream and response.status_code < 400:
+				return self._stream_items(response, method, url, params if json is None else json, started)
+
+			duration_ms = int((time.perf_counter() - started) * 1000)
+
+			if cache and cache.etag and response.status_code == 304:
+				if self.metrics:
+					self.metrics.incr("not_modified")
+				with track(self.metrics, "logging"):
+					self.create_connection_log(
+						status="304",
+						message="Not Modified, served from cache",
+						duration_ms=duration_ms,
+						method=method.value,
+						headers=self.log_data["headers"],
+						payload=params,
+						url=url,
+					)
+				return cache.revalidated()
+
+			with track(self.metrics, "json_decode"):
+				try:
+					response_data = response.json()
+				except ValueError:
+					response_data = response.text
+
+			with track(self.metrics, "logging"):
+				self.create_connection_log(
+					status=str(response.status_code),
+					message=message_preview(response.text),
+					duration_ms=duration_ms,
+					response=response_data,
+					method=method.value,
+					headers=self.log_data["headers"],
+					payload=params if json is None else json,
+					url=url,
+				)
 
 			# Check if the request was successful
 			if response.status_code >= 400:
@@ -230,7 +355,13 @@ class AirwallexBase:
 				error_msg = f"Unauthorized: {response_data.get('message', 'Access denied')}"
 				raise AirwallexAPIError(error_msg, 401)
 
-			return response_data if isinstance(response_data, dict) else {"error": response_data}
+			# Some endpoints (balances) answer with a bare list
+			if not isinstance(response_data, dict | list):
+				return {"error": response_data}
+
+			if cache:
+				cache.store(response_data, response.headers.get("ETag"))
+			return response_data
 
 		except AirwallexAPIError:
 			# Re-raise API errors
@@ -242,7 +373,8 @@ class AirwallexBase:
 				message="Error",
 				response=error_response,
 				method=method.value,
-				payload=str(params) if json is None else str(json),
+				headers=self.log_data["headers"],
+				payload=params if json is None else json,
 				url=url,
 			)
 			# Raise a custom exception instead of using frappe.throw
@@ -250,6 +382,32 @@ class AirwallexBase:
 				str(e).replace(self.api_key, "****"), getattr(response, "status_code", 500)
 			)
 
+	def _stream_items(self, response, method, url, payload, started):
+		"""Items of a list response, decoded while they are read; logged once fully read"""
+
+		def log_stream(stream, error):
+			response.close()
+			with track(self.metrics, "logging"):
+				self.create_connection_log(
+					status=str(response.status_code),
+					message=f"Stream failed after {stream.count} items: {error}"
+					if error
+					else message_preview(stream.preview),
+					duration_ms=int((time.perf_counter() - started) * 1000),
+					# Only the bounded prefix of the body is kept, never the whole page
+					response={**stream.meta, "items_read": stream.count, "body_prefix": stream.preview},
+					method=method.value,
+					headers=self.log_data["headers"],
+					payload=payload,
+					url=url,
+				)
+
+		return JSONItemStream(
+			response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+			preview_length=LOG_MESSAGE_LENGTH,
+			on_complete=log_stream,
+		)
+
 	def _build_url(self, endpoint, method):
 		"""Generate full API URL ensuring correct formatting."""
 		base_url = self.base_url + "/"  # Ensure base_url has a trailing slash
@@ -285,22 +443,36 @@ class AirwallexBase:
 		frappe.logger().info(log_data)
 
 	def create_connection_log(
-		self, status, message, response=None, method=None, headers=None, payload=None, url=None
+		self,
+		status,
+		message,
+		response=None,
+		method=None,
+		headers=None,
+		payload=None,
+		url=None,
+		duration_ms=None,
 	):
 		"""Create log entry for connection test"""
 		try:
-			status_string = "Success" if str(status).startswith("2") else "Error"
+			# 304 answers a conditional request whose cached copy is still current
+			status_string = "Success" if str(status).startswith("2") or str(status) == "304" else "Error"
 			log = frappe.get_doc(
 				{
 					"doctype": "Bank Integration Log",
 					"status": str(status_string),
 					"message": str(message),
-					"response_data": str(response) if response else "",
-					"request_data": str(payload) if payload else "",
+					# Payloads are passed as-is; the log encodes them compactly on insert
+					"response_data": response or "",
+					"request_data": payload or "",
 					"url": url or self.log_data.get("url", ""),  # Use passed URL or from log_data
 					"method": str(method) if method else "",
 					"status_code": str(status),
-					"request_headers": str(headers) if headers else "",
+					"request_headers": headers or "",
+					"provider": "Airwallex",
+					"client_ref": self.client_id,
+					"duration_ms": duration_ms,
+					"correlation_id": self.correlation_id,
 				}
 			)
 			if self.enable_api_log:
@@ -313,11 +485,7 @@ class AirwallexBase:
 
 	def _get_api_url(self):
 		"""Get API URL from settings"""
-		try:
-			settings = frappe.get_single("Bank Integration Setting")
-			return settings.api_url or "https://api.airwallex.com"
-		except Exception:
-			return "https://api.airwallex.com"
+		return self.settings.api_url or "https://api.airwallex.com"
 
 
 # Add a custom exception class
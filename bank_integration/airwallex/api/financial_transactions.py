@@ -1,11 +1,18 @@
 from bank_integration.airwallex.api.base_api import AirwallexBase
+from bank_integration.common.response_cache import DETAIL_TTL, LIST_TTL
 
 
 class FinancialTransactions(AirwallexBase):
 	"""API class for Airwallex Financial Transactions endpoint"""
 
-	def __init__(self, client_id=None, api_key=None, api_url=None):
-		super().__init__(client_id=client_id, api_key=api_key, api_url=api_url)
+	def __init__(self, client_id=None, api_key=None, api_url=None, correlation_id=None, settings=None):
+		super().__init__(
+			client_id=client_id,
+			api_key=api_key,
+			api_url=api_url,
+			correlation_id=correlation_id,
+			settings=settings,
+		)
 
 	def get_list(
 		self,
@@ -17,6 +24,7 @@ class FinancialTransactions(AirwallexBase):
 		source_id=None,
 		status=None,
 		to_created_at=None,
+		use_cache=True,
 	):
 		"""
 		Get list of financial transactions
@@ -30,10 +38,49 @@ class FinancialTransactions(AirwallexBase):
 		    source_id (str, optional): The source ID of the transaction
 		    status (str, optional): Status of the financial transaction, one of: PENDING, SETTLED
 		    to_created_at (str, optional): The end time of created_at in ISO8601 format (e.g., '2023-10-14T15:30:00Z')
+		    use_cache (bool, optional): Serve a page fetched in the last LIST_TTL seconds; False always fetches
 
 		Returns:
 		    dict: API response containing list of financial transactions
 		"""
+		return self.get(
+			endpoint="financial_transactions",
+			params=self._list_params(
+				batch_id, currency, from_created_at, page_num, page_size, source_id, status, to_created_at
+			),
+			cache_ttl=LIST_TTL,
+			use_cache=use_cache,
+		)
+
+	def iter_list(
+		self,
+		batch_id=None,
+		currency=None,
+		from_created_at=None,
+		page_num=None,
+		page_size=None,
+		source_id=None,
+		status=None,
+		to_created_at=None,
+	):
+		"""
+		Same as get_list, but the page is decoded while it is read
+
+		Returns:
+		    JSONItemStream: Iterates the transactions one at a time; `.meta["has_more"]`
+		    is set once the page has been read to the end
+		"""
+		return self.get(
+			endpoint="financial_transactions",
+			params=self._list_params(
+				batch_id, currency, from_created_at, page_num, page_size, source_id, status, to_created_at
+			),
+			stream=True,
+		)
+
+	def _list_params(
+		self, batch_id, currency, from_created_at, page_num, page_size, source_id, status, to_created_at
+	):
 		params = {}
 
 		# Add parameters only if they are provided
@@ -54,19 +101,22 @@ class FinancialTransactions(AirwallexBase):
 		if to_created_at is not None:
 			params["to_created_at"] = to_created_at
 
-		return self.get(endpoint="financial_transactions", params=params)
+		return params
 
-	def get_by_id(self, transaction_id):
+	def get_by_id(self, transaction_id, use_cache=True):
 		"""
 		Get a specific financial transaction by ID
 
 		Args:
 		    transaction_id (str): The ID of the financial transaction
+		    use_cache (bool, optional): Serve a copy fetched in the last DETAIL_TTL seconds; False always fetches
 
 		Returns:
 		    dict: API response containing the financial transaction details
 		"""
-		return self.get(endpoint=f"financial_transactions/{transaction_id}")
+		return self.get(
+			endpoint=f"financial_transactions/{transaction_id}", cache_ttl=DETAIL_TTL, use_cache=use_cache
+		)
 
 
 def test_get_transactions():
@@ -0,0 +1,132 @@
+from itertools import islice
+
+import frappe
+from frappe.utils import flt
+
+from bank_integration.airwallex.api.airwallex_authenticator import AirwallexAuthenticator
+from bank_integration.airwallex.api.balances import Balances
+from bank_integration.airwallex.api.financial_transactions import FinancialTransactions
+from bank_integration.airwallex.status_refresh import refresh_pending_transactions
+from bank_integration.airwallex.transaction import should_insert_transaction
+from bank_integration.airwallex.utils import map_airwallex_page
+from bank_integration.bank_integration.doctype.bank_integration_setting.bank_integration_setting import (
+	to_iso8601,
+	update_sync_progress,
+)
+from bank_integration.common.providers import BankBalance, BankProvider, SyncSource
+
+
+class AirwallexProvider(BankProvider):
+	"""Airwallex financial transactions, one source per configured client"""
+
+	name = "Airwallex"
+	# Largest page the financial_transactions endpoint serves
+	page_size = 1000
+
+	def is_enabled(self, settings):
+		return settings.enable_airwallex
+
+	def get_sources(self, settings):
+		return [
+			SyncSource(
+				provider=self.name,
+				scope=client.airwallex_client_id,
+				lease_scope=client.airwallex_client_id,
+				bank_account=client.bank_account,
+				label=client.airwallex_client_id[:8],
+				schedule=settings.sync_schedule,
+			)
+			for client in settings.get_airwallex_clients()
+		]
+
+	def validate_sources(self, settings, sources):
+		if not settings.airwallex_clients:
+			frappe.throw("No Airwallex clients configured")
+
+	def get_client(self, settings, source, correlation_id=None):
+		client = settings.get_airwallex_client(source.scope)
+		return FinancialTransactions(
+			client_id=client.airwallex_client_id,
+			api_key=client.api_key,
+			api_url=settings.api_url,
+			correlation_id=correlation_id,
+			settings=settings,
+		)
+
+	def get_authenticators(self, settings):
+		# One token per client
+		return [
+			(
+				client.airwallex_client_id,
+				AirwallexAuthenticator(
+					client_id=client.airwallex_client_id,
+					api_key=client.api_key,
+					api_url=settings.api_url,
+					settings=settings,
+				),
+			)
+			for client in settings.get_airwallex_clients()
+			if client.api_key
+		]
+
+	def fetch_pages(self, client, source, from_date, to_date):
+		from_date_iso = to_iso8601(from_date)
+		to_date_iso = to_iso8601(to_date)
+
+		page_num = 0
+		while True:
+			# Transactions are decoded while the page is read, so a full page is never in memory
+			stream = client.iter_list(
+				from_created_at=from_date_iso,
+				to_created_at=to_date_iso,
+				page_num=page_num,
+				page_size=self.page_size,
+			)
+			items = iter(stream)
+			while batch := list(islice(items, self.batch_size)):
+				yield batch
+
+			# has_more may follow the items in the body, so it is read after them
+			if not stream.count or not stream.meta.get("has_more"):
+				return
+			page_num += 1
+
+	def map_page(self, page, bank_account, correlation_id=None):
+		return map_airwallex_page(page, bank_account, correlation_id)
+
+	def get_match_references(self, record):
+		# source_id identifies the payment itself; batch_id is shared by a whole payout
+		return [record.get("airwallex_source_id"), record.reference_number]
+
+	def get_insert_filter(self, settings):
+		return lambda record: should_insert_transaction(record, settings)
+
+	def fetch_balances(self, settings, source, correlation_id=None):
+		client = settings.get_airwallex_client(source.scope)
+		api = Balances(
+			client_id=client.airwallex_client_id,
+			api_key=client.api_key,
+			api_url=settings.api_url,
+			correlation_id=correlation_id,
+			settings=settings,
+		)
+		response = api.get_current()
+		rows = response if isinstance(response, list) else response.get("items", [])
+
+		# Pending amounts are included: pending financial transactions are synced too
+		return [
+			BankBalance(
+				currency=row["currency"],
+				balance=flt(row.get("total_amount")),
+				available_balance=flt(row.get("available_amount")),
+			)
+			for row in rows
+			if row.get("currency")
+		]
+
+	def after_sync(self, client, source, settings, correlation_id=None):
+		# Catch settlements and cancellations of transactions first ingested while pending
+		refresh_pending_transactions(settings.get_airwallex_client(source.scope), settings, correlation_id)
+
+	def update_settings_progress(self, processed, total, status="In Progress"):
+		update_sync_progress(processed, total, status)
@@ -0,0 +1,187 @@
+from collections import defaultdict
+
+import frappe
+from frappe.utils import add_days, get_datetime, now_datetime, nowdate
+
+from bank_integration.airwallex.api.financial_transactions import FinancialTransactions
+from bank_integration.airwallex.utils import map_airwallex_status_to_erpnext
+from bank_integration.bank_integration.doctype.bank_integration_setting.bank_integration_setting import (
+	to_iso8601,
+)
+from bank_integration.bank_integration.doctype.bank_running_total.bank_running_total import (
+	CANCELLED_STATUS,
+	add_to_running_total,
+	net_amount,
+)
+from bank_integration.common.bank_transactions import external_key
+from bank_integration.common.correlation import log_error
+
+# Local status of transactions ingested while still PENDING at Airwallex
+PENDING_STATUS = "Unreconciled"
+
+LIST_PAGE_SIZE = 1000
+# Pending rows not found among the settled list are looked up one by one, oldest first
+BY_ID_LIMIT = 100
+UPDATE_BATCH_SIZE = 500
+
+
+def refresh_pending_transactions(client, settings, correlation_id=None):
+	"""Re-fetch this client's locally pending Airwallex transactions and apply status changes.
+
+	Returns the number of Bank Transactions whose status was updated.
+	"""
+	days = settings.refresh_pending_days
+	if not days or not client.bank_account:
+		return 0
+
+	pending = get_pending_transactions(client.bank_account, add_days(nowdate(), -days))
+	if not pending:
+		return 0
+
+	api = FinancialTransactions(
+		client_id=client.airwallex_client_id,
+		api_key=client.api_key,
+		api_url=settings.api_url,
+		correlation_id=correlation_id,
+		settings=settings,
+	)
+
+	try:
+		remote_statuses = fetch_remote_statuses(api, pending)
+	except Exception as e:
+		log_error(
+			f"Pending status refresh failed for client {client.airwallex_client_id}: {str(e)[:300]}",
+			f"Status Refresh - {client.airwallex_client_id[:8]}",
+			correlation_id=correlation_id,
+		)
+		return 0
+
+	# Only rows whose status actually changed are written, grouped by their new status
+	changes = defaultdict(list)
+	for transaction_id, row in pending.items():
+		remote_status = remote_statuses.get(transaction_id)
+		if not remote_status:
+			continue
+
+		new_status = map_airwallex_status_to_erpnext(remote_status)
+		if new_status != row.status:
+			changes[new_status].append(row.name)
+
+	updated = apply_status_changes(changes)
+	if updated:
+		frappe.logger().info(
+			f"[{correlation_id}] Client {client.airwallex_client_id[:8]}: refreshed status of {updated} "
+			f"pending transactions"
+		)
+	return updated
+
+
+def get_pending_transactions(bank_account, from_date):
+	"""Submitted, still pending Airwallex Bank Transactions of the account keyed by transaction_id"""
+	rows = frappe.get_all(
+		"Bank Transaction",
+		filters={
+			"bank_account": bank_account,
+			"docstatus": 1,
+			"status": PENDING_STATUS,
+			"date": [">=", from_date],
+			# Skript, statement and manual rows of the same account are not Airwallex ids
+			"external_key": ["like", external_key("Airwallex", "%")],
+		},
+		fields=["name", "transaction_id", "status", "date"],
+		order_by="date asc",
+	)
+	return {row.transaction_id: row for row in rows}
+
+
+def fetch_remote_statuses(api, pending):
+	"""Current Airwallex status for as many of the pending ids as a narrow query allows"""
+	statuses = {}
+
+	# Most pending transactions settle, so one SETTLED listing over their window catches the bulk
+	# Dates are stored as local days, so start a day early to cover the UTC offset
+	from_date = get_datetime(add_days(min(row.date for row in pending.values()), -1))
+	page_num = 0
+	while True:
+		# Only id and status are kept, so the page is streamed instead of decoded whole
+		stream = api.iter_list(
+			status="SETTLED",
+			from_created_at=to_iso8601(from_date),
+			to_created_at=to_iso8601(now_datetime()),
+			page_num=page_num,
+			page_size=LIST_PAGE_SIZE,
+		)
+		for txn in stream:
+			if txn.get("id") in pending:
+				statuses[txn["id"]] = txn.get("status") or "SETTLED"
+
+		if not stream.count or not stream.meta.get("has_more") or len(statuses) == len(pending):
+			break
+		page_num += 1
+
+	# The rest are still pending or were cancelled; check the oldest individually
+	remaining = [transaction_id for transaction_id in pending if transaction_id not in statuses]
+	for transaction_id in remaining[:BY_ID_LIMIT]:
+		try:
+			txn = api.get_by_id(transaction_id)
+		except Exception as e:
+			# An id Airwallex no longer knows must not hold up the others; it is retried next poll
+			frappe.logger().warning(
+				f"Status lookup of Airwallex transaction {transaction_id} failed: "
+				f"{str(getattr(e, 'message', None) or e)[:300]}"
+			)
+			continue
+		if isinstance(txn, dict) and txn.get("status"):
+			statuses[transaction_id] = txn["status"]
+
+	return statuses
+
+
+def apply_status_changes(changes):
+	"""Bulk update Bank Transaction status, one UPDATE per new status and batch"""
+	bank_transaction = frappe.qb.DocType("Bank Transaction")
+	modified = now_datetime()
+	updated = 0
+
+	for status, names in changes.items():
+		for start in range(0, len(names), UPDATE_BATCH_SIZE):
+			batch = names[start : start + UPDATE_BATCH_SIZE]
+			# Rows reconciled since they were read are left out. The rest stay locked until
+			# the commit, so they are exactly the rows updated, counted and moved below.
+			pending = frappe.get_all(
+				"Bank Transaction",
+				filters={"name": ["in", batch], "status": PENDING_STATUS},
+				fields=["name", "bank_account", "currency", "deposit", "withdrawal"],
+				for_update=True,
+			)
+			if not pending:
+				continue
+
+			(
+				frappe.qb.update(bank_transaction)
+				.set(bank_transaction.status, status)
+				.set(bank_transaction.modified, modified)
+				.where(bank_transaction.name.isin([row.name for row in pending]))
+				.where(bank_transaction.status == PENDING_STATUS)
+				.run()
+			)
+			updated += len(pending)
+			if status == CANCELLED_STATUS:
+				remove_from_running_totals(pending)
+
+	if updated:
+		frappe.db.commit()
+
+	return updated
+
+
+def remove_from_running_totals(rows):
+	"""Take transactions the bank cancelled out of their running totals, one UPDATE per total"""
+	totals = defaultdict(lambda: [0, 0])
+	for row in rows:
+		total = totals[(row.bank_account, row.currency)]
+		total[0] -= net_amount(row)
+		total[1] -= 1
+
+	for (bank_account, currency), (amount, count) in totals.items():
+		add_to_running_total(bank_account, currency, amount, count)
@@ -2,6 +2,12 @@ from datetime import datetime
 
 import frappe
 
+from bank_integration.common.bank_transactions import MappedTransaction, external_key
+from bank_integration.common.correlation import log_error
+
+# Airwallex status -> ERPNext Bank Transaction status
+AIRWALLEX_STATUS_MAP = {"PENDING": "Unreconciled", "SETTLED": "Settled", "CANCELLED": "Cancelled"}
+
 
 def map_airwallex_status_to_erpnext(airwallex_status):
 	"""
@@ -13,65 +19,112 @@ def map_airwallex_status_to_erpnext(airwallex_status):
 	Returns:
 	    str: ERPNext Bank Transaction status
 	"""
-	status_mapping = {"PENDING": "Unreconciled", "SETTLED": "Settled", "CANCELLED": "Cancelled"}
-
-	return status_mapping.get(airwallex_status.upper(), "Unreconciled")
+	return AIRWALLEX_STATUS_MAP.get(airwallex_status.upper(), "Unreconciled")
 
 
-def map_airwallex_to_erpnext(txn, bank_account):
+def map_airwallex_to_erpnext(txn, bank_account, correlation_id=None):
 	"""
 	Maps an Airwallex transaction to ERPNext Bank Transaction format.
 
 	Args:
 	    txn (dict): Airwallex transaction payload.
 	    bank_account (str): ERPNext Bank Account name.
+	    correlation_id (str, optional): Sync run correlation id for error logs.
 
 	Returns:
 	    dict: ERPNext Bank Transaction dictionary.
 	"""
-	# Get the amount first
-	amount = txn.get("net", 0)
+	return map_airwallex_page([txn], bank_account, correlation_id)[0].as_doc()
+
+
+def map_airwallex_page(transactions, bank_account, correlation_id=None):
+	"""
+	Maps a page of Airwallex transactions in one pass.
 
-	# Determine transaction direction
-	is_deposit = amount > 0
+	The bank account currency is looked up once for the page and dates are taken
+	straight from the ISO timestamp, so the per-row cost is plain attribute access.
 
-	# Get transaction currency
-	txn_currency = txn.get("currency", "")
+	Args:
+	    transactions (list): Airwallex transaction payloads.
+	    bank_account (str): ERPNext Bank Account name.
+	    correlation_id (str, optional): Sync run correlation id for error logs.
+
+	Returns:
+	    list[MappedTransaction]: One mapped record per well-formed transaction, in order.
+	"""
+	bank_account_currency = get_bank_account_currency(bank_account, correlation_id)
+	status_map = AIRWALLEX_STATUS_MAP
+	mismatched = 0
+	mapped = []
 
-	# Check if bank account currency matches transaction currency
-	mapped_bank_account = None
-	if bank_account and txn_currency:
+	for txn in transactions:
+		# A malformed record is logged and left out; the rest of the page is still synced
 		try:
-			# Fetch the bank account currency from the database
-			account = frappe.db.get_value("Bank Account", bank_account, "account")
-			bank_account_currency = frappe.db.get_value("Account", account, "account_currency")
-
-			# Only map if currencies match
-			if bank_account_currency == txn_currency:
-				mapped_bank_account = bank_account
-			else:
-				frappe.logger().info(
-					f"Currency mismatch: Transaction {txn.get('id')} currency {txn_currency} "
-					f"doesn't match Bank Account {bank_account} currency {bank_account_currency}"
+			amount = txn.get("net", 0)
+			is_deposit = amount > 0
+			txn_currency = txn.get("currency", "")
+			transaction_id = txn.get("id")
+			source_type = txn.get("source_type", "")
+
+			# Only map the bank account when the currencies match
+			mapped_bank_account = None
+			if bank_account_currency and txn_currency:
+				if bank_account_currency == txn_currency:
+					mapped_bank_account = bank_account
+				else:
+					mismatched += 1
+
+			mapped.append(
+				MappedTransaction(
+					transaction_id=transaction_id,
+					external_key=external_key("Airwallex", transaction_id),
+					date=(txn.get("created_at") or "")[:10],  # YYYY-MM-DD
+					status=status_map.get((txn.get("status") or "PENDING").upper(), "Unreconciled"),
+					bank_account=mapped_bank_account,
+					currency=txn_currency,
+					description=txn.get("description") or source_type,
+					reference_number=txn.get("batch_id", ""),
+					transaction_type=txn.get("transaction_type", ""),
+					deposit=amount if is_deposit else 0,
+					withdrawal=abs(amount) if not is_deposit else 0,  # Use abs() for withdrawal amounts
+					extra={
+						"airwallex_source_type": source_type,
+						"airwallex_source_id": txn.get("source_id", ""),
+					},
 				)
+			)
 		except Exception as e:
-			frappe.log_error(f"Error fetching bank account currency: {e}")
-
-	return {
-		"doctype": "Bank Transaction",
-		"date": txn.get("created_at", "")[:10],  # YYYY-MM-DD
-		"status": map_airwallex_status_to_erpnext(txn.get("status", "PENDING")),
-		"bank_account": mapped_bank_account,
-		"currency": txn_currency,
-		"description": txn.get("description") or txn.get("source_type", ""),
-		"reference_number": txn.get("batch_id", ""),
-		"transaction_id": txn.get("id"),
-		"transaction_type": txn.get("transaction_type", ""),
-		"deposit": amount if is_deposit else 0,
-		"withdrawal": abs(amount) if not is_deposit else 0,  # Use abs() for withdrawal amounts
-		"airwallex_source_type": txn.get("source_type", ""),
-		"airwallex_source_id": txn.get("source_id", ""),
-	}
+			transaction_id = txn.get("id", "unknown") if isinstance(txn, dict) else "unknown"
+			log_error(
+				f"Failed to map Airwallex transaction {transaction_id}: {str(e)[:300]}",
+				"Airwallex Mapping Error",
+				correlation_id=correlation_id,
+			)
+
+	if mismatched:
+		frappe.logger().info(
+			f"Currency mismatch: {mismatched} transactions don't match Bank Account {bank_account} "
+			f"currency {bank_account_currency}; left without bank account"
+		)
+
+	return mapped
+
+
+def get_bank_account_currency(bank_account, correlation_id=None):
+	"""Currency of the GL account behind an ERPNext Bank Account"""
+	if not bank_account:
+		return None
+
+	try:
+		account = frappe.db.get_value("Bank Account", bank_account, "account")
+		return frappe.db.get_value("Account", account, "account_currency")
+	except Exception as e:
+		log_error(
+			f"Error fetching bank account currency: {e}",
+			"Airwallex Mapping Error",
+			correlation_id=correlation_id,
+		)
+		return None
 
 
 def test_airwallex_mapping():
@@ -0,0 +1,231 @@
+import hashlib
+import hmac
+import json
+import time
+
+import frappe
+from frappe import _
+
+from bank_integration.common.correlation import log_error
+from bank_integration.common.providers import get_provider
+from bank_integration.common.sync_engine import sync_pushed_page
+from bank_integration.common.sync_lease import SyncLease
+from bank_integration.common.sync_settings import get_sync_settings
+
+# Webhook events wait in a redis list until the worker drains them in micro-batches
+QUEUE_KEY = "bank_integration:airwallex_webhook_events"
+BATCH_SIZE = 200
+
+# An event that fails on its own waits in the retry list for the next worker start;
+# after MAX_ATTEMPTS failures it is moved to the dead-letter list and logged
+RETRY_KEY = "bank_integration:airwallex_webhook_retry"
+DEAD_LETTER_KEY = "bank_integration:airwallex_webhook_dead_letter"
+ATTEMPTS_KEY = "bank_integration:airwallex_webhook_attempts"
+MAX_ATTEMPTS = 5
+
+# Airwallex signs timestamp + body; older deliveries are treated as replays
+MAX_TIMESTAMP_SKEW = 300
+EVENT_ID_TTL = 24 * 60 * 60
+
+WORKER_JOB_ID = "bank_integration:airwallex_webhook_worker"
+
+
+class InvalidSignature(frappe.AuthenticationError):
+	pass
+
+
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def receive():
+	"""Airwallex webhook endpoint: verify, queue, acknowledge.
+
+	Nothing is written to the database here so Airwallex gets its 200 quickly;
+	the worker picks the event up within seconds.
+	"""
+	settings = get_sync_settings()
+	if not settings.enable_airwallex:
+		raise frappe.PermissionError(_("Airwallex integration is disabled"))
+
+	body = frappe.request.get_data()
+	verify_signature(
+		settings.airwallex_webhook_secret,
+		frappe.get_request_header("x-timestamp"),
+		frappe.get_request_header("x-signature"),
+		body,
+	)
+
+	event = json.loads(body)
+	# Airwallex retries until it gets a 2xx; queue each event id only once
+	seen_key = event.get("id") and frappe.cache().make_key(
+		f"bank_integration:airwallex_webhook_seen:{event['id']}"
+	)
+	if seen_key and frappe.cache().get(seen_key):
+		return {"status": "duplicate"}
+
+	frappe.cache().rpush(QUEUE_KEY, body)
+	# Only once queued: a failed push must leave the retried delivery acceptable.
+	# Two concurrent deliveries may both be queued; the writer skips the second.
+	if seen_key:
+		frappe.cache().set(seen_key, 1, ex=EVENT_ID_TTL)
+	enqueue_worker()
+	return {"status": "queued"}
+
+
+def verify_signature(secret, timestamp, signature, body):
+	"""HMAC-SHA256 of x-timestamp + raw body, compared in constant time"""
+	if not secret:
+		raise InvalidSignature(_("Airwallex webhook secret is not configured"))
+	if not timestamp or not signature:
+		raise InvalidSignature(_("Missing webhook signature headers"))
+
+	try:
+		# x-timestamp is in milliseconds
+		skew = abs(time.time() - int(timestamp) / 1000)
+	except ValueError:
+		raise InvalidSignature(_("Invalid webhook timestamp")) from None
+	if skew > MAX_TIMESTAMP_SKEW:
+		raise InvalidSignature(_("Webhook timestamp outside the allowed window"))
+
+	expected = hmac.new(secret.encode(), timestamp.encode() + body, hashlib.sha256).hexdigest()
+	if not hmac.compare_digest(expected, signature):
+		raise InvalidSignature(_("Webhook signature mismatch"))
+
+
+def enqueue_worker():
+	"""Start the worker unless one is already queued; it drains everything queued so far"""
+	frappe.enqueue(
+		"bank_integration.airwallex.webhook.process_queued_events",
+		queue="short",
+		job_id=WORKER_JOB_ID,
+		deduplicate=True,
+	)
+
+
+def drain_queue():
+	"""Scheduled safety net for events left behind by a failed worker, and for retries"""
+	if frappe.cache().llen(QUEUE_KEY) or frappe.cache().llen(RETRY_KEY):
+		enqueue_worker()
+
+
+def process_queued_events():
+	"""Write queued webhook events in micro-batches until the queue is empty"""
+	# A single consumer keeps batch reads (range + trim) race free
+	lease = SyncLease("Airwallex", "webhook")
+	if not lease.acquire():
+		return
+
+	try:
+		settings = get_sync_settings()
+		# Events that failed in an earlier drain get one more attempt per worker start
+		retries = frappe.cache().lrange(RETRY_KEY, 0, -1)
+		for event in retries:
+			frappe.cache().rpush(QUEUE_KEY, event)
+		if retries:
+			frappe.cache().ltrim(RETRY_KEY, len(retries), -1)
+
+		while events := frappe.cache().lrange(QUEUE_KEY, 0, BATCH_SIZE - 1):
+			try:
+				process_events(settings, [json.loads(event) for event in events])
+			except Exception:
+				# Find the events that fail on their own; the rest of the batch is written
+				frappe.db.rollback()
+				for event in events:
+					process_event(settings, event)
+			frappe.cache().ltrim(QUEUE_KEY, len(events), -1)
+			lease.heartbeat()
+	finally:
+		lease.release()
+
+
+def process_event(settings, event):
+	"""Write one queued event; a failure sends it to the retry or dead-letter list"""
+	try:
+		process_events(settings, [json.loads(event)])
+	except Exception:
+		frappe.db.rollback()
+		record_failure(event, frappe.get_traceback())
+	else:
+		frappe.cache().hdel(ATTEMPTS_KEY, event_key(event))
+
+
+def record_failure(event, traceback):
+	key = event_key(event)
+	attempts = frappe.cache().hincrby(frappe.cache().make_key(ATTEMPTS_KEY), key, 1)
+	if attempts < MAX_ATTEMPTS:
+		frappe.cache().rpush(RETRY_KEY, event)
+		return
+
+	frappe.cache().rpush(DEAD_LETTER_KEY, event)
+	frappe.cache().hdel(ATTEMPTS_KEY, key)
+	log_error(
+		f"Airwallex webhook event {key} failed {attempts} times and was moved to the dead-letter list\n"
+		f"{traceback}",
+		"Airwallex Webhook Error",
+	)
+
+
+def requeue_dead_letters():
+	"""Queue the dead-lettered events again, e.g. after fixing the mapping; returns how many"""
+	events = frappe.cache().lrange(DEAD_LETTER_KEY, 0, -1)
+	for event in events:
+		frappe.cache().rpush(QUEUE_KEY, event)
+	if events:
+		frappe.cache().ltrim(DEAD_LETTER_KEY, len(events), -1)
+		enqueue_worker()
+	return len(events)
+
+
+def event_key(event):
+	"""Airwallex event id, or a digest of the body for events without one"""
+	try:
+		event_id = json.loads(event).get("id")
+	except (ValueError, AttributeError):
+		event_id = None
+	return event_id or hashlib.sha256(frappe.safe_encode(event)).hexdigest()
+
+
+def process_events(settings, events):
+	"""Map and write one micro-batch, grouped by the client the event belongs to"""
+	provider = get_provider("Airwallex")
+	sources = {source.scope: source for source in provider.get_sources(settings)}
+	clients = settings.get_airwallex_clients()
+	by_client = {}
+
+	for event in events:
+		transaction = financial_transaction(event)
+		if not transaction:
+			continue
+
+		client = match_client(clients, event.get("account_id"))
+		if not client:
+			frappe.logger().warning(
+				f"Airwallex webhook event {event.get('id')} for unknown account {event.get('account_id')}, skipped"
+			)
+			continue
+
+		# One record per transaction: the writer keeps the first of a page's duplicates,
+		# and the queue holds the events in the order they arrived, so the latest wins
+		transactions = by_client.setdefault(client.airwallex_client_id, {})
+		transactions[transaction["id"]] = transaction
+
+	for client_id, transactions in by_client.items():
+		sync_pushed_page(provider, settings, sources[client_id], list(transactions.values()))
+
+
+def financial_transaction(event):
+	"""The financial transaction carried by an event, or None for other event types"""
+	data = (event.get("data") or {}).get("object") or event.get("data") or {}
+	if data.get("id") and "net" in data and data.get("transaction_type"):
+		return data
+	return None
+
+
+def match_client(clients, account_id):
+	"""Client whose Airwallex account id matches; a single client without one takes all events"""
+	for client in clients:
+		if account_id and client.airwallex_account_id == account_id:
+			return client
+
+	if len(clients) == 1 and not clients[0].airwallex_account_id:
+		return clients[0]
+
+	return None
@@ -14,6 +14,7 @@ class AirwallexClient(Document):
 	if TYPE_CHECKING:
 		from frappe.types import DF
 
+		airwallex_account_id: DF.Data | None
 		airwallex_api_key: DF.Password | None
 		airwallex_client_id: DF.Data
 		bank_account: DF.Link
@@ -0,0 +1,100 @@
+# Copyright (c) 2026, Akhilam Inc and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, now_datetime
+
+from bank_integration.bank_integration.doctype.bank_running_total.bank_running_total import (
+	get_running_total,
+)
+from bank_integration.common.correlation import log_error
+
+
+class BankBalanceSnapshot(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		as_of: DF.Datetime | None
+		available_balance: DF.Currency
+		balance: DF.Currency
+		bank_account: DF.Link | None
+		baseline_offset: DF.Currency
+		correlation_id: DF.Data | None
+		currency: DF.Link | None
+		drift: DF.Currency
+		local_total: DF.Currency
+		offset: DF.Currency
+		provider: DF.Data | None
+		source: DF.Data | None
+		status: DF.Literal["Baseline", "Matched", "Drift"]
+		transaction_count: DF.Int
+	# end: auto-generated types
+
+	pass
+
+
+def record_snapshot(provider, source, balance, tolerance=0.01, correlation_id=None):
+	"""Store a bank balance next to the local running total and flag drift.
+
+	The bank balance includes everything before the first synced transaction, so the
+	two never match outright; their difference (the offset) stays constant as long as
+	every transaction is synced. Drift is the change of the offset since the account's
+	first snapshot. Returns the snapshot, or None for an unused, empty currency.
+	"""
+	local_total, transaction_count = get_running_total(source.bank_account, balance.currency)
+	if not transaction_count and not flt(balance.balance):
+		return None
+
+	previous = frappe.db.get_value(
+		"Bank Balance Snapshot",
+		{"bank_account": source.bank_account, "currency": balance.currency},
+		["baseline_offset", "status"],
+		order_by="creation desc",
+		as_dict=True,
+	)
+
+	offset = flt(balance.balance) - local_total
+	baseline_offset = flt(previous.baseline_offset) if previous else offset
+	drift = offset - baseline_offset
+	if not previous:
+		status = "Baseline"
+	else:
+		status = "Drift" if abs(drift) > flt(tolerance) else "Matched"
+
+	snapshot = frappe.get_doc(
+		{
+			"doctype": "Bank Balance Snapshot",
+			"provider": provider,
+			"source": source.scope,
+			"bank_account": source.bank_account,
+			"currency": balance.currency,
+			"status": status,
+			"as_of": balance.as_of or now_datetime(),
+			"correlation_id": correlation_id,
+			"balance": flt(balance.balance),
+			"available_balance": flt(balance.available_balance),
+			"local_total": local_total,
+			"transaction_count": transaction_count,
+			"offset": offset,
+			"baseline_offset": baseline_offset,
+			"drift": drift,
+		}
+	)
+	snapshot.insert(ignore_permissions=True)
+
+	# A single drift is usually a transaction posted after the last sync; two in a row are not
+	if status == "Drift" and previous.status == "Drift":
+		log_error(
+			f"{source.bank_account} ({balance.currency}): bank balance {flt(balance.balance)} is "
+			f"{drift} away from the synced transactions (snapshot {snapshot.name})",
+			f"Balance Drift - {source.label}",
+			correlation_id=correlation_id,
+		)
+
+	return snapshot
@@ -0,0 +1,9 @@
+# Copyright (c) 2026, Akhilam Inc and Contributors
+# See license.txt
+
+# import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestBankBalanceSnapshot(FrappeTestCase):
+	pass
@@ -1,8 +1,29 @@
 // Copyright (c) 2025, Akhilam Inc and contributors
 // For license information, please see license.txt
 
-// frappe.ui.form.on("Bank Integration Log", {
-// 	refresh(frm) {
+frappe.ui.form.on("Bank Integration Log", {
+	refresh(frm) {
+		// Payloads are stored compact (and possibly compressed); format them only when viewed
+		frm.call({
+			method: "bank_integration.bank_integration.doctype.bank_integration_log.bank_integration_log.get_formatted_payloads",
+			args: { name: frm.doc.name },
+		}).then((r) => {
+			const payloads = r.message || {};
+			render_payload(frm, "request_preview", payloads.request_data);
+			render_payload(frm, "response_preview", payloads.response_data);
+		});
+	},
+});
 
-// 	},
-// });
+function render_payload(frm, fieldname, value) {
+	const wrapper = frm.get_field(fieldname).$wrapper;
+	if (!value) {
+		wrapper.empty();
+		return;
+	}
+
+	wrapper.html(
+		`<label class="control-label">${__(frm.get_field(fieldname).df.label)}</label>
+		<pre class="small" style="max-height: 500px; overflow: auto;">${frappe.utils.escape_html(value)}</pre>`
+	);
+}
@@ -1,8 +1,41 @@
 # Copyright (c) 2025, Akhilam Inc and contributors
 # For license information, please see license.txt
 
+import base64
+import gzip
+import json
+import os
+import re
+import zlib
+from datetime import timedelta
+from urllib.parse import urlparse
+
 import frappe
+from frappe import _
 from frappe.model.document import Document
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Count, Date, Extract, IfNull, Sum
+from frappe.utils import add_days, add_to_date, cint, get_datetime, now_datetime, nowdate
+from pypika.enums import DatePart
+
+LOG_ARCHIVE_FOLDER = "bank_integration_logs"
+PAYLOAD_FIELDS = ("request_data", "response_data")
+
+# Payloads above these sizes (in characters) are compressed in the row or written to a file
+PAYLOAD_COMPRESS_THRESHOLD = 8 * 1024
+PAYLOAD_OFFLOAD_THRESHOLD = 512 * 1024
+
+# The full body is kept in response_data; the message column only carries a preview
+LOG_MESSAGE_LENGTH = 300
+
+# Path segments that carry ids (UUIDs, numbers, long tokens) are collapsed so endpoints group together
+ID_SEGMENT = re.compile(r"^(?=.*\d)[0-9A-Za-z_-]{12,}$|^\d+$")
+
+# Widest window get_log_stats aggregates in one call
+MAX_STATS_WINDOW_DAYS = 7
+
+ZLIB_PREFIX = "zlib:"
+FILE_PREFIX = "file:"
 
 
 class BankIntegrationLog(Document):
@@ -14,8 +47,13 @@ class BankIntegrationLog(Document):
 	if TYPE_CHECKING:
 		from frappe.types import DF
 
+		client_ref: DF.Data | None
+		correlation_id: DF.Data | None
+		duration_ms: DF.Int
+		endpoint: DF.Data | None
 		message: DF.LongText | None
 		method: DF.SmallText | None
+		provider: DF.Data | None
 		request_data: DF.Code | None
 		request_headers: DF.Code | None
 		response_data: DF.LongText | None
@@ -30,24 +68,29 @@ class BankIntegrationLog(Document):
 		if not self.status:
 			self.status = "Info"
 
-	# beautify the response_data and request_data fields
-	def before_save(self):
-		import json
+	def before_insert(self):
+		if self.url and not self.endpoint:
+			self.endpoint = normalize_endpoint(self.url)
 
-		if self.response_data and isinstance(self.response_data, str):
-			try:
-				self.response_data = json.dumps(json.loads(self.response_data), sort_keys=True, indent=4)
-			except Exception:
-				pass
+		# Store payloads compactly; pretty-printing happens at read time in the form view
+		for fieldname in PAYLOAD_FIELDS:
+			self.set(fieldname, encode_payload(self.get(fieldname)))
 
-		if self.request_data and isinstance(self.request_data, str):
-			try:
-				self.request_data = json.dumps(json.loads(self.request_data), sort_keys=True, indent=4)
-			except Exception:
-				pass
+		if isinstance(self.request_headers, dict):
+			self.request_headers = json.dumps(self.request_headers, default=str, separators=(",", ":"))
 
 
-def create_log(message, status="Info", response=None, method=None, payload=None, url=None, status_code=None):
+def create_log(
+	message,
+	status="Info",
+	response=None,
+	method=None,
+	payload=None,
+	url=None,
+	status_code=None,
+	provider=None,
+	correlation_id=None,
+):
 	"""Create log entry for connection test"""
 	try:
 		log = frappe.get_doc(
@@ -60,9 +103,287 @@ def create_log(message, status="Info", response=None, method=None, payload=None,
 				"url": url,
 				"method": method,
 				"status_code": status_code,
+				"provider": provider,
+				"correlation_id": correlation_id,
 			}
 		)
 		log.insert(ignore_permissions=True)
 
 	except Exception as e:
 		frappe.log_error(message=str(e), title="Bank Integration Log Creation Error")
+
+
+def on_doctype_update():
+	# Retention purges and time-window filters scan by status and age
+	frappe.db.add_index("Bank Integration Log", ["status", "creation"])
+	# Dashboards slice by provider and endpoint over a time window
+	frappe.db.add_index("Bank Integration Log", ["provider", "endpoint", "creation"])
+	# duration_ms gets no index of its own: it is only aggregated within a provider,
+	# endpoint and time window, which the index above narrows, and every API call
+	# writes a row, so another index would tax all inserts for a dashboard query
+
+
+def normalize_endpoint(url):
+	"""URL path with ids replaced by a placeholder, e.g. /api/v1/financial_transactions/:id"""
+	path = urlparse(url).path if "://" in url else url.split("?", 1)[0]
+	segments = [":id" if ID_SEGMENT.match(segment) else segment for segment in path.split("/")]
+	return "/".join(segments)[:140]
+
+
+@frappe.whitelist()
+def get_log_stats(from_datetime=None, to_datetime=None, provider=None, endpoint=None):
+	"""Request counts, error rate and latency percentiles per endpoint per hour.
+
+	Reads only the short indexed columns so dashboards never load payloads.
+	Defaults to the last 24 hours; windows are capped at MAX_STATS_WINDOW_DAYS.
+	"""
+	frappe.has_permission("Bank Integration Log", "read", throw=True)
+
+	to_datetime = get_datetime(to_datetime) if to_datetime else now_datetime()
+	from_datetime = get_datetime(from_datetime) if from_datetime else add_to_date(to_datetime, hours=-24)
+	if from_datetime >= to_datetime:
+		frappe.throw(_("From datetime must be before To datetime"))
+	if to_datetime - from_datetime > timedelta(days=MAX_STATS_WINDOW_DAYS):
+		frappe.throw(_("Log stats cover at most {0} days at a time").format(MAX_STATS_WINDOW_DAYS))
+
+	# One row per hour, endpoint and distinct duration: counts and errors are summed in SQL
+	# and the percentiles are read off this latency histogram, so no log row reaches Python
+	log = frappe.qb.DocType("Bank Integration Log")
+	day = Date(log.creation)
+	hour = Extract(DatePart.hour, log.creation)
+	duration = IfNull(log.duration_ms, 0)
+	query = (
+		frappe.qb.from_(log)
+		.select(
+			day,
+			hour,
+			log.provider,
+			log.endpoint,
+			duration,
+			Count("*"),
+			Sum(Case().when(log.status == "Error", 1).else_(0)),
+		)
+		.where(log.creation >= from_datetime)
+		.where(log.creation < to_datetime)
+		.where(log.endpoint.isnotnull())
+		.groupby(day, hour, log.provider, log.endpoint, duration)
+		.orderby(day)
+		.orderby(hour)
+		.orderby(log.provider)
+		.orderby(log.endpoint)
+		.orderby(duration)
+	)
+	if provider:
+		query = query.where(log.provider == provider)
+	if endpoint:
+		query = query.where(log.endpoint == endpoint)
+
+	buckets = {}
+	for bucket_day, bucket_hour, provider_name, endpoint_path, duration_ms, count, errors in query.run():
+		key = (get_datetime(bucket_day).replace(hour=cint(bucket_hour)), provider_name, endpoint_path)
+		bucket = buckets.setdefault(key, {"count": 0, "errors": 0, "histogram": []})
+		bucket["count"] += cint(count)
+		bucket["errors"] += cint(errors)
+		# Rows arrive sorted by duration within the bucket
+		bucket["histogram"].append((cint(duration_ms), cint(count)))
+
+	stats = []
+	for (bucket_hour, provider_name, endpoint_path), bucket in buckets.items():
+		count = bucket["count"]
+		stats.append(
+			{
+				"hour": bucket_hour,
+				"provider": provider_name,
+				"endpoint": endpoint_path,
+				"count": count,
+				"errors": bucket["errors"],
+				"error_rate": round(bucket["errors"] / count, 4),
+				"p50_ms": _percentile(bucket["histogram"], count, 50),
+				"p95_ms": _percentile(bucket["histogram"], count, 95),
+				"p99_ms": _percentile(bucket["histogram"], count, 99),
+			}
+		)
+
+	return stats
+
+
+def _percentile(histogram, total, percent):
+	# Nearest-rank percentile over (value, count) pairs sorted by value
+	rank = max(int(-(-percent * total // 100)), 1)
+	seen = 0
+	for value, count in histogram:
+		seen += count
+		if seen >= rank:
+			return value
+	return histogram[-1][0]
+
+
+def purge_expired_logs():
+	"""Scheduled job: delete (and optionally archive) logs older than their status' retention age"""
+	settings = frappe.get_single("Bank Integration Setting")
+	batch_size = cint(settings.log_purge_batch_size) or 1000
+	archive = cint(settings.archive_logs_before_purge)
+
+	retention = {
+		"Success": cint(settings.success_log_retention_days),
+		"Error": cint(settings.error_log_retention_days),
+		# Info also covers any other free-form status
+		"Info": cint(settings.info_log_retention_days),
+	}
+
+	deleted = {}
+	for status, days in retention.items():
+		if days <= 0:
+			continue
+
+		status_filter = ["not in", ["Success", "Error"]] if status == "Info" else ["=", status]
+		cutoff = add_days(now_datetime(), -days)
+		deleted[status] = purge_logs(status_filter, cutoff, batch_size=batch_size, archive=archive)
+
+	if any(deleted.values()):
+		frappe.logger().info(f"Purged Bank Integration Logs: {deleted}")
+
+	return deleted
+
+
+def purge_logs(status_filter, before, batch_size=1000, archive=False):
+	"""Delete matching logs created before `before` in bounded, separately committed batches"""
+	total = 0
+
+	while True:
+		filters = [["creation", "<", before]]
+		if status_filter:
+			filters.append(["status", *status_filter])
+
+		names = frappe.get_all(
+			"Bank Integration Log",
+			filters=filters,
+			pluck="name",
+			order_by="creation asc",
+			limit=batch_size,
+		)
+		if not names:
+			break
+
+		if archive:
+			archive_logs(names)
+
+		_delete_offloaded_payloads(names)
+		frappe.db.delete("Bank Integration Log", {"name": ("in", names)})
+		# Commit each batch so row locks are held only for one bounded delete
+		frappe.db.commit()
+		total += len(names)
+
+		if len(names) < batch_size:
+			break
+
+	return total
+
+
+def archive_logs(names):
+	"""Append the given log rows to today's gzip-compressed JSONL archive file"""
+	rows = frappe.get_all("Bank Integration Log", filters={"name": ("in", names)}, fields=["*"])
+
+	archive_dir = frappe.get_site_path("private", "files", LOG_ARCHIVE_FOLDER)
+	os.makedirs(archive_dir, exist_ok=True)
+	path = os.path.join(archive_dir, f"bank_integration_log-{nowdate()}.jsonl.gz")
+
+	# Appending creates a new gzip member per batch, which gzip readers handle transparently
+	with gzip.open(path, "at", encoding="utf-8") as archive_file:
+		for row in rows:
+			# Archive the original payloads so the archive does not depend on offloaded files
+			for fieldname in PAYLOAD_FIELDS:
+				row[fieldname] = decode_payload(row.get(fieldname))
+			archive_file.write(json.dumps(row, default=str, separators=(",", ":")))
+			archive_file.write("\n")
+
+	return path
+
+
+def encode_payload(value):
+	"""Serialize a payload as compact JSON, compressing or offloading it to a file when large"""
+	if value is None or value == "":
+		return value
+
+	if isinstance(value, dict | list):
+		value = json.dumps(value, default=str, separators=(",", ":"))
+	elif not isinstance(value, str):
+		value = str(value)
+
+	if value.startswith((ZLIB_PREFIX, FILE_PREFIX)) or len(value) < PAYLOAD_COMPRESS_THRESHOLD:
+		return value
+
+	data = value.encode("utf-8")
+
+	if len(value) >= PAYLOAD_OFFLOAD_THRESHOLD:
+		relative_path = os.path.join("payloads", f"{frappe.generate_hash(length=20)}.json.gz")
+		path = frappe.get_site_path("private", "files", LOG_ARCHIVE_FOLDER, relative_path)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with gzip.open(path, "wb") as payload_file:
+			payload_file.write(data)
+		return FILE_PREFIX + relative_path
+
+	return ZLIB_PREFIX + base64.b64encode(zlib.compress(data)).decode("ascii")
+
+
+def decode_payload(value):
+	"""Return the original payload text for a value written by encode_payload"""
+	if not value or not isinstance(value, str):
+		return value
+
+	if value.startswith(ZLIB_PREFIX):
+		return zlib.decompress(base64.b64decode(value[len(ZLIB_PREFIX) :])).decode("utf-8")
+
+	if value.startswith(FILE_PREFIX):
+		path = _payload_file_path(value)
+		if not os.path.exists(path):
+			return ""
+		with gzip.open(path, "rb") as payload_file:
+			return payload_file.read().decode("utf-8")
+
+	return value
+
+
+def message_preview(text, length=LOG_MESSAGE_LENGTH):
+	"""Bounded prefix of a response body for the log message"""
+	text = str(text or "")
+	return text if len(text) <= length else text[:length] + "..."
+
+
+def format_payload(value):
+	"""Decode and pretty-print a stored payload for display"""
+	text = decode_payload(value)
+	if not text:
+		return text
+
+	try:
+		return json.dumps(json.loads(text), sort_keys=True, indent=4)
+	except ValueError:
+		return text
+
+
+@frappe.whitelist()
+def get_formatted_payloads(name):
+	"""Readable request/response payloads for the form view"""
+	frappe.has_permission("Bank Integration Log", "read", name, throw=True)
+	values = frappe.db.get_value("Bank Integration Log", name, PAYLOAD_FIELDS, as_dict=True) or {}
+	return {fieldname: format_payload(values.get(fieldname)) for fieldname in PAYLOAD_FIELDS}
+
+
+def _payload_file_path(value):
+	relative_path = value[len(FILE_PREFIX) :]
+	return frappe.get_site_path("private", "files", LOG_ARCHIVE_FOLDER, relative_path)
+
+
+def _delete_offloaded_payloads(names):
+	"""Remove payload files referenced by the given logs before their rows are deleted"""
+	for fieldname in PAYLOAD_FIELDS:
+		values = frappe.get_all(
+			"Bank Integration Log",
+			filters=[["name", "in", names], [fieldname, "like", f"{FILE_PREFIX}%"]],
+			pluck=fieldname,
+		)
+		for value in values:
+			path = _payload_file_path(value)
+			if os.path.exists(path):
+				os.remove(path)
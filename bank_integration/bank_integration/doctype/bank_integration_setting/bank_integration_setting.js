@@ -102,6 +102,57 @@ frappe.ui.form.on("Bank Integration Setting", {
 			);
 		}
 
+		if (frm.doc.file_url && frm.doc.statement_bank_account && !frm.is_dirty()) {
+			frm.add_custom_button(
+				__("Import Statement"),
+				function () {
+					frappe.confirm(
+						__("Import {0} into {1}?", [
+							frm.doc.file_url.split("/").pop(),
+							frm.doc.statement_bank_account,
+						]),
+						function () {
+							frappe.call({
+								method: "import_statement",
+								doc: frm.doc,
+							});
+						}
+					);
+				},
+				__("Actions")
+			);
+		}
+
+		frappe.realtime.off("statement_import_complete");
+		frappe.realtime.on("statement_import_complete", function (data) {
+			frappe.show_alert({
+				message: __("Statement import {0}: {1} created, {2} updated, {3} skipped, {4} errors", [
+					data.status,
+					data.created,
+					data.updated,
+					data.skipped,
+					data.errors,
+				]),
+				indicator: data.status === "Completed" ? "green" : "orange",
+			});
+		});
+
+		frm.add_custom_button(
+			__("Sync Runs"),
+			function () {
+				frappe.set_route("List", "Bank Sync Run");
+			},
+			__("View")
+		);
+
+		frm.add_custom_button(
+			__("Sync Run Summary"),
+			function () {
+				frappe.set_route("query-report", "Bank Sync Run Summary");
+			},
+			__("View")
+		);
+
 		// Listen for real-time updates
 		frappe.realtime.on("transaction_sync_progress", function (data) {
 			if (data.total > 0) {
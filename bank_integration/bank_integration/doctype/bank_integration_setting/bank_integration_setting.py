@@ -10,7 +10,7 @@ from frappe.utils import add_days, add_months, get_datetime, now_datetime
 from frappe.utils.background_jobs import enqueue
 from frappe.utils.scheduler import is_scheduler_inactive
 
-from bank_integration.airwallex.api.airwallex_authenticator import AirwallexAuthenticator
+from bank_integration.common.sync_settings import clear_sync_settings
 
 
 class BankIntegrationSetting(Document):
@@ -31,14 +31,30 @@ class BankIntegrationSetting(Document):
 		)
 
 		airwallex_clients: DF.Table[AirwallexClient]
+		airwallex_webhook_secret: DF.Password | None
 		api_url: DF.Data | None
+		archive_logs_before_purge: DF.Check
+		archive_raw_payloads: DF.Check
+		balance_drift_tolerance: DF.Float
 		enable_airwallex: DF.Check
+		enable_auto_match: DF.Check
+		enable_balance_check: DF.Check
 		enable_log: DF.Check
 		enable_skript: DF.Check
-		file_url: DF.Data | None
+		enable_sync_profiling: DF.Check
+		error_log_retention_days: DF.Int
+		file_url: DF.Attach | None
 		from_date: DF.Datetime | None
+		info_log_retention_days: DF.Int
 		last_sync_date: DF.Datetime | None
+		log_purge_batch_size: DF.Int
+		match_amount_tolerance: DF.Float
+		match_date_window: DF.Int
+		match_on_amount: DF.Check
+		poll_max_interval: DF.Int
+		poll_min_interval: DF.Int
 		processed_records: DF.Int
+		refresh_pending_days: DF.Int
 		skript_access_token: DF.SmallText | None
 		skript_access_token_url: DF.Data | None
 		skript_accounts: DF.Table[SkriptAccount]
@@ -59,6 +75,9 @@ class BankIntegrationSetting(Document):
 		skript_to_date: DF.Datetime | None
 		skript_token_expiry: DF.Datetime | None
 		skript_total_records: DF.Int
+		statement_bank_account: DF.Link | None
+		statement_format: DF.Literal["Generic CSV", "OFX", "CAMT.053", "Airwallex CSV", "Skript CSV"]
+		success_log_retention_days: DF.Int
 		sync_old_transactions: DF.Check
 		sync_progress: DF.Percent
 		sync_schedule: DF.Literal["Hourly", "Daily", "Weekly", "Monthly"]
@@ -109,32 +128,7 @@ class BankIntegrationSetting(Document):
 
 	def _to_iso8601(self, dt):
 		"""Convert datetime to ISO8601 format in UTC timezone"""
-		try:
-			import pytz
-			from frappe.utils import get_datetime
-
-			if not dt:
-				return None
-
-			# Convert to datetime object if it's a string
-			if isinstance(dt, str):
-				dt = get_datetime(dt)
-
-			# If datetime is naive (no timezone info), assume it's in system timezone
-			if dt.tzinfo is None:
-				# Get system timezone from Frappe settings
-				system_tz = pytz.timezone(frappe.utils.get_system_timezone())
-				dt = system_tz.localize(dt)
-
-			# Convert to UTC
-			utc_dt = dt.astimezone(pytz.UTC)
-
-			# Format as ISO8601 with 'Z' suffix for UTC
-			return utc_dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-		except Exception as e:
-			frappe.log_error(f"Error converting datetime to ISO8601: {e}", "ISO8601 Conversion Error")
-			return None
+		return to_iso8601(dt)
 
 	def _credentials_changed(self):
 		"""Check if any client credentials have changed"""
@@ -216,6 +210,9 @@ class BankIntegrationSetting(Document):
 
 	def on_update(self):
 		"""Trigger sync job when sync_old_transactions is enabled"""
+		# Jobs started from here on must see the saved values
+		clear_sync_settings()
+
 		if self.enable_airwallex and self.sync_old_transactions and self.sync_status == "Not Started":
 			self.start_transaction_sync()
 
@@ -231,6 +228,8 @@ class BankIntegrationSetting(Document):
 		if not self.airwallex_clients:
 			return False
 
+		from bank_integration.airwallex.api.airwallex_authenticator import AirwallexAuthenticator
+
 		success_count = 0
 		total_clients = len(self.airwallex_clients)
 
@@ -261,6 +260,8 @@ class BankIntegrationSetting(Document):
 		if not self.airwallex_clients:
 			frappe.throw("Please configure at least one Airwallex client")
 
+		from bank_integration.airwallex.api.airwallex_authenticator import AirwallexAuthenticator
+
 		success_count = 0
 		total_clients = len(self.airwallex_clients)
 		failed_clients = []
@@ -377,22 +378,35 @@ class BankIntegrationSetting(Document):
 			frappe.log_error(frappe.get_traceback(), "Failed to stop sync job")
 			frappe.throw(f"Failed to stop sync job: {e}")
 
-	def update_sync_progress(self, processed, total, status="In Progress"):
-		"""Update sync progress"""
-		progress = (processed / total * 100) if total > 0 else 0
-
-		self.db_set("processed_records", processed)
-		self.db_set("total_records", total)
-		self.db_set("sync_progress", progress)
-		self.db_set("sync_status", status)
-		self.db_set("last_sync_date", frappe.utils.now())
+	@frappe.whitelist()
+	def import_statement(self):
+		"""Start background job importing the attached statement file"""
+		if not self.file_url:
+			frappe.throw(_("Attach a statement file to import"))
+		if not self.statement_bank_account:
+			frappe.throw(_("Select the Bank Account the statement belongs to"))
 
-		frappe.publish_realtime(
-			"transaction_sync_progress",
-			{"processed": processed, "total": total, "progress": progress, "status": status},
+		enqueue(
+			"bank_integration.statement.importer.run_statement_import",
+			queue="long",
+			timeout=3600,
+			setting_name=self.name,
+			file_url=self.file_url,
+			statement_format=self.statement_format or "Generic CSV",
+			bank_account=self.statement_bank_account,
 			user=frappe.session.user,
 		)
 
+		frappe.msgprint(
+			_("Statement import has been started. Progress is recorded in Bank Sync Run."),
+			indicator="blue",
+			alert=False,
+		)
+
+	def update_sync_progress(self, processed, total, status="In Progress"):
+		"""Update the last sync summary; per-batch progress is written to Bank Sync Run"""
+		update_sync_progress(processed, total, status)
+
 	def is_skript_enabled(self):
 		"""Check if Skript integration is enabled"""
 		return bool(self.enable_skript)
@@ -459,8 +473,8 @@ class BankIntegrationSetting(Document):
 				api_scope=self.skript_api_scope,
 			)
 
-			# Fetch accounts
-			response = api.get_list(size=100)
+			# Fetch accounts; the button is pressed to see the current list, so never from cache
+			response = api.get_list(size=100, use_cache=False)
 
 			# Handle response format
 			accounts = response if isinstance(response, list) else response.get("items", [])
@@ -682,28 +696,7 @@ class BankIntegrationSetting(Document):
 
 	def update_skript_sync_progress(self, processed, total, status="In Progress"):
 		"""Update Skript sync progress without triggering modified timestamp"""
-		progress = (processed / total * 100) if total > 0 else 0
-
-		# Use db_set to avoid document modified conflicts
-		frappe.db.set_value(
-			"Bank Integration Setting",
-			self.name,
-			{
-				"skript_processed_records": processed,
-				"skript_total_records": total,
-				"skript_sync_progress": progress,
-				"skript_sync_status": status,
-				"skript_last_sync_date": frappe.utils.now(),
-			},
-			update_modified=False,
-		)
-
-		# Publish realtime updates for UI
-		frappe.publish_realtime(
-			"skript_sync_progress",
-			{"processed": processed, "total": total, "progress": progress, "status": status},
-			user=frappe.session.user,
-		)
+		update_skript_sync_progress(processed, total, status)
 
 	@frappe.whitelist()
 	def restart_skript_transaction_sync(self):
@@ -736,3 +729,83 @@ class BankIntegrationSetting(Document):
 		except Exception as e:
 			frappe.log_error(frappe.get_traceback(), "Failed to stop Skript sync job")
 			frappe.throw(f"Failed to stop sync job: {e}")
+
+
+def to_iso8601(dt):
+	"""Convert datetime to ISO8601 format in UTC timezone"""
+	try:
+		import pytz
+		from frappe.utils import get_datetime
+
+		if not dt:
+			return None
+
+		# Convert to datetime object if it's a string
+		if isinstance(dt, str):
+			dt = get_datetime(dt)
+
+		# If datetime is naive (no timezone info), assume it's in system timezone
+		if dt.tzinfo is None:
+			# Get system timezone from Frappe settings
+			system_tz = pytz.timezone(frappe.utils.get_system_timezone())
+			dt = system_tz.localize(dt)
+
+		# Convert to UTC
+		utc_dt = dt.astimezone(pytz.UTC)
+
+		# Format as ISO8601 with 'Z' suffix for UTC
+		return utc_dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+	except Exception as e:
+		frappe.log_error(f"Error converting datetime to ISO8601: {e}", "ISO8601 Conversion Error")
+		return None
+
+
+def update_sync_progress(processed, total, status="In Progress"):
+	"""Update the last sync summary; per-batch progress is written to Bank Sync Run"""
+	progress = (processed / total * 100) if total > 0 else 0
+
+	frappe.db.set_value(
+		"Bank Integration Setting",
+		"Bank Integration Setting",
+		{
+			"processed_records": processed,
+			"total_records": total,
+			"sync_progress": progress,
+			"sync_status": status,
+			"last_sync_date": frappe.utils.now(),
+		},
+		update_modified=False,
+	)
+
+	frappe.publish_realtime(
+		"transaction_sync_progress",
+		{"processed": processed, "total": total, "progress": progress, "status": status},
+		user=frappe.session.user,
+	)
+
+
+def update_skript_sync_progress(processed, total, status="In Progress"):
+	"""Update Skript sync progress without triggering modified timestamp"""
+	progress = (processed / total * 100) if total > 0 else 0
+
+	# Use db_set to avoid document modified conflicts
+	frappe.db.set_value(
+		"Bank Integration Setting",
+		"Bank Integration Setting",
+		{
+			"skript_processed_records": processed,
+			"skript_total_records": total,
+			"skript_sync_progress": progress,
+			"skript_sync_status": status,
+			"skript_last_sync_date": frappe.utils.now(),
+		},
+		update_modified=False,
+	)
+
+	# Publish realtime updates for UI
+	frappe.publish_realtime(
+		"skript_sync_progress",
+		{"processed": processed, "total": total, "progress": progress, "status": status},
+		user=frappe.session.user,
+	)
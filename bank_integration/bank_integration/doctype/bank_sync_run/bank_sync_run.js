@@ -0,0 +1,35 @@
+// Copyright (c) 2026, Akhilam Inc and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Bank Sync Run", {
+	refresh(frm) {
+		frm.add_custom_button(__("Run Summary"), function () {
+			frappe.set_route("query-report", "Bank Sync Run Summary", {
+				provider: frm.doc.provider,
+			});
+		});
+
+		if (frm.doc.correlation_id) {
+			frm.add_custom_button(
+				__("Integration Logs"),
+				function () {
+					frappe.set_route("List", "Bank Integration Log", {
+						correlation_id: frm.doc.correlation_id,
+					});
+				},
+				__("Trace")
+			);
+		}
+
+		frm.add_custom_button(
+			__("Error Logs"),
+			function () {
+				frappe.set_route("List", "Error Log", {
+					reference_doctype: "Bank Sync Run",
+					reference_name: frm.doc.name,
+				});
+			},
+			__("Trace")
+		);
+	},
+});
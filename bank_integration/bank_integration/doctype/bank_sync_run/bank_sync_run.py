@@ -0,0 +1,155 @@
+# Copyright (c) 2026, Akhilam Inc and contributors
+# For license information, please see license.txt
+
+import json
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import now_datetime, time_diff_in_seconds
+
+from bank_integration.common.correlation import new_correlation_id
+
+FINISHED_STATUSES = ("Completed", "Completed with Errors", "Failed", "Stopped")
+
+
+class BankSyncRun(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		bank_account: DF.Link | None
+		checkpoint: DF.SmallText | None
+		correlation_id: DF.Data | None
+		created_records: DF.Int
+		duration: DF.Float
+		error_message: DF.SmallText | None
+		error_records: DF.Int
+		finished_at: DF.Datetime | None
+		from_date: DF.Datetime | None
+		processed_records: DF.Int
+		profile: DF.Code | None
+		progress: DF.Percent
+		provider: DF.Data | None
+		skipped_records: DF.Int
+		source: DF.Data | None
+		stage_timings: DF.Code | None
+		started_at: DF.Datetime | None
+		status: DF.Literal["Queued", "In Progress", "Completed", "Completed with Errors", "Failed", "Stopped"]
+		sync_type: DF.Literal["Manual", "Scheduled", "Statement Import", "Webhook", "Backfill", "Replay"]
+		to_date: DF.Datetime | None
+		total_records: DF.Int
+		updated_records: DF.Int
+	# end: auto-generated types
+
+	def update_progress(self, processed, total, checkpoint=None):
+		"""Write counters to this run row only; the Settings single is left untouched"""
+		progress = (processed / total * 100) if total > 0 else 0
+		values = {
+			"processed_records": processed,
+			"total_records": total,
+			"progress": progress,
+		}
+		if checkpoint is not None:
+			values["checkpoint"] = json.dumps(checkpoint, default=str)
+
+		self.update(values)
+		frappe.db.set_value(self.doctype, self.name, values, update_modified=False)
+		# Make progress (and the rows written so far) visible to the UI while the job runs
+		frappe.db.commit()
+
+		frappe.publish_realtime(
+			"bank_sync_run_progress",
+			{"run": self.name, "provider": self.provider, "source": self.source, **values},
+			user=self.owner,
+		)
+
+	def finish(self, status, created=0, skipped=0, errors=0, metrics=None, error_message=None, updated=0):
+		"""Close the run with its final counters and stage breakdown"""
+		finished_at = now_datetime()
+		values = {
+			"status": status,
+			"created_records": created,
+			"updated_records": updated,
+			"skipped_records": skipped,
+			"error_records": errors,
+			"finished_at": finished_at,
+			"duration": time_diff_in_seconds(finished_at, self.started_at) if self.started_at else 0,
+		}
+		if error_message:
+			values["error_message"] = str(error_message)[:1000]
+
+		if metrics:
+			metrics.stop()
+			frappe.logger().info(f"{self.name}: {metrics.summary()}")
+			values["stage_timings"] = json.dumps(metrics.as_dict(), indent=1, default=str)
+			if metrics.profile_stats:
+				values["profile"] = metrics.profile_stats
+
+		self.update(values)
+		frappe.db.set_value(self.doctype, self.name, values, update_modified=False)
+		frappe.db.commit()
+
+	@property
+	def is_finished(self):
+		return self.status in FINISHED_STATUSES
+
+
+def start_run(
+	provider,
+	source=None,
+	bank_account=None,
+	from_date=None,
+	to_date=None,
+	sync_type="Manual",
+	correlation_id=None,
+):
+	"""Create an In Progress ledger row for one provider source and window"""
+	run = frappe.get_doc(
+		{
+			"doctype": "Bank Sync Run",
+			"provider": provider,
+			"sync_type": sync_type,
+			"correlation_id": correlation_id or new_correlation_id(),
+			"source": source,
+			"bank_account": bank_account,
+			"from_date": from_date,
+			"to_date": to_date,
+			"status": "In Progress",
+			"started_at": now_datetime(),
+		}
+	)
+	run.insert(ignore_permissions=True)
+	frappe.db.commit()
+	return run
+
+
+@frappe.whitelist()
+def get_run_trace(run=None, correlation_id=None):
+	"""Everything one sync run wrote: the run row, its API/sync logs and its Error Logs"""
+	if not correlation_id:
+		correlation_id = frappe.db.get_value("Bank Sync Run", run, "correlation_id")
+	if not correlation_id:
+		frappe.throw(_("Sync run {0} has no correlation ID").format(run))
+
+	run_doc = frappe.get_doc("Bank Sync Run", {"correlation_id": correlation_id})
+	run_doc.check_permission("read")
+
+	logs = frappe.get_all(
+		"Bank Integration Log",
+		filters={"correlation_id": correlation_id},
+		fields=["name", "creation", "status", "status_code", "method", "endpoint", "duration_ms", "message"],
+		order_by="creation asc",
+	)
+	errors = frappe.get_all(
+		"Error Log",
+		filters={"reference_doctype": "Bank Sync Run", "reference_name": run_doc.name},
+		fields=["name", "creation", "method", "error"],
+		order_by="creation asc",
+	)
+
+	return {"run": run_doc.as_dict(), "logs": logs, "errors": errors}
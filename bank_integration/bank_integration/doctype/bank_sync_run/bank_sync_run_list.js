@@ -0,0 +1,20 @@
+frappe.listview_settings["Bank Sync Run"] = {
+	add_fields: ["status", "provider", "source", "progress"],
+	get_indicator: function (doc) {
+		const colors = {
+			Queued: "gray",
+			"In Progress": "blue",
+			Completed: "green",
+			"Completed with Errors": "orange",
+			Failed: "red",
+			Stopped: "gray",
+		};
+		return [__(doc.status), colors[doc.status] || "gray", "status,=," + doc.status];
+	},
+
+	onload: function (listview) {
+		listview.page.add_inner_button(__("Run Summary"), function () {
+			frappe.set_route("query-report", "Bank Sync Run Summary");
+		});
+	},
+};
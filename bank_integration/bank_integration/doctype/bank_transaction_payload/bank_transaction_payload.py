@@ -0,0 +1,139 @@
+# Copyright (c) 2026, Akhilam Inc and contributors
+# For license information, please see license.txt
+
+import base64
+import hashlib
+import json
+import zlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+from bank_integration.bank_integration.doctype.bank_integration_log.bank_integration_log import (
+	ZLIB_PREFIX,
+	decode_payload,
+)
+
+# Columns written by the bulk insert, in value order
+INSERT_FIELDS = (
+	"name",
+	"external_key",
+	"provider",
+	"transaction_id",
+	"source",
+	"bank_account",
+	"transaction_date",
+	"payload_hash",
+	"payload",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+)
+
+
+class BankTransactionPayload(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		bank_account: DF.Link | None
+		external_key: DF.Data
+		payload: DF.LongText | None
+		payload_hash: DF.Data | None
+		provider: DF.Data | None
+		source: DF.Data | None
+		transaction_date: DF.Date | None
+		transaction_id: DF.Data | None
+	# end: auto-generated types
+
+	pass
+
+
+def archive_page(provider, source, bank_account, page, records):
+	"""Keep the raw records of a page, keyed by external key; returns the number written.
+
+	`records` are the mapped page; raw items are paired with them by id, since
+	mappers leave malformed items out. One read finds the stored hashes, new
+	records go in one bulk insert and only records whose payload changed upstream
+	are rewritten.
+	"""
+	by_id = {record.transaction_id: record for record in records if record.external_key}
+	rows = {}
+	for raw in page:
+		record = by_id.get(raw.get("id")) if isinstance(raw, dict) else None
+		if record:
+			payload = json.dumps(raw, sort_keys=True, separators=(",", ":"), default=str)
+			rows[record.external_key] = (record, payload, payload_hash(payload))
+	if not rows:
+		return 0
+
+	stored = dict(
+		frappe.get_all(
+			"Bank Transaction Payload",
+			filters={"name": ["in", list(rows)]},
+			fields=["name", "payload_hash"],
+			as_list=True,
+		)
+	)
+
+	now = now_datetime()
+	user = frappe.session.user
+	new_rows = []
+	changed = 0
+	for key, (record, payload, digest) in rows.items():
+		if key not in stored:
+			new_rows.append(
+				(
+					key,
+					key,
+					provider,
+					record.transaction_id,
+					source,
+					bank_account,
+					record.date or None,
+					digest,
+					encode_raw_payload(payload),
+					now,
+					now,
+					user,
+					user,
+				)
+			)
+		elif stored[key] != digest:
+			frappe.db.set_value(
+				"Bank Transaction Payload",
+				key,
+				{
+					"payload": encode_raw_payload(payload),
+					"payload_hash": digest,
+					"transaction_date": record.date or None,
+				},
+			)
+			changed += 1
+
+	if new_rows:
+		# A concurrent writer (webhook and poll) may have stored the same record first
+		frappe.db.bulk_insert("Bank Transaction Payload", INSERT_FIELDS, new_rows, ignore_duplicates=True)
+
+	return len(new_rows) + changed
+
+
+def load_payload(value):
+	"""The provider record stored by archive_page"""
+	return json.loads(decode_payload(value))
+
+
+def encode_raw_payload(payload):
+	# Single records are small, so compression only pays off for the larger ones
+	compressed = ZLIB_PREFIX + base64.b64encode(zlib.compress(payload.encode("utf-8"), 9)).decode("ascii")
+	return compressed if len(compressed) < len(payload) else payload
+
+
+def payload_hash(payload):
+	return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
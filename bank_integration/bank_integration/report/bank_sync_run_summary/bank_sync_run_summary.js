@@ -0,0 +1,30 @@
+// Copyright (c) 2026, Akhilam Inc and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Bank Sync Run Summary"] = {
+	filters: [
+		{
+			fieldname: "from_date",
+			label: __("From Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.add_days(frappe.datetime.get_today(), -30),
+		},
+		{
+			fieldname: "to_date",
+			label: __("To Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.get_today(),
+		},
+		{
+			fieldname: "provider",
+			label: __("Provider"),
+			fieldtype: "Data",
+		},
+		{
+			fieldname: "sync_type",
+			label: __("Sync Type"),
+			fieldtype: "Select",
+			options: "\nManual\nScheduled\nStatement Import\nWebhook\nBackfill\nReplay",
+		},
+	],
+};
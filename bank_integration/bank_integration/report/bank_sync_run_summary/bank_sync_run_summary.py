@@ -0,0 +1,70 @@
+# Copyright (c) 2026, Akhilam Inc and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Avg, Count, Max, Sum
+from frappe.utils import add_days, getdate
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	return get_columns(), get_data(filters)
+
+
+def get_columns():
+	return [
+		{"label": _("Provider"), "fieldname": "provider", "fieldtype": "Data", "width": 100},
+		{"label": _("Client / Account"), "fieldname": "source", "fieldtype": "Data", "width": 200},
+		{"label": _("Runs"), "fieldname": "runs", "fieldtype": "Int", "width": 80},
+		{"label": _("Completed"), "fieldname": "completed", "fieldtype": "Int", "width": 100},
+		{"label": _("With Errors"), "fieldname": "with_errors", "fieldtype": "Int", "width": 100},
+		{"label": _("Failed"), "fieldname": "failed", "fieldtype": "Int", "width": 80},
+		{"label": _("Processed"), "fieldname": "processed", "fieldtype": "Int", "width": 100},
+		{"label": _("Created"), "fieldname": "created", "fieldtype": "Int", "width": 100},
+		{"label": _("Updated"), "fieldname": "updated", "fieldtype": "Int", "width": 100},
+		{"label": _("Skipped"), "fieldname": "skipped", "fieldtype": "Int", "width": 100},
+		{"label": _("Errors"), "fieldname": "errors", "fieldtype": "Int", "width": 80},
+		{"label": _("Avg Duration (s)"), "fieldname": "avg_duration", "fieldtype": "Float", "width": 130},
+		{"label": _("Max Duration (s)"), "fieldname": "max_duration", "fieldtype": "Float", "width": 130},
+		{"label": _("Last Run"), "fieldname": "last_run", "fieldtype": "Datetime", "width": 160},
+	]
+
+
+def get_data(filters):
+	run = frappe.qb.DocType("Bank Sync Run")
+
+	query = (
+		frappe.qb.from_(run)
+		.select(
+			run.provider,
+			run.source,
+			Count(run.name).as_("runs"),
+			Sum(Case().when(run.status == "Completed", 1).else_(0)).as_("completed"),
+			Sum(Case().when(run.status == "Completed with Errors", 1).else_(0)).as_("with_errors"),
+			Sum(Case().when(run.status == "Failed", 1).else_(0)).as_("failed"),
+			Sum(run.processed_records).as_("processed"),
+			Sum(run.created_records).as_("created"),
+			Sum(run.updated_records).as_("updated"),
+			Sum(run.skipped_records).as_("skipped"),
+			Sum(run.error_records).as_("errors"),
+			Avg(run.duration).as_("avg_duration"),
+			Max(run.duration).as_("max_duration"),
+			Max(run.started_at).as_("last_run"),
+		)
+		.groupby(run.provider, run.source)
+		.orderby(run.provider)
+		.orderby(run.source)
+	)
+
+	if filters.from_date:
+		query = query.where(run.started_at >= getdate(filters.from_date))
+	if filters.to_date:
+		query = query.where(run.started_at < add_days(getdate(filters.to_date), 1))
+	if filters.provider:
+		query = query.where(run.provider == filters.provider)
+	if filters.sync_type:
+		query = query.where(run.sync_type == filters.sync_type)
+
+	return query.run(as_dict=True)
@@ -0,0 +1,170 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+import click
+from frappe.commands import get_site, pass_context
+
+# Every command prints one JSON document per line on stdout, so runs can be scripted
+# and monitored outside the desk; errors are printed as {"error": ...} with exit code 1
+
+
+@click.command("bank-sync-backfill")
+@click.argument("provider")
+@click.option("--from-date", required=True, help="Start of the range, e.g. 2024-01-01")
+@click.option("--to-date", required=True, help="End of the range, e.g. 2025-01-01")
+@click.option(
+	"--source", "scopes", multiple=True, help="Airwallex client id or Skript account id; repeatable"
+)
+@click.option("--workers", default=1, type=int, help="Jobs to split the sources across")
+@click.option("--chunk-days", default=30, type=int, help="Days per sync window")
+@click.option("--fresh", is_flag=True, default=False, help="Bypass the API response cache")
+@click.option("--dry-run", is_flag=True, default=False, help="Report what would be synced and exit")
+@click.option("--now", is_flag=True, default=False, help="Run in this process instead of enqueuing")
+@pass_context
+def backfill(context, provider, from_date, to_date, scopes, workers, chunk_days, fresh, dry_run, now):
+	"""Sync PROVIDER (Airwallex, Skript) over a date range, split into windows and worker jobs"""
+	from bank_integration.common.backfill import enqueue_backfill, plan_backfill, run_backfill
+	from bank_integration.common.sync_engine import sync_provider
+
+	with connect(context):
+		if dry_run:
+			output(
+				sync_provider(provider, from_date, to_date, scopes=list(scopes), fresh=fresh, dry_run=True)
+			)
+			return
+
+		shards = plan_backfill(provider, from_date, to_date, list(scopes), workers, chunk_days)
+		result = {
+			"provider": provider,
+			"workers": len(shards),
+			"windows": sum(len(windows) for windows in shards),
+		}
+		if now:
+			result["results"] = [run_backfill(provider, windows, fresh=fresh) for windows in shards]
+		else:
+			result["job_ids"] = enqueue_backfill(provider, shards, fresh=fresh)
+		output(result)
+
+
+@click.command("bank-sync-status")
+@click.option("--provider", help="Only runs and sources of this provider")
+@click.option("--run", help="Only this Bank Sync Run")
+@click.option("--limit", default=20, type=int, help="Number of recent runs")
+@click.option("--watch", default=0, type=int, help="Print again every N seconds until no run is in progress")
+@pass_context
+def status(context, provider, run, limit, watch):
+	"""Progress of recent Bank Sync Runs and the sources being synced right now"""
+	import frappe
+
+	from bank_integration.common.backfill import get_sync_status
+
+	with connect(context):
+		while True:
+			result = get_sync_status(provider=provider, run=run, limit=limit)
+			output(result)
+			if not watch or not (result["in_progress"] or result["running_sources"]):
+				return
+			time.sleep(watch)
+			# End the read transaction so the next snapshot sees the workers' commits
+			frappe.db.rollback()
+
+
+@click.command("bank-sync-resume")
+@click.argument("run")
+@click.option("--fresh", is_flag=True, default=False, help="Bypass the API response cache")
+@click.option("--now", is_flag=True, default=False, help="Run in this process instead of enqueuing")
+@pass_context
+def resume(context, run, fresh, now):
+	"""Sync the source and window of an interrupted or failed Bank Sync Run again"""
+	from bank_integration.common.backfill import resume_run
+
+	with connect(context):
+		output(resume_run(run, now=now, fresh=fresh))
+
+
+@click.command("bank-sync-replay")
+@click.argument("provider")
+@click.option("--bank-account", help="Only records archived for this Bank Account")
+@click.option("--from-date", help="Only transactions on or after this date")
+@click.option("--to-date", help="Only transactions on or before this date")
+@click.option("--now", is_flag=True, default=False, help="Run in this process instead of enqueuing")
+@pass_context
+def replay(context, provider, bank_account, from_date, to_date, now):
+	"""Re-map archived PROVIDER records with the current mappers and apply the changes"""
+	from bank_integration.common.replay import enqueue_replay, replay_payloads
+
+	with connect(context):
+		if now:
+			output(replay_payloads(provider, bank_account, from_date, to_date))
+		else:
+			output({"job_id": enqueue_replay(provider, bank_account, from_date, to_date)})
+
+
+@click.command("bank-sync-purge-logs")
+@click.option("--status", type=click.Choice(["Success", "Error", "Info"]), help="Only logs of this status")
+@click.option("--older-than-days", type=int, help="Age cutoff; without it the retention settings apply")
+@click.option("--batch-size", default=1000, type=int, help="Rows deleted per committed batch")
+@click.option("--archive", is_flag=True, default=False, help="Archive rows to gzip JSONL before deleting")
+@pass_context
+def purge_logs(context, status, older_than_days, batch_size, archive):
+	"""Delete Bank Integration Logs, by the retention settings or by an explicit age"""
+	from frappe.utils import add_days, now_datetime
+
+	from bank_integration.bank_integration.doctype.bank_integration_log import bank_integration_log
+
+	with connect(context):
+		if older_than_days is None:
+			output({"deleted": bank_integration_log.purge_expired_logs()})
+			return
+
+		if status == "Info":
+			status_filter = ["not in", ["Success", "Error"]]
+		else:
+			status_filter = ["=", status] if status else None
+		deleted = bank_integration_log.purge_logs(
+			status_filter,
+			add_days(now_datetime(), -older_than_days),
+			batch_size=batch_size,
+			archive=archive,
+		)
+		output({"deleted": {status or "All": deleted}})
+
+
+@click.command("bank-sync-benchmark")
+@click.option("--rows", default=1000, type=int, help="Rows per synthetic page")
+@click.option("--rounds", default=5, type=int, help="Runs; the best one is reported")
+@click.option("--bank-account", help="Bank Account used for the currency lookup")
+@pass_context
+def benchmark(context, rows, rounds, bank_account):
+	"""Per-row cost of the Airwallex and Skript mappers"""
+	from bank_integration.common.benchmarks import benchmark_mappers
+
+	with connect(context):
+		output(benchmark_mappers(rows=rows, rounds=rounds, bank_account=bank_account))
+
+
+@contextmanager
+def connect(context):
+	import frappe
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		yield
+		frappe.db.commit()
+	except Exception as e:
+		# Scripts read stdout: every failure is a JSON error and a non-zero exit
+		frappe.db.rollback()
+		output({"error": str(e)})
+		sys.exit(1)
+	finally:
+		frappe.destroy()
+
+
+def output(data):
+	click.echo(json.dumps(data, default=str))
+
+
+commands = [backfill, status, resume, replay, purge_logs, benchmark]
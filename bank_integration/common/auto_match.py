@@ -0,0 +1,278 @@
+import json
+from collections import defaultdict
+
+import frappe
+from frappe.utils import add_days, date_diff, flt, getdate
+
+from bank_integration.common.correlation import log_error
+
+DEPOSIT = "Deposit"
+WITHDRAWAL = "Withdrawal"
+
+
+class Voucher:
+	"""An unreconciled payment posted to a bank GL account"""
+
+	__slots__ = ("amount", "date", "direction", "doctype", "name", "references")
+
+	def __init__(self, doctype, name, direction, amount, date, references=()):
+		self.doctype = doctype
+		self.name = name
+		self.direction = direction
+		self.amount = flt(amount)
+		self.date = getdate(date)
+		# The voucher name is a reference too: banks often carry it in the payment reference
+		self.references = {normalize_reference(ref) for ref in (name, *references) if ref}
+
+
+class VoucherIndex:
+	"""Hash indexes over the candidate vouchers of one bank GL account.
+
+	Built once per batch, so matching a transaction is a dict lookup on its
+	references, then on its amount, instead of a scan of the candidates.
+	"""
+
+	def __init__(self, vouchers, date_window=0, amount_tolerance=0):
+		self.date_window = date_window
+		self.amount_tolerance = amount_tolerance
+		self.by_reference = defaultdict(list)
+		self.by_amount = defaultdict(list)
+		# Vouchers already given to a transaction of this batch
+		self.used = set()
+
+		for voucher in vouchers:
+			for reference in voucher.references:
+				self.by_reference[reference].append(voucher)
+			self.by_amount[(voucher.direction, amount_key(voucher.amount))].append(voucher)
+
+	def match(self, record, references, on_amount=False):
+		"""Voucher for a mapped transaction, or None"""
+		direction = DEPOSIT if flt(record.deposit) else WITHDRAWAL
+		amount = flt(record.deposit) or flt(record.withdrawal)
+		date = getdate(record.date)
+
+		for reference in filter(None, references):
+			for voucher in self.by_reference.get(normalize_reference(reference), ()):
+				if self._usable(voucher, direction, date) and (
+					abs(voucher.amount - amount) <= self.amount_tolerance
+				):
+					return voucher
+
+		if on_amount:
+			# Without a reference only an unambiguous amount is trusted
+			candidates = [
+				voucher
+				for voucher in self._by_amount_within_tolerance(direction, amount)
+				if self._usable(voucher, direction, date)
+			]
+			if len(candidates) == 1:
+				return candidates[0]
+
+		return None
+
+	def _by_amount_within_tolerance(self, direction, amount):
+		# One lookup per cent of the tolerance band, both sides of the amount
+		for key in range(
+			amount_key(amount - self.amount_tolerance), amount_key(amount + self.amount_tolerance) + 1
+		):
+			for voucher in self.by_amount.get((direction, key), ()):
+				if abs(voucher.amount - amount) <= self.amount_tolerance:
+					yield voucher
+
+	def _usable(self, voucher, direction, date):
+		return (
+			voucher.direction == direction
+			and (voucher.doctype, voucher.name) not in self.used
+			and abs(date_diff(voucher.date, date)) <= self.date_window
+		)
+
+
+def match_transactions(transactions, provider, settings, correlation_id=None):
+	"""Reconcile newly created Bank Transactions against open vouchers; returns the number matched.
+
+	`transactions` are (Bank Transaction name, MappedTransaction) pairs of one batch.
+	Candidates are read once per bank account for the batch's date range, so the
+	cost follows the batch size and not the size of the ledger.
+	"""
+	by_account = defaultdict(list)
+	for name, record in transactions:
+		if record.bank_account and (flt(record.deposit) or flt(record.withdrawal)):
+			by_account[record.bank_account].append((name, record))
+
+	matched = 0
+	for bank_account, rows in by_account.items():
+		gl_account = frappe.db.get_value("Bank Account", bank_account, "account")
+		if not gl_account:
+			continue
+
+		dates = [getdate(record.date) for _, record in rows]
+		index = VoucherIndex(
+			get_candidate_vouchers(
+				gl_account,
+				add_days(min(dates), -settings.match_date_window),
+				add_days(max(dates), settings.match_date_window),
+			),
+			date_window=settings.match_date_window,
+			amount_tolerance=settings.match_amount_tolerance,
+		)
+
+		for name, record in rows:
+			voucher = index.match(record, provider.get_match_references(record), settings.match_on_amount)
+			if not voucher:
+				continue
+			# Never offered twice, even when reconciling it failed
+			index.used.add((voucher.doctype, voucher.name))
+			if reconcile(name, voucher, correlation_id):
+				matched += 1
+
+	return matched
+
+
+def reconcile(bank_transaction, voucher, correlation_id=None):
+	"""Allocate the voucher to the Bank Transaction the way the Bank Reconciliation Tool does"""
+	from erpnext.accounts.doctype.bank_reconciliation_tool.bank_reconciliation_tool import (
+		reconcile_vouchers,
+	)
+
+	frappe.db.savepoint("bank_auto_match")
+	try:
+		reconcile_vouchers(
+			bank_transaction,
+			json.dumps(
+				[{"payment_doctype": voucher.doctype, "payment_name": voucher.name, "amount": voucher.amount}]
+			),
+		)
+	except Exception as e:
+		frappe.db.rollback(save_point="bank_auto_match")
+		log_error(
+			f"Auto match of {bank_transaction} with {voucher.doctype} {voucher.name} failed: {str(e)[:300]}",
+			"Bank Auto Match Error",
+			correlation_id=correlation_id,
+		)
+		return False
+	return True
+
+
+def get_candidate_vouchers(gl_account, from_date, to_date):
+	"""Submitted, uncleared vouchers posted to the GL account between the dates"""
+	return [
+		*get_payment_entries(gl_account, from_date, to_date),
+		*get_journal_entries(gl_account, from_date, to_date),
+		*get_pos_sales_invoices(gl_account, from_date, to_date),
+		*get_paid_purchase_invoices(gl_account, from_date, to_date),
+	]
+
+
+def get_payment_entries(gl_account, from_date, to_date):
+	payment_entry = frappe.qb.DocType("Payment Entry")
+	rows = (
+		frappe.qb.from_(payment_entry)
+		.select(
+			payment_entry.name,
+			payment_entry.paid_to,
+			payment_entry.paid_amount,
+			payment_entry.received_amount,
+			payment_entry.reference_no,
+			payment_entry.posting_date,
+		)
+		.where(payment_entry.docstatus == 1)
+		.where(payment_entry.clearance_date.isnull())
+		.where((payment_entry.paid_from == gl_account) | (payment_entry.paid_to == gl_account))
+		.where(payment_entry.posting_date[from_date:to_date])
+	).run(as_dict=True)
+
+	return [
+		Voucher(
+			"Payment Entry",
+			row.name,
+			DEPOSIT if row.paid_to == gl_account else WITHDRAWAL,
+			# Amounts in the bank account's currency
+			row.received_amount if row.paid_to == gl_account else row.paid_amount,
+			row.posting_date,
+			(row.reference_no,),
+		)
+		for row in rows
+	]
+
+
+def get_journal_entries(gl_account, from_date, to_date):
+	journal_entry = frappe.qb.DocType("Journal Entry")
+	account = frappe.qb.DocType("Journal Entry Account")
+	rows = (
+		frappe.qb.from_(journal_entry)
+		.join(account)
+		.on(account.parent == journal_entry.name)
+		.select(
+			journal_entry.name,
+			journal_entry.cheque_no,
+			journal_entry.posting_date,
+			account.debit_in_account_currency,
+			account.credit_in_account_currency,
+		)
+		.where(journal_entry.docstatus == 1)
+		.where(journal_entry.clearance_date.isnull())
+		.where(account.account == gl_account)
+		.where(journal_entry.posting_date[from_date:to_date])
+	).run(as_dict=True)
+
+	return [
+		Voucher(
+			"Journal Entry",
+			row.name,
+			DEPOSIT if flt(row.debit_in_account_currency) else WITHDRAWAL,
+			flt(row.debit_in_account_currency) or flt(row.credit_in_account_currency),
+			row.posting_date,
+			(row.cheque_no,),
+		)
+		for row in rows
+	]
+
+
+def get_pos_sales_invoices(gl_account, from_date, to_date):
+	sales_invoice = frappe.qb.DocType("Sales Invoice")
+	payment = frappe.qb.DocType("Sales Invoice Payment")
+	rows = (
+		frappe.qb.from_(sales_invoice)
+		.join(payment)
+		.on(payment.parent == sales_invoice.name)
+		.select(sales_invoice.name, sales_invoice.posting_date, payment.amount)
+		.where(sales_invoice.docstatus == 1)
+		.where(sales_invoice.is_pos == 1)
+		.where(payment.clearance_date.isnull())
+		.where(payment.account == gl_account)
+		.where(sales_invoice.posting_date[from_date:to_date])
+	).run(as_dict=True)
+
+	return [Voucher("Sales Invoice", row.name, DEPOSIT, row.amount, row.posting_date) for row in rows]
+
+
+def get_paid_purchase_invoices(gl_account, from_date, to_date):
+	purchase_invoice = frappe.qb.DocType("Purchase Invoice")
+	rows = (
+		frappe.qb.from_(purchase_invoice)
+		.select(
+			purchase_invoice.name,
+			purchase_invoice.bill_no,
+			purchase_invoice.paid_amount,
+			purchase_invoice.posting_date,
+		)
+		.where(purchase_invoice.docstatus == 1)
+		.where(purchase_invoice.is_paid == 1)
+		.where(purchase_invoice.clearance_date.isnull())
+		.where(purchase_invoice.cash_bank_account == gl_account)
+		.where(purchase_invoice.posting_date[from_date:to_date])
+	).run(as_dict=True)
+
+	return [
+		Voucher("Purchase Invoice", row.name, WITHDRAWAL, row.paid_amount, row.posting_date, (row.bill_no,))
+		for row in rows
+	]
+
+
+def normalize_reference(reference):
+	return str(reference).strip().upper()
+
+
+def amount_key(amount):
+	# Compared in cents, so equal amounts hash alike whatever their float representation
+	return round(flt(amount) * 100)
@@ -0,0 +1,270 @@
+import json
+import time
+from datetime import timedelta
+
+import frappe
+from frappe import _
+from frappe.utils import cint, get_datetime, now_datetime
+
+from bank_integration.bank_integration.doctype.bank_sync_run.bank_sync_run import (
+	FINISHED_STATUSES,
+	start_run,
+)
+from bank_integration.common.correlation import log_error
+from bank_integration.common.providers import get_provider, get_providers
+from bank_integration.common.response_cache import bypass_response_cache
+from bank_integration.common.sync_engine import FAILED, SKIPPED, sync_sources
+from bank_integration.common.sync_lease import is_sync_running
+from bank_integration.common.sync_settings import get_sync_settings
+
+DEFAULT_CHUNK_DAYS = 30
+# Job timeout per window of a backfill job
+WINDOW_TIMEOUT = 3600
+
+# A window whose source lease another sync (usually a scheduled poll) holds is
+# tried again every LEASE_RETRY_INTERVAL seconds for up to LEASE_WAIT seconds
+LEASE_WAIT = 900
+LEASE_RETRY_INTERVAL = 30
+
+RUN_FIELDS = [
+	"name",
+	"provider",
+	"source",
+	"bank_account",
+	"sync_type",
+	"status",
+	"progress",
+	"processed_records",
+	"total_records",
+	"created_records",
+	"updated_records",
+	"skipped_records",
+	"error_records",
+	"from_date",
+	"to_date",
+	"started_at",
+	"finished_at",
+	"duration",
+	"checkpoint",
+	"error_message",
+]
+
+
+def plan_backfill(provider, from_date, to_date, scopes=None, workers=1, chunk_days=DEFAULT_CHUNK_DAYS):
+	"""Split a backfill into per-worker lists of (source, window) to sync in order.
+
+	Windows of one source always land on the same worker: the source lease lets only
+	one sync of a source run at a time, so spreading them would only make workers
+	skip each other. Parallelism is therefore at most the number of sources.
+	"""
+	provider = get_provider(provider) if isinstance(provider, str) else provider
+	settings = get_sync_settings()
+	if not provider.is_enabled(settings):
+		frappe.throw(_("{0} integration is not enabled").format(provider.name))
+
+	sources = [source for source in provider.get_sources(settings) if not scopes or source.scope in scopes]
+	unknown = set(scopes or ()) - {source.scope for source in sources}
+	if unknown:
+		frappe.throw(_("Unknown {0} sources: {1}").format(provider.name, ", ".join(sorted(unknown))))
+	provider.validate_sources(settings, sources)
+
+	windows = split_windows(from_date, to_date, chunk_days)
+	shards = [[] for i in range(max(1, min(cint(workers) or 1, len(sources))))]
+	for i, source in enumerate(sources):
+		shards[i % len(shards)].extend(
+			{"scope": source.scope, "from_date": str(start), "to_date": str(end)} for start, end in windows
+		)
+
+	return [shard for shard in shards if shard]
+
+
+def split_windows(from_date, to_date, chunk_days=DEFAULT_CHUNK_DAYS):
+	"""Consecutive (start, end) windows of at most chunk_days covering the range"""
+	start = get_datetime(from_date)
+	end = get_datetime(to_date)
+	if start > end:
+		frappe.throw(_("From date cannot be greater than To date"))
+
+	step = timedelta(days=cint(chunk_days) or DEFAULT_CHUNK_DAYS)
+	windows = []
+	while start < end:
+		windows.append((start, min(start + step, end)))
+		start += step
+	return windows or [(start, end)]
+
+
+def enqueue_backfill(provider, shards, fresh=False):
+	"""One long-queue job per shard; returns the job ids"""
+	job_ids = []
+	for i, windows in enumerate(shards):
+		job_id = f"bank_integration:backfill:{provider}:{i}:{frappe.generate_hash(length=8)}"
+		frappe.enqueue(
+			"bank_integration.common.backfill.run_backfill",
+			queue="long",
+			timeout=(WINDOW_TIMEOUT + LEASE_WAIT) * len(windows),
+			job_id=job_id,
+			provider=provider,
+			windows=windows,
+			fresh=fresh,
+		)
+		job_ids.append(job_id)
+	return job_ids
+
+
+def run_backfill(provider, windows, fresh=False):
+	"""Sync the windows of one shard in order; a failed window is logged and the next one runs.
+
+	Windows that failed, or stayed skipped because another sync kept the source
+	lease, are listed in the summary with their Bank Sync Run for bank-sync-resume.
+	"""
+	provider = get_provider(provider)
+	settings = get_sync_settings()
+	if not provider.is_enabled(settings):
+		frappe.throw(_("{0} integration is not enabled").format(provider.name))
+
+	sources = {source.scope: source for source in provider.get_sources(settings)}
+	summary = {
+		"provider": provider.name,
+		"windows": len(windows),
+		"processed": 0,
+		"created": 0,
+		"skipped": [],
+		"failed": [],
+	}
+
+	for window in windows:
+		source = sources.get(window["scope"])
+		try:
+			if not source:
+				frappe.throw(
+					_("{0} source {1} is no longer configured").format(provider.name, window["scope"])
+				)
+
+			outcome = sync_window(provider, settings, source, window, fresh=fresh)
+			summary["processed"] += outcome.processed
+			summary["created"] += outcome.created
+			if outcome.status == SKIPPED:
+				summary["skipped"].append({**window, "run": record_skipped_window(provider, source, window)})
+			elif outcome.status == FAILED:
+				summary["failed"].append({**window, "run": outcome.run})
+		except Exception:
+			summary["failed"].append({**window, "run": None})
+			log_error(
+				f"{provider.name} backfill of {window['scope']} {window['from_date']} - {window['to_date']} failed\n"
+				f"{frappe.get_traceback()}",
+				f"{provider.name} Backfill Error",
+			)
+
+	frappe.logger().info(f"{provider.name} backfill: {json.dumps(summary, default=str)}")
+	return summary
+
+
+def sync_window(provider, settings, source, window, fresh=False):
+	"""SourceOutcome of one window, waiting up to LEASE_WAIT for the source lease"""
+	deadline = time.monotonic() + LEASE_WAIT
+	while True:
+		with bypass_response_cache(fresh):
+			(outcome,) = sync_sources(
+				provider, settings, [source], window["from_date"], window["to_date"], "Backfill"
+			)
+		if outcome.status != SKIPPED or time.monotonic() >= deadline:
+			return outcome
+
+		frappe.logger().info(
+			f"{provider.name} backfill of {source.label} waits for the source lease, "
+			f"retrying in {LEASE_RETRY_INTERVAL}s"
+		)
+		time.sleep(LEASE_RETRY_INTERVAL)
+
+
+def record_skipped_window(provider, source, window):
+	"""Stopped Bank Sync Run for a window that never got the lease, so it can be resumed"""
+	run = start_run(
+		provider.name,
+		source=source.scope,
+		bank_account=source.bank_account,
+		from_date=window["from_date"],
+		to_date=window["to_date"],
+		sync_type="Backfill",
+	)
+	run.finish("Stopped", error_message="Skipped: another sync held the source lease")
+	return run.name
+
+
+def resume_run(run, now=False, fresh=False):
+	"""Sync the source and window of an unfinished or failed run again.
+
+	APIs cannot be read from a transaction id onwards, so the window is read from
+	its start; rows the run already wrote are skipped by the external key lookup
+	and hash comparison. A run left In Progress by a dead worker is marked Failed.
+	"""
+	run = frappe.get_doc("Bank Sync Run", run)
+	if run.status in ("Completed", "Completed with Errors"):
+		frappe.throw(_("Sync run {0} is already {1}").format(run.name, run.status))
+	if run.provider == "Statement":
+		frappe.throw(_("Statement imports are resumed by importing the file again"))
+
+	provider = get_provider(run.provider)
+	settings = get_sync_settings()
+	source = next((source for source in provider.get_sources(settings) if source.scope == run.source), None)
+	if not source:
+		frappe.throw(_("{0} source {1} is no longer configured").format(run.provider, run.source))
+	if is_sync_running(provider.name, source.lease_scope):
+		frappe.throw(_("{0} sync for {1} is still running").format(provider.name, source.label))
+
+	if run.status not in FINISHED_STATUSES:
+		frappe.db.set_value(
+			"Bank Sync Run",
+			run.name,
+			{"status": "Failed", "finished_at": now_datetime(), "error_message": "Interrupted; resumed"},
+			update_modified=False,
+		)
+		frappe.db.commit()
+
+	window = {"scope": run.source, "from_date": str(run.from_date), "to_date": str(run.to_date)}
+	result = {"run": run.name, "checkpoint": parse_checkpoint(run.checkpoint), "window": window}
+	if now:
+		result["result"] = run_backfill(provider.name, [window], fresh=fresh)
+	else:
+		result["job_ids"] = enqueue_backfill(provider.name, [[window]], fresh=fresh)
+	return result
+
+
+def get_sync_status(provider=None, run=None, limit=20):
+	"""Recent Bank Sync Runs with their progress, and the sources whose lease is held"""
+	filters = {}
+	if run:
+		filters["name"] = run
+	if provider:
+		filters["provider"] = provider
+
+	runs = frappe.get_all(
+		"Bank Sync Run", filters=filters, fields=RUN_FIELDS, order_by="creation desc", limit=cint(limit)
+	)
+	for row in runs:
+		row.checkpoint = parse_checkpoint(row.checkpoint)
+
+	settings = get_sync_settings()
+	running = [
+		{"provider": source.provider, "source": source.scope, "label": source.label}
+		for bank_provider in ([get_provider(provider)] if provider else get_providers())
+		if bank_provider.is_enabled(settings)
+		for source in bank_provider.get_sources(settings)
+		if is_sync_running(source.provider, source.lease_scope)
+	]
+
+	return {
+		"as_of": str(now_datetime()),
+		"in_progress": sum(1 for row in runs if row.status not in FINISHED_STATUSES),
+		"running_sources": running,
+		"runs": runs,
+	}
+
+
+def parse_checkpoint(checkpoint):
+	if not checkpoint:
+		return None
+	try:
+		return json.loads(checkpoint)
+	except ValueError:
+		return checkpoint
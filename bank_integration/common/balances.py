@@ -0,0 +1,69 @@
+import frappe
+
+from bank_integration.bank_integration.doctype.bank_balance_snapshot.bank_balance_snapshot import (
+	record_snapshot,
+)
+from bank_integration.common.correlation import log_error, new_correlation_id
+from bank_integration.common.providers import get_providers
+from bank_integration.common.sync_lease import is_sync_running
+from bank_integration.common.sync_settings import get_sync_settings
+
+
+def check_balances():
+	"""Hourly: snapshot each source's bank balance and compare it with the local running total.
+
+	The comparison reads one Bank Running Total row per account and currency; no
+	Bank Transaction is aggregated.
+	"""
+	settings = get_sync_settings()
+	if not settings.enable_balance_check:
+		return
+
+	for provider in get_providers():
+		if not provider.is_enabled(settings):
+			continue
+
+		for source in provider.get_sources(settings):
+			if not source.bank_account:
+				continue
+			# Mid-sync, the running total trails the bank by whatever is not written yet
+			if is_sync_running(provider.name, source.lease_scope):
+				continue
+
+			check_source_balances(provider, settings, source)
+
+
+def check_source_balances(provider, settings, source):
+	"""Snapshot and compare the Bank Account currency balance of one source; returns the snapshots"""
+	correlation_id = new_correlation_id()
+	try:
+		balances = provider.fetch_balances(settings, source, correlation_id)
+	except Exception as e:
+		log_error(
+			f"{provider.name} balance fetch failed for {source.scope}: {str(e)[:300]}",
+			f"Balance Check - {source.label}",
+			correlation_id=correlation_id,
+		)
+		return []
+
+	# Transactions in other currencies are synced without a Bank Account, so only the
+	# account's own currency has a running total to compare against
+	account_currency = get_account_currency(source.bank_account)
+	snapshots = []
+	for balance in balances:
+		if balance.currency != account_currency:
+			continue
+		snapshot = record_snapshot(
+			provider.name, source, balance, settings.balance_drift_tolerance, correlation_id
+		)
+		if snapshot:
+			snapshots.append(snapshot)
+
+	frappe.db.commit()
+	return snapshots
+
+
+def get_account_currency(bank_account):
+	"""Currency of the GL account behind a Bank Account"""
+	account = frappe.db.get_value("Bank Account", bank_account, "account")
+	return account and frappe.db.get_value("Account", account, "account_currency")
@@ -0,0 +1,355 @@
+import hashlib
+import json
+
+import frappe
+from frappe.utils import flt, getdate
+
+from bank_integration.bank_integration.doctype.bank_running_total.bank_running_total import (
+	add_to_running_total,
+	counts_toward_total,
+	net_amount,
+)
+from bank_integration.common.correlation import log_error
+from bank_integration.common.sync_lease import SyncLeaseLost
+from bank_integration.common.sync_metrics import track
+
+# Provider-owned fields covered by the content hash; local fields such as bank_account are excluded
+HASH_FIELDS = (
+	"date",
+	"description",
+	"reference_number",
+	"transaction_type",
+	"currency",
+	"deposit",
+	"withdrawal",
+	"status",
+)
+AMOUNT_FIELDS = ("deposit", "withdrawal")
+
+
+# Bank Transaction fields every provider mapper fills; provider-specific ones go in `extra`
+MAPPED_FIELDS = (
+	"transaction_id",
+	"external_key",
+	"date",
+	"status",
+	"bank_account",
+	"currency",
+	"description",
+	"reference_number",
+	"transaction_type",
+	"deposit",
+	"withdrawal",
+)
+
+
+class MappedTransaction:
+	"""A provider record mapped to Bank Transaction fields.
+
+	Kept as a slotted object while a page is compared against existing rows; only
+	rows that are actually inserted are turned into a document dict.
+	"""
+
+	__slots__ = (*MAPPED_FIELDS, "extra")
+
+	def __init__(self, **values):
+		for fieldname in self.__slots__:
+			setattr(self, fieldname, values.get(fieldname))
+
+	def get(self, fieldname, default=None):
+		if fieldname in MAPPED_FIELDS:
+			value = getattr(self, fieldname)
+			return default if value is None else value
+		return (self.extra or {}).get(fieldname, default)
+
+	def as_doc(self):
+		"""Bank Transaction document dict for insertion"""
+		doc = {"doctype": "Bank Transaction"}
+		for fieldname in MAPPED_FIELDS:
+			value = getattr(self, fieldname)
+			if value is not None:
+				doc[fieldname] = value
+		if self.extra:
+			doc.update(self.extra)
+		return doc
+
+
+def external_key(provider, transaction_id):
+	"""Provider-qualified id stored in the unique Bank Transaction.external_key column"""
+	return f"{provider.lower()}:{transaction_id}"
+
+
+def content_hash(mapped):
+	"""Compact fingerprint of the provider fields of a mapped Bank Transaction"""
+	values = [_normalize(fieldname, mapped.get(fieldname)) for fieldname in HASH_FIELDS]
+	return hashlib.blake2b(json.dumps(values).encode(), digest_size=8).hexdigest()
+
+
+def get_existing_transactions(provider, transaction_ids):
+	"""Existing Bank Transactions for a page of provider ids, keyed by transaction_id (one indexed query)"""
+	keys = [external_key(provider, tid) for tid in transaction_ids if tid]
+	return {row.transaction_id: row for row in get_existing_by_key(keys).values()}
+
+
+def get_existing_by_key(keys, extra_fields=()):
+	"""Existing Bank Transactions for a page of external keys, keyed by external_key"""
+	if not keys:
+		return {}
+
+	rows = frappe.get_all(
+		"Bank Transaction",
+		filters={"external_key": ["in", keys]},
+		fields=[
+			"name",
+			"transaction_id",
+			"external_key",
+			"bank_account",
+			"docstatus",
+			"content_hash",
+			"allocated_amount",
+			*HASH_FIELDS,
+			*extra_fields,
+		],
+	)
+	return {row.external_key: row for row in rows}
+
+
+def insert_or_ignore(bank_txn_doc):
+	"""Insert a new Bank Transaction unless its external_key is already taken.
+
+	The unique index makes concurrent writers safe without an existence query per row;
+	returns False when another job inserted the same transaction first.
+	"""
+	frappe.db.savepoint("bank_transaction_insert")
+	try:
+		bank_txn_doc.insert()
+	except (frappe.DuplicateEntryError, frappe.UniqueValidationError):
+		frappe.db.rollback(save_point="bank_transaction_insert")
+		return False
+	return True
+
+
+def sync_existing_transaction(existing, mapped, extra_fields=()):
+	"""Apply upstream edits to an already synced transaction.
+
+	Returns the list of updated fields; empty when the content hash matches or nothing may change.
+	"""
+	new_hash = content_hash(mapped)
+	changes = get_upstream_changes(existing, mapped, new_hash, extra_fields)
+	if changes is None:
+		return []
+
+	updated_fields = list(changes)
+	changes["content_hash"] = new_hash
+	frappe.db.set_value("Bank Transaction", existing.name, changes)
+
+	# set_value skips doc events, so the running total is moved here
+	if existing.docstatus == 1 and any(
+		fieldname in changes for fieldname in (*AMOUNT_FIELDS, "currency", "status")
+	):
+		update_running_total(existing, {**existing, **changes})
+
+	return updated_fields
+
+
+def get_upstream_changes(existing, mapped, new_hash=None, extra_fields=()):
+	"""Field values an upstream edit changes on an already synced transaction.
+
+	None when nothing changed or the row is cancelled; the dict can be empty when
+	every changed field is protected. `extra_fields` are provider-specific fields
+	outside the content hash (read into `existing`) to compare as well.
+	"""
+	if existing.docstatus == 2:
+		return None
+
+	extra_changes = {
+		fieldname: mapped.get(fieldname)
+		for fieldname in extra_fields
+		if str(mapped.get(fieldname) or "") != str(existing.get(fieldname) or "")
+	}
+	new_hash = new_hash or content_hash(mapped)
+	if existing.content_hash == new_hash:
+		return extra_changes or None
+
+	changes = {
+		fieldname: mapped.get(fieldname)
+		for fieldname in HASH_FIELDS
+		if _normalize(fieldname, mapped.get(fieldname)) != _normalize(fieldname, existing.get(fieldname))
+	}
+
+	# Allocated or reconciled rows keep their amounts and status; only descriptive fields follow upstream
+	if flt(existing.allocated_amount) or existing.status == "Reconciled":
+		protected = [fieldname for fieldname in (*AMOUNT_FIELDS, "status") if fieldname in changes]
+		if protected:
+			frappe.logger().warning(
+				f"Upstream change to {', '.join(protected)} of allocated Bank Transaction {existing.name} ignored"
+			)
+		for fieldname in protected:
+			changes.pop(fieldname)
+	elif any(fieldname in changes for fieldname in AMOUNT_FIELDS):
+		changes["unallocated_amount"] = abs(flt(mapped.get("withdrawal")) - flt(mapped.get("deposit")))
+
+	changes.update(extra_changes)
+	return changes
+
+
+def update_running_total(old, new):
+	"""Apply an amount, currency or status change of a submitted transaction to the running totals"""
+	old_amount, old_count = (net_amount(old), 1) if counts_toward_total(old) else (0, 0)
+	new_amount, new_count = (net_amount(new), 1) if counts_toward_total(new) else (0, 0)
+
+	if old.currency == new["currency"]:
+		if new_amount != old_amount or new_count != old_count:
+			add_to_running_total(
+				old.bank_account, old.currency, new_amount - old_amount, new_count - old_count
+			)
+		return
+
+	if old_count:
+		add_to_running_total(old.bank_account, old.currency, -old_amount, -1)
+	if new_count:
+		add_to_running_total(old.bank_account, new["currency"], new_amount, 1)
+
+
+class TransactionWriter:
+	"""Shared filter, dedup and write path for mapped Bank Transactions.
+
+	API syncs and statement imports feed it one page (or chunk) at a time; counters
+	accumulate across pages so one writer covers a whole run.
+	"""
+
+	def __init__(
+		self,
+		provider,
+		metrics=None,
+		correlation_id=None,
+		should_insert=None,
+		on_progress=None,
+		progress_every=10,
+		error_title=None,
+		dry_run=False,
+	):
+		self.provider = provider
+		self.metrics = metrics
+		self.correlation_id = correlation_id
+		# Filter for new records only; already synced ones are always kept up to date
+		self.should_insert = should_insert
+		# Called as on_progress(writer, record) every `progress_every` records
+		self.on_progress = on_progress
+		self.progress_every = progress_every
+		self.error_title = error_title or f"{provider} Transaction Error"
+		# Count what would be created and updated without writing anything
+		self.dry_run = dry_run
+
+		self.processed = 0
+		self.created = 0
+		self.updated = 0
+		self.skipped = 0
+		self.errors = 0
+		# (Bank Transaction name, record) pairs created by the last write_page call
+		self.page_created = []
+
+	def write_page(self, records):
+		"""Write a page of MappedTransaction records"""
+		self.page_created = []
+		with track(self.metrics, "dedup"):
+			existing_transactions = get_existing_by_key(
+				[record.external_key for record in records if record.external_key]
+			)
+
+		for record in records:
+			try:
+				self.write(record, existing_transactions.get(record.external_key))
+			except SyncLeaseLost:
+				raise
+			except Exception as e:
+				self.errors += 1
+				log_error(
+					f"Failed to process transaction {record.transaction_id or 'unknown'}: {str(e)[:300]}",
+					self.error_title,
+					correlation_id=self.correlation_id,
+				)
+
+			self.processed += 1
+			if self.on_progress and self.processed % self.progress_every == 0:
+				with track(self.metrics, "progress"):
+					self.on_progress(self, record)
+
+	def add_mapping_errors(self, page, records):
+		"""Count the items of a raw page the mapper left out (and logged) as errors"""
+		dropped = len(page) - len(records)
+		if dropped > 0:
+			self.errors += dropped
+			self.processed += dropped
+
+	def write(self, record, existing=None):
+		if existing:
+			# Unchanged records (matching content hash) cost nothing beyond the mapping
+			with track(self.metrics, "update"):
+				if self.dry_run:
+					changed_fields = list(get_upstream_changes(existing, record) or ())
+				else:
+					changed_fields = sync_existing_transaction(existing, record)
+			if changed_fields:
+				self.updated += 1
+				frappe.logger().info(
+					f"Transaction {record.transaction_id} updated upstream: {', '.join(changed_fields)}"
+				)
+			else:
+				self.skipped += 1
+			return
+
+		if self.should_insert and not self.should_insert(record):
+			self.skipped += 1
+			return
+
+		if self.dry_run:
+			self.created += 1
+			return
+
+		with track(self.metrics, "mapping"):
+			bank_txn_doc = frappe.get_doc({**record.as_doc(), "content_hash": content_hash(record)})
+		with track(self.metrics, "insert"):
+			inserted = insert_or_ignore(bank_txn_doc)
+		if not inserted:
+			# Another job synced this transaction between our prefetch and insert
+			self.skipped += 1
+			return
+		with track(self.metrics, "submit"):
+			bank_txn_doc.submit()
+		self.created += 1
+		self.page_created.append((bank_txn_doc.name, record))
+
+	@property
+	def status(self):
+		return "Completed" if not self.errors else "Completed with Errors"
+
+	def counts(self):
+		"""Counters in the shape Bank Sync Run.finish expects"""
+		return {
+			"created": self.created,
+			"updated": self.updated,
+			"skipped": self.skipped,
+			"errors": self.errors,
+		}
+
+	def record_metrics(self):
+		if not self.metrics:
+			return
+		self.metrics.incr("processed", self.processed)
+		for counter, value in self.counts().items():
+			self.metrics.incr(counter, value)
+
+	def summary(self):
+		return (
+			f"Processed {self.processed}, Created {self.created}, Updated {self.updated}, "
+			f"Skipped {self.skipped}, Errors {self.errors}"
+		)
+
+
+def _normalize(fieldname, value):
+	if fieldname == "date":
+		return str(getdate(value)) if value else ""
+	if fieldname in AMOUNT_FIELDS:
+		return f"{flt(value):.4f}"
+	return str(value or "")
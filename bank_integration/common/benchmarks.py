@@ -0,0 +1,79 @@
+import time
+
+import frappe
+
+from bank_integration.airwallex.utils import map_airwallex_page, map_airwallex_to_erpnext
+from bank_integration.skript.skript_utils import map_skript_page, map_skript_to_erpnext
+
+
+def benchmark_mappers(rows=1000, rounds=5, bank_account=None):
+	"""Per-row mapping cost of the row-by-row and page mappers on synthetic pages.
+
+	bench --site <site> bank-sync-benchmark --rows 1000
+
+	Uses the first Bank Account of the site (if any) so the currency lookup is part of the cost.
+	Reports the best of `rounds` runs in microseconds per row.
+	"""
+	rows = int(rows)
+	rounds = int(rounds)
+	bank_account = bank_account or frappe.db.get_value("Bank Account", {}, "name")
+
+	airwallex_page = [_airwallex_record(i) for i in range(rows)]
+	skript_page = [_skript_record(i) for i in range(rows)]
+
+	results = {
+		"rows": rows,
+		"rounds": rounds,
+		"bank_account": bank_account,
+		"airwallex": {
+			"per_row_us": _best_per_row(
+				lambda: [map_airwallex_to_erpnext(txn, bank_account) for txn in airwallex_page], rows, rounds
+			),
+			"page_us": _best_per_row(lambda: map_airwallex_page(airwallex_page, bank_account), rows, rounds),
+		},
+		"skript": {
+			"per_row_us": _best_per_row(
+				lambda: [map_skript_to_erpnext(txn, bank_account) for txn in skript_page], rows, rounds
+			),
+			"page_us": _best_per_row(lambda: map_skript_page(skript_page, bank_account), rows, rounds),
+		},
+	}
+
+	return results
+
+
+def _best_per_row(fn, rows, rounds):
+	best = None
+	for _ in range(rounds):
+		start = time.perf_counter()
+		fn()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return round(best / rows * 1_000_000, 2)
+
+
+def _airwallex_record(i):
+	return {
+		"id": f"7f687fe6-dcf4-4462-92fa-{i:012d}",
+		"batch_id": f"bat_20201202_AUD_{i % 7}",
+		"created_at": "2021-03-22T16:08:02+0000",
+		"currency": "AUD",
+		"description": f"Deposit {i}",
+		"net": (-1) ** i * (100.21 + i),
+		"source_id": f"9f687fe6-dcf4-4462-92fa-{i:012d}",
+		"source_type": "PAYMENT_ATTEMPT",
+		"status": "SETTLED" if i % 3 else "PENDING",
+		"transaction_type": "PAYMENT",
+	}
+
+
+def _skript_record(i):
+	return {
+		"id": f"skript-txn-{i:08d}",
+		"amount": str((-1) ** i * (52.5 + i)),
+		"currency": "AUD",
+		"description": f"Card purchase {i}",
+		"postingDateTime": "2025-01-15T10:30:00+11:00",
+		"reference": f"REF{i:06d}",
+		"type": "DEBIT" if i % 2 else "CREDIT",
+	}
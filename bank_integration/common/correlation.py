@@ -0,0 +1,24 @@
+import frappe
+
+
+def new_correlation_id():
+	"""Short random id shared by every log row and error written for one sync run"""
+	return frappe.generate_hash(length=16)
+
+
+def get_run_name(correlation_id):
+	"""Bank Sync Run that owns the correlation id, if any"""
+	if not correlation_id:
+		return None
+	return frappe.db.get_value("Bank Sync Run", {"correlation_id": correlation_id}, "name")
+
+
+def log_error(message, title, correlation_id=None):
+	"""frappe.log_error, linked to the sync run the correlation id belongs to"""
+	run_name = get_run_name(correlation_id)
+	return frappe.log_error(
+		title=title,
+		message=message,
+		reference_doctype="Bank Sync Run" if run_name else None,
+		reference_name=run_name,
+	)
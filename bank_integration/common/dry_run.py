@@ -0,0 +1,147 @@
+import json
+from collections import Counter
+
+import frappe
+from frappe.utils import cint, flt
+
+from bank_integration.common.bank_transactions import TransactionWriter
+from bank_integration.common.sync_metrics import SyncMetrics, track
+
+# Per-row write costs used when the provider has no finished run to learn them from
+DEFAULT_CREATE_SECONDS = 0.05
+DEFAULT_UPDATE_SECONDS = 0.005
+# Finished runs whose stage timings the write costs are averaged over
+COST_SAMPLE_RUNS = 20
+
+# Stages a dry run skips; their time per created / updated row in past runs is projected
+CREATE_STAGES = ("insert", "submit", "matching")
+UPDATE_STAGES = ("update",)
+
+
+def simulate_provider(provider, settings, sources, from_date, to_date):
+	"""Run the read side of a sync (fetch, map, dedup, filter) for each source and project the rest.
+
+	Nothing is written: no Bank Transactions, run rows, API logs or settings progress.
+	Returns a report with per-stage timings, counts per transaction type and currency,
+	the API calls a real run makes and an estimated wall time, per source and in total.
+	"""
+	costs = get_write_costs(provider.name)
+	reports = [simulate_source(provider, settings, source, from_date, to_date, costs) for source in sources]
+
+	report = {
+		"provider": provider.name,
+		"dry_run": True,
+		"from_date": str(from_date),
+		"to_date": str(to_date),
+		"write_costs": costs,
+		"sources": reports,
+		"totals": {
+			key: sum(source[key] for source in reports)
+			for key in ("fetched", "would_create", "would_update", "would_skip", "errors", "api_calls")
+		},
+	}
+	estimates = [source["estimated_seconds"] for source in reports]
+	report["totals"].update(
+		{
+			# One worker takes the sources in turn; with a worker per source they overlap fully
+			"estimated_sequential_seconds": round(sum(estimates), 1),
+			"estimated_parallel_seconds": round(max(estimates, default=0), 1),
+			"workers_for_parallel": len(reports),
+		}
+	)
+
+	frappe.logger().info(f"{provider.name} dry run: {json.dumps(report['totals'])}")
+	return report
+
+
+def simulate_source(provider, settings, source, from_date, to_date, costs):
+	"""Dry run of one source; returns its report"""
+	metrics = SyncMetrics(f"{provider.name} dry run {source.label}")
+	writer = TransactionWriter(
+		provider.name,
+		metrics=metrics,
+		should_insert=provider.get_insert_filter(settings),
+		dry_run=True,
+	)
+	by_type = Counter()
+	by_currency = Counter()
+	fetched = 0
+	error = None
+
+	try:
+		client = provider.get_client(settings, source)
+		client.metrics = metrics
+		# API calls are counted, not logged
+		client.enable_api_log = False
+
+		for page in provider.fetch_pages(client, source, from_date, to_date):
+			fetched += len(page)
+			with track(metrics, "mapping"):
+				records = provider.map_page(page, source.bank_account)
+			for record in records:
+				by_type[record.transaction_type or "Unknown"] += 1
+				by_currency[record.currency or "Unknown"] += 1
+			writer.write_page(records)
+
+	except Exception as e:
+		error = getattr(e, "message", None) or str(e)
+
+	metrics.stop()
+	stages = metrics.as_dict()["stages"]
+	write_seconds = writer.created * costs["create"] + writer.updated * costs["update"]
+
+	return {
+		"source": source.scope,
+		"label": source.label,
+		"bank_account": source.bank_account,
+		"fetched": fetched,
+		"would_create": writer.created,
+		"would_update": writer.updated,
+		"would_skip": writer.skipped,
+		"errors": writer.errors + (1 if error else 0),
+		"error": str(error)[:300] if error else None,
+		"by_type": dict(by_type.most_common()),
+		"by_currency": dict(by_currency.most_common()),
+		# The same list pages are requested by a real run
+		"api_calls": metrics.calls.get("http", 0),
+		"stages": stages,
+		"read_seconds": round(metrics.elapsed, 2),
+		"estimated_write_seconds": round(write_seconds, 2),
+		"estimated_seconds": round(metrics.elapsed + write_seconds, 2),
+	}
+
+
+def get_write_costs(provider):
+	"""Seconds per created and per updated row, from the stage timings of recent runs"""
+	runs = frappe.get_all(
+		"Bank Sync Run",
+		filters={
+			"provider": provider,
+			"status": ["in", ("Completed", "Completed with Errors")],
+			"stage_timings": ["is", "set"],
+		},
+		fields=["created_records", "updated_records", "stage_timings"],
+		order_by="creation desc",
+		limit=COST_SAMPLE_RUNS,
+	)
+
+	totals = Counter()
+	for run in runs:
+		try:
+			stages = json.loads(run.stage_timings).get("stages", {})
+		except ValueError:
+			continue
+		totals["created"] += cint(run.created_records)
+		totals["updated"] += cint(run.updated_records)
+		totals["create"] += sum(flt(stages.get(stage, {}).get("seconds")) for stage in CREATE_STAGES)
+		totals["update"] += sum(flt(stages.get(stage, {}).get("seconds")) for stage in UPDATE_STAGES)
+
+	return {
+		"create": round(totals["create"] / totals["created"], 4)
+		if totals["created"]
+		else DEFAULT_CREATE_SECONDS,
+		"update": round(totals["update"] / totals["updated"], 4)
+		if totals["updated"]
+		else DEFAULT_UPDATE_SECONDS,
+		"sample_runs": len(runs),
+	}
@@ -0,0 +1,156 @@
+import codecs
+import json
+
+# Decoded text is dropped from the front of the buffer once this much has been consumed
+_COMPACT_AT = 64 * 1024
+_WHITESPACE = " \t\n\r"
+# A number decoded up to one of these may continue in the next chunk ("4." + "5")
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class JSONItemStream:
+	"""Iterate the items of a JSON list response while it is being read.
+
+	Accepts either a bare array or an object with the array under one of `items_keys`
+	(the first one present); the object's other members (has_more, ref, ...) are
+	collected in `meta`. Each
+	item is decoded with `JSONDecoder.raw_decode` as soon as it is complete, so at
+	most one item plus one network chunk is held in memory, whatever the page size.
+	`meta` is complete once iteration has finished.
+	"""
+
+	def __init__(self, chunks, items_keys=("items", "data"), preview_length=300, on_complete=None):
+		self.chunks = iter(chunks)
+		self.items_keys = items_keys
+		self.preview_length = preview_length
+		# Called as on_complete(stream) after the last item, or with the error that stopped it
+		self.on_complete = on_complete
+
+		self.meta = {}
+		self.count = 0
+		# Bounded prefix of the body, for logging
+		self.preview = ""
+
+		self._decoder = json.JSONDecoder()
+		self._utf8 = codecs.getincrementaldecoder("utf-8")()
+		self._buffer = ""
+		self._pos = 0
+		self._exhausted = False
+
+	def __iter__(self):
+		error = None
+		try:
+			yield from self._parse()
+		except Exception as e:
+			error = e
+			raise
+		finally:
+			if self.on_complete:
+				self.on_complete(self, error)
+
+	def _parse(self):
+		start = self._next_char()
+		if start == "[":
+			yield from self._parse_array()
+		elif start == "{":
+			yield from self._parse_object()
+		else:
+			raise ValueError(f"Expected a JSON object or array, got {start!r}")
+
+	def _parse_object(self):
+		self._pos += 1
+		streamed = False
+		while True:
+			char = self._next_char()
+			if char == "}":
+				self._pos += 1
+				return
+			if char == ",":
+				self._pos += 1
+				continue
+
+			key = self._decode_value()
+			if self._next_char() != ":":
+				raise ValueError(f"Expected ':' after key {key!r}")
+			self._pos += 1
+
+			if not streamed and key in self.items_keys and self._next_char() == "[":
+				streamed = True
+				yield from self._parse_array()
+			else:
+				# Scalars and small members are decoded whole
+				self.meta[key] = self._decode_value()
+
+	def _parse_array(self):
+		self._pos += 1
+		while True:
+			char = self._next_char()
+			if char == "]":
+				self._pos += 1
+				return
+			if char == ",":
+				self._pos += 1
+				continue
+
+			item = self._decode_value()
+			self.count += 1
+			yield item
+
+	def _decode_value(self):
+		# raw_decode does not skip leading whitespace
+		self._next_char()
+		while True:
+			self._compact()
+			try:
+				value, end = self._decoder.raw_decode(self._buffer, self._pos)
+			except json.JSONDecodeError:
+				# Value cut off at the end of the buffer; read on unless the body has ended
+				if not self._read():
+					raise
+				continue
+
+			# A number ending at the buffer end, or at a character that could carry it on,
+			# may continue in the next chunk
+			if (
+				isinstance(value, int | float)
+				and not isinstance(value, bool)
+				and (end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARS)
+				and self._read()
+			):
+				continue
+
+			self._pos = end
+			return value
+
+	def _next_char(self):
+		"""Next non-whitespace character, without consuming it"""
+		while True:
+			while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+				self._pos += 1
+			if self._pos < len(self._buffer):
+				return self._buffer[self._pos]
+			if not self._read():
+				raise ValueError("Unexpected end of JSON body")
+
+	def _read(self):
+		"""Append the next chunk to the buffer; False once the body is exhausted"""
+		while not self._exhausted:
+			chunk = next(self.chunks, None)
+			if chunk is None:
+				self._exhausted = True
+				text = self._utf8.decode(b"", final=True)
+			else:
+				text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+			if len(self.preview) < self.preview_length:
+				self.preview += text[: self.preview_length - len(self.preview)]
+
+			if text:
+				self._buffer += text
+				return True
+		return False
+
+	def _compact(self):
+		if self._pos > _COMPACT_AT:
+			self._buffer = self._buffer[self._pos :]
+			self._pos = 0
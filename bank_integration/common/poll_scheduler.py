@@ -0,0 +1,176 @@
+from datetime import timedelta
+
+import frappe
+from frappe.utils import cint, get_datetime, now_datetime
+
+from bank_integration.common.correlation import log_error
+from bank_integration.common.providers import get_providers
+from bank_integration.common.sync_engine import sync_provider
+from bank_integration.common.sync_lease import is_sync_running
+from bank_integration.common.sync_settings import get_sync_settings
+
+# Per-source poll state lives in one redis hash: "<provider>:<scope>" -> state dict
+STATE_KEY = "bank_integration:poll_state"
+
+# Starting interval of a source nobody has polled yet, from the schedule setting
+SCHEDULE_MINUTES = {"Hourly": 60, "Daily": 1440, "Weekly": 10080, "Monthly": 43200}
+
+DEFAULT_MIN_INTERVAL = 15
+DEFAULT_MAX_INTERVAL = 1440
+
+# Re-read a little before the last window end so late-posted rows are not missed;
+# rows seen twice cost one indexed lookup and a hash comparison
+WINDOW_OVERLAP = timedelta(minutes=10)
+
+
+def dispatch():
+	"""Scheduler tick: enqueue a poll for every source whose next poll is due.
+
+	Replaces the fixed hourly/daily/weekly/monthly entries. Each source of every
+	registered provider carries its own interval, so the tick itself is one settings
+	snapshot and one redis hash read.
+	"""
+	settings = get_sync_settings()
+	states = get_states()
+	now = now_datetime()
+
+	for source in get_sources(settings):
+		state = states.get(f"{source.provider}:{source.scope}")
+		if state and get_datetime(state["next_poll_at"]) > now:
+			continue
+		if is_sync_running(source.provider, source.lease_scope):
+			continue
+
+		frappe.enqueue(
+			"bank_integration.common.poll_scheduler.poll_source",
+			queue="long",
+			timeout=3600,
+			job_id=f"bank_integration:poll:{source.provider}:{source.scope}",
+			deduplicate=True,
+			provider=source.provider,
+			scope=source.scope,
+			schedule=source.schedule,
+		)
+
+
+def poll_source(provider, scope, schedule="Daily"):
+	"""Sync one source from where its last poll ended, then schedule its next poll"""
+	settings = get_sync_settings()
+	min_interval, max_interval = get_interval_bounds(settings)
+	state = get_state(provider, scope) or {}
+	interval = state.get("interval") or clamp(
+		SCHEDULE_MINUTES.get(schedule, 1440), min_interval, max_interval
+	)
+
+	started_at = now_datetime()
+	# The cache may have evicted the state; the run ledger still knows the last window
+	window_end = state.get("window_end") or get_last_window_end(provider, scope)
+	if window_end:
+		from_date = get_datetime(window_end) - WINDOW_OVERLAP
+	else:
+		from_date = started_at - timedelta(minutes=interval)
+
+	try:
+		sync_provider(
+			provider, from_date, started_at, sync_type="Scheduled", scopes=[scope], settings=settings
+		)
+	except Exception:
+		log_error(
+			f"Scheduled {provider} poll of {scope} failed\n{frappe.get_traceback()}",
+			f"{provider} Poll Error",
+		)
+
+	run = get_poll_run(provider, scope, started_at)
+	succeeded = bool(run) and run.status != "Failed"
+	activity = cint(run.created_records) + cint(run.updated_records) if run else 0
+	if run:
+		# A skipped poll (lease held by a manual sync) says nothing about activity
+		interval = next_interval(interval, activity, min_interval, max_interval)
+	set_state(
+		provider,
+		scope,
+		{
+			"interval": interval,
+			"next_poll_at": str(now_datetime() + timedelta(minutes=interval)),
+			# A failed poll leaves the window open so the next one retries it
+			"window_end": str(started_at) if succeeded else window_end and str(window_end),
+			"last_activity": activity,
+		},
+	)
+
+
+def next_interval(interval, activity, min_interval, max_interval):
+	"""Halve the interval after a poll that brought changes, double it after an empty one"""
+	if activity:
+		interval = interval / 2
+	else:
+		interval = interval * 2
+	return clamp(round(interval), min_interval, max_interval)
+
+
+def clamp(value, low, high):
+	return max(low, min(value, high))
+
+
+def get_sources(settings):
+	"""SyncSource of every enabled provider that can be polled (mapped to a Bank Account)"""
+	return [
+		source
+		for provider in get_providers()
+		if provider.is_enabled(settings)
+		for source in provider.get_sources(settings)
+		if source.bank_account
+	]
+
+
+def get_interval_bounds(settings):
+	"""(min, max) poll interval in minutes"""
+	min_interval = settings.poll_min_interval or DEFAULT_MIN_INTERVAL
+	max_interval = settings.poll_max_interval or DEFAULT_MAX_INTERVAL
+	return min_interval, max(min_interval, max_interval)
+
+
+def get_poll_run(provider, scope, since):
+	"""The scheduled Bank Sync Run the poll just made, if it got that far"""
+	runs = frappe.get_all(
+		"Bank Sync Run",
+		filters={
+			"provider": provider,
+			"source": scope,
+			"sync_type": "Scheduled",
+			"started_at": [">=", since],
+		},
+		fields=["status", "created_records", "updated_records"],
+		order_by="started_at desc",
+		limit=1,
+	)
+	return runs[0] if runs else None
+
+
+def get_last_window_end(provider, scope):
+	"""End of the last scheduled window of the source that synced, from the run ledger"""
+	return frappe.db.get_value(
+		"Bank Sync Run",
+		{
+			"provider": provider,
+			"source": scope,
+			"sync_type": "Scheduled",
+			"status": ["in", ["Completed", "Completed with Errors"]],
+		},
+		"to_date",
+		order_by="to_date desc",
+	)
+
+
+def get_states():
+	return {
+		frappe.safe_decode(key): value for key, value in (frappe.cache().hgetall(STATE_KEY) or {}).items()
+	}
+
+
+def get_state(provider, scope):
+	return frappe.cache().hget(STATE_KEY, f"{provider}:{scope}")
+
+
+def set_state(provider, scope, state):
+	frappe.cache().hset(STATE_KEY, f"{provider}:{scope}", state)
@@ -0,0 +1,147 @@
+import inspect
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import frappe
+from frappe import _
+
+# Providers are registered by dotted path in the `bank_integration_providers` hook
+# (name -> class path), so an app adding a bank feed only ships a BankProvider
+# subclass. Classes are imported the first time a provider is used.
+PROVIDERS_HOOK = "bank_integration_providers"
+
+_LOCAL_KEY = "bank_integration_providers"
+
+
+@dataclass(frozen=True, slots=True)
+class SyncSource:
+	"""One pollable source of a provider (an Airwallex client, a Skript account)"""
+
+	provider: str
+	# Source id recorded on Bank Sync Run and used as the poll state key
+	scope: str
+	# Scope of the SyncLease; usually `scope`, qualified further where ids are not global
+	lease_scope: str
+	bank_account: str | None
+	label: str
+	schedule: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class BankBalance:
+	"""Balance of one currency of a source, as reported by the bank"""
+
+	currency: str
+	# Ledger balance, including pending amounts; what synced transactions add up to
+	balance: float
+	available_balance: float | None = None
+	as_of: object = None
+
+
+class BankProvider(ABC):
+	"""Interface the sync engine drives for every bank feed.
+
+	A provider turns the settings snapshot into sources, builds an authenticated
+	API client per source, yields raw pages and maps them to MappedTransaction
+	records. Deduplication, writing, leases and the run ledger are the engine's.
+	The abstract methods are required; the rest have working defaults.
+	"""
+
+	name = ""
+	# Page size asked of list endpoints
+	page_size = 1000
+	# Streamed pages are handed to the engine in batches of this many items
+	batch_size = 200
+
+	def is_enabled(self, settings):
+		return True
+
+	@abstractmethod
+	def get_sources(self, settings):
+		"""SyncSource list for every configured source"""
+
+	def validate_sources(self, settings, sources):
+		"""Raise before anything is synced when the sources cannot be synced as configured"""
+		return
+
+	@abstractmethod
+	def get_client(self, settings, source, correlation_id=None):
+		"""Authenticated API client for one source"""
+
+	@abstractmethod
+	def fetch_pages(self, client, source, from_date, to_date):
+		"""Yield batches (lists of raw transaction dicts) created between the two datetimes.
+
+		A batch can be a whole API page or, when pages are streamed, `batch_size`
+		items of one; the engine maps and writes each before asking for the next.
+		"""
+
+	@abstractmethod
+	def map_page(self, page, bank_account, correlation_id=None):
+		"""Map one raw page to MappedTransaction records"""
+
+	def get_insert_filter(self, settings):
+		"""Filter applied to new records only, or None to insert everything"""
+		return None
+
+	def get_match_references(self, record):
+		"""Values of a mapped transaction that may equal a voucher's reference, best first"""
+		return [record.reference_number]
+
+	def fetch_balances(self, settings, source, correlation_id=None):
+		"""Current BankBalance per currency of one source; empty when the bank has no balance endpoint"""
+		return []
+
+	def get_authenticators(self, settings):
+		"""(label, authenticator) per credential whose token the pre-warm job keeps fresh.
+
+		An authenticator offers get_token_expiry() and refresh_token(); empty when the
+		provider caches no tokens.
+		"""
+		return []
+
+	def after_sync(self, client, source, settings, correlation_id=None):
+		"""Runs after a source synced without raising"""
+		return
+
+	def update_settings_progress(self, processed, total, status="In Progress"):
+		"""Summary of the last sync on the Settings single"""
+		return
+
+
+def get_provider_paths():
+	"""Provider name -> class path, from every installed app's hooks"""
+	# Hook dicts are merged per key into lists; a later app overrides an earlier one
+	return {name: paths[-1] for name, paths in frappe.get_hooks(PROVIDERS_HOOK).items() if paths}
+
+
+def get_provider_names():
+	return list(get_provider_paths())
+
+
+def get_provider(name):
+	"""Provider instance by name, imported on first use"""
+	# Cached per request/job: installed apps, and so the hooks, differ between sites
+	cache = getattr(frappe.local, _LOCAL_KEY, None)
+	if cache is None:
+		cache = {}
+		setattr(frappe.local, _LOCAL_KEY, cache)
+
+	if name not in cache:
+		path = get_provider_paths().get(name)
+		if not path:
+			frappe.throw(_("Unknown bank provider: {0}").format(name))
+		provider_class = frappe.get_attr(path)
+		# Caught here rather than when a sync first calls the missing method
+		if inspect.isabstract(provider_class):
+			frappe.throw(
+				_("Bank provider {0} does not implement {1}").format(
+					name, ", ".join(sorted(provider_class.__abstractmethods__))
+				)
+			)
+		cache[name] = provider_class()
+	return cache[name]
+
+
+def get_providers():
+	return [get_provider(name) for name in get_provider_names()]
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+
+# Seconds a GET response is served from cache without asking the provider again.
+# Lists move as transactions post; account and settled transaction details rarely do.
+LIST_TTL = 60
+DETAIL_TTL = 300
+ACCOUNTS_TTL = 900
+
+# Responses that came with an ETag are kept this much longer after they go stale,
+# so the next request can revalidate them with If-None-Match instead of a full download
+REVALIDATE_FOR = 3600
+
+
+class ResponseCache:
+	"""Cached GET response of one credential, URL and params"""
+
+	def __init__(self, provider, credential, url, params, ttl, bypass=False):
+		self.ttl = ttl
+		self.key = _cache_key(provider, credential, url, params)
+		# A bypassed read ignores what is cached but still stores the fresh response
+		self.entry = None if bypass else frappe.cache().get_value(self.key)
+
+	@property
+	def fresh(self):
+		return bool(self.entry) and time.time() - self.entry["fetched_at"] < self.ttl
+
+	@property
+	def etag(self):
+		return self.entry.get("etag") if self.entry else None
+
+	@property
+	def data(self):
+		return self.entry["data"]
+
+	def store(self, data, etag=None):
+		self.entry = {"data": data, "etag": etag, "fetched_at": time.time()}
+		frappe.cache().set_value(
+			self.key, self.entry, expires_in_sec=self.ttl + (REVALIDATE_FOR if etag else 0)
+		)
+
+	def revalidated(self):
+		"""The provider answered 304: serve the cached body for another TTL"""
+		self.store(self.entry["data"], self.entry["etag"])
+		return self.entry["data"]
+
+
+def get_response_cache(provider, credential, url, params, ttl, use_cache=True):
+	"""ResponseCache for a GET request, or None when the endpoint is not cached"""
+	if not ttl:
+		return None
+	bypass = not use_cache or bool(frappe.flags.bypass_response_cache)
+	return ResponseCache(provider, credential, url, params, ttl, bypass=bypass)
+
+
+@contextmanager
+def bypass_response_cache(bypass=True):
+	"""Every cached API read inside the block goes to the provider, for syncs that need fresh data"""
+	previous = frappe.flags.bypass_response_cache
+	frappe.flags.bypass_response_cache = previous or bypass
+	try:
+		yield
+	finally:
+		frappe.flags.bypass_response_cache = previous
+
+
+def _cache_key(provider, credential, url, params):
+	# The credential is part of the key so clients never see each other's data;
+	# it is hashed along with the request so ids never appear in redis key names
+	request = json.dumps([credential, url, params or {}], sort_keys=True, default=str)
+	digest = hashlib.sha256(request.encode()).hexdigest()
+	return f"bank_integration:response_cache:{provider.lower()}:{digest}"
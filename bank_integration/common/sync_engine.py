@@ -0,0 +1,269 @@
+from dataclasses import dataclass
+
+import frappe
+
+from bank_integration.bank_integration.doctype.bank_sync_run.bank_sync_run import start_run
+from bank_integration.bank_integration.doctype.bank_transaction_payload.bank_transaction_payload import (
+	archive_page,
+)
+from bank_integration.common.auto_match import match_transactions
+from bank_integration.common.bank_transactions import TransactionWriter
+from bank_integration.common.correlation import log_error, new_correlation_id
+from bank_integration.common.dry_run import simulate_provider
+from bank_integration.common.providers import get_provider
+from bank_integration.common.response_cache import bypass_response_cache
+from bank_integration.common.sync_lease import SyncLease
+from bank_integration.common.sync_metrics import SyncMetrics, is_profiling_enabled, track
+from bank_integration.common.sync_settings import get_sync_settings
+
+# SourceOutcome.status
+SYNCED = "Synced"
+# Another worker held the source lease; nothing was read or written
+SKIPPED = "Skipped"
+FAILED = "Failed"
+
+
+@dataclass(slots=True)
+class SourceOutcome:
+	"""What sync_sources did with one source"""
+
+	scope: str
+	status: str
+	run: str | None = None
+	processed: int = 0
+	created: int = 0
+	errors: int = 0
+
+
+def sync_provider(
+	provider,
+	from_date,
+	to_date,
+	sync_type="Manual",
+	scopes=None,
+	settings=None,
+	fresh=False,
+	dry_run=False,
+):
+	"""Sync every source of a provider, or only the given scopes; returns (processed, created).
+
+	With fresh=True no API read is served from the response cache. With dry_run=True
+	nothing is written and the simulate_provider report is returned instead.
+	"""
+	provider = get_provider(provider) if isinstance(provider, str) else provider
+	settings = settings or get_sync_settings()
+
+	if not provider.is_enabled(settings):
+		frappe.logger().info(f"{provider.name} integration is not enabled")
+		return 0, 0
+
+	sources = [source for source in provider.get_sources(settings) if not scopes or source.scope in scopes]
+	provider.validate_sources(settings, sources)
+
+	if dry_run:
+		with bypass_response_cache(fresh):
+			return simulate_provider(provider, settings, sources, from_date, to_date)
+
+	with bypass_response_cache(fresh):
+		outcomes = sync_sources(provider, settings, sources, from_date, to_date, sync_type)
+
+	total_processed = sum(outcome.processed for outcome in outcomes)
+	total_created = sum(outcome.created for outcome in outcomes)
+
+	# A scoped sync (poll, backfill, webhook) covers part of the provider, and a sync
+	# whose sources were all skipped did nothing: neither is the provider's last sync
+	if not scopes and any(outcome.status != SKIPPED for outcome in outcomes):
+		# Final status and last sync date - the only write to the Settings single for this sync
+		failed = any(outcome.status == FAILED or outcome.errors for outcome in outcomes)
+		final_status = "Completed with Errors" if failed else "Completed"
+		provider.update_settings_progress(total_processed, total_processed, final_status)
+
+	return total_processed, total_created
+
+
+def sync_sources(provider, settings, sources, from_date, to_date, sync_type):
+	"""Sync each source under its own lease and run; returns a SourceOutcome per source"""
+	outcomes = []
+
+	for source in sources:
+		# Different sources sync in parallel; the same source never runs twice at once
+		lease = SyncLease(provider.name, source.lease_scope)
+		if not lease.acquire():
+			frappe.logger().info(f"{provider.name} sync for {source.label} already running, skipping")
+			outcomes.append(SourceOutcome(source.scope, SKIPPED))
+			continue
+
+		# Ties this source's run, API logs and error logs together
+		correlation_id = new_correlation_id()
+		outcome = SourceOutcome(source.scope, FAILED)
+		outcomes.append(outcome)
+		run = None
+
+		try:
+			# Each source gets its own ledger row so runs never share counters
+			run = start_run(
+				provider.name,
+				source=source.scope,
+				bank_account=source.bank_account,
+				from_date=from_date,
+				to_date=to_date,
+				sync_type=sync_type,
+				correlation_id=correlation_id,
+			)
+			outcome.run = run.name
+			metrics = SyncMetrics(
+				f"{provider.name} sync {source.label}", profile=is_profiling_enabled(settings)
+			)
+
+			outcome.processed, outcome.created, outcome.errors = sync_source(
+				provider, settings, source, from_date, to_date, metrics=metrics, run=run, lease=lease
+			)
+			# sync_source finishes the run Failed instead of raising
+			outcome.status = FAILED if run.status == "Failed" else SYNCED
+
+		except Exception as e:
+			outcome.errors += 1
+			# after_sync raises once the window is written; only the follow-up work failed
+			if run and run.status in ("Completed", "Completed with Errors"):
+				outcome.status = SYNCED
+			log_error(
+				f"{provider.name} sync failed for {source.scope}: {str(e)[:500]}\n{frappe.get_traceback()}",
+				f"{provider.name} Sync Error - {source.label}",
+				correlation_id=correlation_id,
+			)
+
+		finally:
+			lease.release()
+
+	return outcomes
+
+
+def sync_source(provider, settings, source, from_date, to_date, metrics=None, run=None, lease=None):
+	"""Fetch, map and write one source page by page; returns (processed, created, errors)"""
+	correlation_id = run.correlation_id if run else None
+	fetched = 0
+	writer = TransactionWriter(
+		provider.name,
+		metrics=metrics,
+		correlation_id=correlation_id,
+		should_insert=provider.get_insert_filter(settings),
+		on_progress=lambda writer, record: update_progress(
+			run, writer.processed, fetched, record.transaction_id, lease
+		),
+		error_title=f"{provider.name} Txn Error - {source.label}",
+	)
+
+	try:
+		client = provider.get_client(settings, source, correlation_id)
+		client.metrics = metrics
+
+		# Pages are written as they arrive, so memory holds one page whatever the window
+		for page in provider.fetch_pages(client, source, from_date, to_date):
+			fetched += len(page)
+			if metrics:
+				metrics.incr("fetched", len(page))
+			if lease:
+				lease.heartbeat()
+
+			write_page(provider, settings, source, page, writer, metrics, correlation_id)
+
+			with track(metrics, "progress"):
+				update_progress(run, writer.processed, fetched)
+
+		writer.record_metrics()
+		if run:
+			run.finish(writer.status, metrics=metrics, **writer.counts())
+
+	except Exception as e:
+		# API errors carry the response body in .message
+		message = getattr(e, "message", None) or str(e)
+		log_error(
+			f"{provider.name} sync failed for {source.scope}: {str(message)[:300]}\n{frappe.get_traceback()}",
+			f"{provider.name} Sync Error - {source.label}",
+			correlation_id=correlation_id,
+		)
+		if run:
+			run.finish("Failed", metrics=metrics, error_message=message, **writer.counts())
+		return writer.processed, writer.created, writer.errors + 1
+
+	frappe.logger().info(f"[{correlation_id}] {provider.name} {source.label}: {writer.summary()}")
+
+	# Outside the try: the run is already finished, so a failure here is the caller's to log
+	provider.after_sync(client, source, settings, correlation_id)
+
+	return writer.processed, writer.created, writer.errors
+
+
+def sync_pushed_page(provider, settings, source, page, sync_type="Webhook"):
+	"""Write raw records the provider pushed, under their own run; returns the writer.
+
+	The records take the same path as a fetched page, auto-match and after_sync
+	included. Unlike sync_source a failed write raises, so the caller can retry them.
+	"""
+	correlation_id = new_correlation_id()
+	run = start_run(
+		provider.name,
+		source=source.scope,
+		bank_account=source.bank_account,
+		sync_type=sync_type,
+		correlation_id=correlation_id,
+	)
+	metrics = SyncMetrics(f"{provider.name} {sync_type.lower()} {source.label}")
+	writer = TransactionWriter(
+		provider.name,
+		metrics=metrics,
+		correlation_id=correlation_id,
+		should_insert=provider.get_insert_filter(settings),
+		error_title=f"{provider.name} {sync_type} Txn Error - {source.label}",
+	)
+
+	try:
+		write_page(provider, settings, source, page, writer, metrics, correlation_id)
+		writer.record_metrics()
+		run.update_progress(writer.processed, len(page))
+		run.finish(writer.status, metrics=metrics, **writer.counts())
+	except Exception as e:
+		run.finish("Failed", metrics=metrics, error_message=e, **writer.counts())
+		raise
+
+	# The records are written; a retry would only write them again, so this is logged
+	try:
+		client = provider.get_client(settings, source, correlation_id)
+		provider.after_sync(client, source, settings, correlation_id)
+	except Exception as e:
+		log_error(
+			f"{provider.name} {sync_type.lower()} follow-up failed for {source.scope}: {str(e)[:500]}\n"
+			f"{frappe.get_traceback()}",
+			f"{provider.name} Sync Error - {source.label}",
+			correlation_id=correlation_id,
+		)
+
+	return writer
+
+
+def write_page(provider, settings, source, page, writer, metrics=None, correlation_id=None):
+	"""Map, archive, write and auto-match one page of raw provider records"""
+	with track(metrics, "mapping"):
+		records = provider.map_page(page, source.bank_account, correlation_id)
+	if settings.archive_raw_payloads:
+		with track(metrics, "archive"):
+			archive_page(provider.name, source.scope, source.bank_account, page, records)
+	writer.add_mapping_errors(page, records)
+	writer.write_page(records)
+
+	# Matching right after the batch keeps its candidate window to the batch's dates
+	if settings.enable_auto_match and writer.page_created:
+		with track(metrics, "matching"):
+			matched = match_transactions(writer.page_created, provider, settings, correlation_id)
+		if metrics:
+			metrics.incr("matched", matched)
+
+
+def update_progress(run, processed, total, last_transaction_id=None, lease=None):
+	"""Heartbeat the lease and write progress to the run ledger"""
+	if lease:
+		lease.heartbeat()
+
+	if run:
+		checkpoint = {"processed": processed, "last_transaction_id": last_transaction_id}
+		run.update_progress(processed, total, checkpoint=checkpoint if last_transaction_id else None)
@@ -0,0 +1,82 @@
+import frappe
+
+# A lease outlives any single page fetch or progress interval; a killed worker
+# stops heartbeating and its lease expires on its own after this many seconds.
+DEFAULT_LEASE_TTL = 600
+
+# Only the holder (matching token) may extend or release a lease.
+_EXTEND_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+	return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+	return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SyncLeaseLost(Exception):
+	"""Raised when a heartbeat finds the lease expired or taken over by another worker"""
+
+
+class SyncLease:
+	"""Redis lease that keeps one provider source (client or account) to a single sync worker"""
+
+	def __init__(self, provider, scope, ttl=DEFAULT_LEASE_TTL):
+		self.provider = provider
+		self.scope = scope
+		self.ttl = ttl
+		self.key = _lease_key(provider, scope)
+		self.token = frappe.generate_hash(length=16)
+		self.acquired = False
+
+	def acquire(self):
+		"""Take the lease if nobody holds it; returns False when another worker does"""
+		self.acquired = bool(frappe.cache().set(self.key, self.token, nx=True, ex=self.ttl))
+		return self.acquired
+
+	def heartbeat(self):
+		"""Extend the lease; raises SyncLeaseLost if it is no longer ours"""
+		if not self.acquired:
+			return
+
+		if not frappe.cache().eval(_EXTEND_SCRIPT, 1, self.key, self.token, self.ttl):
+			self.acquired = False
+			raise SyncLeaseLost(f"{self.provider} sync lease for {self.scope} expired or was taken over")
+
+	def is_held(self):
+		"""Whether any worker holds the lease"""
+		return frappe.cache().get(self.key) is not None
+
+	def release(self):
+		if not self.acquired:
+			return
+
+		try:
+			frappe.cache().eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+		except Exception as e:
+			# The lease expires on its own, so a failed release only delays the next run
+			frappe.logger().error(f"Failed to release {self.provider} sync lease for {self.scope}: {e}")
+		finally:
+			self.acquired = False
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, tb):
+		self.release()
+
+
+def is_sync_running(provider, scope):
+	"""Check whether a live lease exists for the given provider source"""
+	return frappe.cache().get(_lease_key(provider, scope)) is not None
+
+
+def _lease_key(provider, scope):
+	# Raw redis commands are used, so namespace the key per site explicitly
+	return frappe.cache().make_key(f"bank_integration:sync_lease:{provider.lower()}:{scope}")
@@ -0,0 +1,100 @@
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+
+# Stages recorded by the sync loops and API clients. Stages may nest (a token
+# request includes its own HTTP call and log write), so totals are inclusive.
+SYNC_STAGES = (
+	"token",
+	"http",
+	"json_decode",
+	"dedup",
+	"mapping",
+	"archive",
+	"insert",
+	"update",
+	"submit",
+	"matching",
+	"progress",
+	"logging",
+)
+
+
+class SyncMetrics:
+	"""Lightweight per-stage timers and counters for a single sync run"""
+
+	def __init__(self, name, profile=False):
+		self.name = name
+		self.timings = {}
+		self.calls = {}
+		self.counters = {}
+		self.started_at = time.perf_counter()
+		self.elapsed = None
+		self._profiler = None
+		self.profile_stats = None
+
+		if profile:
+			self._profiler = cProfile.Profile()
+			self._profiler.enable()
+
+	@contextmanager
+	def stage(self, name):
+		"""Time the wrapped block and add it to the named stage"""
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add_time(name, time.perf_counter() - start)
+
+	def add_time(self, name, seconds):
+		self.timings[name] = self.timings.get(name, 0.0) + seconds
+		self.calls[name] = self.calls.get(name, 0) + 1
+
+	def incr(self, counter, value=1):
+		self.counters[counter] = self.counters.get(counter, 0) + value
+
+	def stop(self):
+		"""Stop the run clock and the profiler (if enabled)"""
+		if self.elapsed is None:
+			self.elapsed = time.perf_counter() - self.started_at
+
+		if self._profiler:
+			self._profiler.disable()
+			stream = io.StringIO()
+			pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(40)
+			self.profile_stats = stream.getvalue()
+			self._profiler = None
+
+		return self
+
+	def as_dict(self):
+		elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started_at
+		return {
+			"name": self.name,
+			"elapsed": round(elapsed, 4),
+			"stages": {
+				stage: {"seconds": round(seconds, 4), "calls": self.calls.get(stage, 0)}
+				for stage, seconds in sorted(self.timings.items(), key=lambda item: -item[1])
+			},
+			"counters": dict(self.counters),
+		}
+
+	def summary(self):
+		"""One line breakdown, slowest stage first"""
+		data = self.as_dict()
+		stages = ", ".join(f"{stage} {info['seconds']:.2f}s" for stage, info in data["stages"].items())
+		counters = ", ".join(f"{key} {value}" for key, value in data["counters"].items())
+		return f"{self.name} took {data['elapsed']:.2f}s ({stages or 'no stages'}) [{counters}]"
+
+
+def track(metrics, stage):
+	"""Return a stage timer, or a no-op context when no metrics are attached"""
+	if metrics is None:
+		return nullcontext()
+	return metrics.stage(stage)
+
+
+def is_profiling_enabled(settings):
+	return bool(getattr(settings, "enable_sync_profiling", 0))
@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+import frappe
+from frappe.utils import cint, flt
+
+SETTINGS_DOCTYPE = "Bank Integration Setting"
+
+# frappe.local is reset for every request and background job, so a snapshot taken
+# here lives exactly as long as the job that built it
+_LOCAL_KEY = "bank_integration_sync_settings"
+
+
+@dataclass(frozen=True, slots=True)
+class AirwallexClientConfig:
+	airwallex_client_id: str
+	bank_account: str | None
+	airwallex_account_id: str | None = None
+	api_key: str | None = field(default=None, repr=False)
+
+
+@dataclass(frozen=True, slots=True)
+class SkriptAccountConfig:
+	account_id: str
+	bank_account: str | None
+	display_name: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SyncSettings:
+	"""Read-only view of Bank Integration Setting for one job.
+
+	Child tables are tuples and credentials are decrypted once, in memory only.
+	Tokens are not part of it; they change during a job and are read and written
+	through targeted queries by the authenticators.
+	"""
+
+	name: str
+	enable_airwallex: bool
+	enable_skript: bool
+	enable_log: bool
+	enable_sync_profiling: bool
+	archive_raw_payloads: bool
+	api_url: str | None
+	sync_schedule: str | None
+	refresh_pending_days: int
+	poll_min_interval: int
+	poll_max_interval: int
+	enable_balance_check: bool
+	balance_drift_tolerance: float
+	enable_auto_match: bool
+	match_on_amount: bool
+	match_date_window: int
+	match_amount_tolerance: float
+	airwallex_clients: tuple[AirwallexClientConfig, ...]
+	skript_api_url: str | None
+	skript_access_token_url: str | None
+	skript_api_scope: str | None
+	skript_consumer_id: str | None
+	skript_sync_schedule: str | None
+	skript_accounts: tuple[SkriptAccountConfig, ...]
+	# transaction type -> "Include" / "Exclude"; the first rule for a type wins
+	transaction_type_rules: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+	skript_client_id: str | None = field(default=None, repr=False)
+	skript_client_secret: str | None = field(default=None, repr=False)
+	airwallex_webhook_secret: str | None = field(default=None, repr=False)
+
+	def get_airwallex_clients(self):
+		"""Clients with both an id and a Bank Account"""
+		return [
+			client for client in self.airwallex_clients if client.airwallex_client_id and client.bank_account
+		]
+
+	def get_airwallex_client(self, client_id):
+		for client in self.airwallex_clients:
+			if client.airwallex_client_id == client_id:
+				return client
+		return None
+
+	def should_sync_transaction(self, transaction_type):
+		"""Same rules as BankIntegrationSetting.should_sync_transaction, as one dict lookup"""
+		if not self.transaction_type_rules:
+			return True
+
+		action = self.transaction_type_rules.get(transaction_type)
+		if action:
+			return action == "Include"
+
+		# Any Include rule makes the filters a whitelist; only Exclude rules make it a blacklist
+		return "Include" not in self.transaction_type_rules.values()
+
+
+def get_sync_settings():
+	"""Snapshot of the settings for the current job, built on first use"""
+	snapshot = getattr(frappe.local, _LOCAL_KEY, None)
+	if snapshot is None:
+		snapshot = build_sync_settings(frappe.get_cached_doc(SETTINGS_DOCTYPE))
+		setattr(frappe.local, _LOCAL_KEY, snapshot)
+	return snapshot
+
+
+def clear_sync_settings():
+	"""Drop the snapshot of the current request/job (called when the settings are saved)"""
+	setattr(frappe.local, _LOCAL_KEY, None)
+
+
+def build_sync_settings(doc):
+	rules = {}
+	for rule in doc.transaction_type_filters:
+		rules.setdefault(rule.transaction_type, rule.filter_action)
+
+	return SyncSettings(
+		name=doc.name,
+		enable_airwallex=bool(cint(doc.enable_airwallex)),
+		enable_skript=bool(cint(doc.enable_skript)),
+		enable_log=bool(cint(doc.enable_log)),
+		enable_sync_profiling=bool(cint(doc.enable_sync_profiling)),
+		archive_raw_payloads=bool(cint(doc.archive_raw_payloads)),
+		api_url=doc.api_url,
+		sync_schedule=doc.sync_schedule,
+		refresh_pending_days=cint(doc.refresh_pending_days),
+		poll_min_interval=cint(doc.poll_min_interval),
+		poll_max_interval=cint(doc.poll_max_interval),
+		enable_balance_check=bool(cint(doc.enable_balance_check)),
+		balance_drift_tolerance=flt(doc.balance_drift_tolerance),
+		enable_auto_match=bool(cint(doc.enable_auto_match)),
+		match_on_amount=bool(cint(doc.match_on_amount)),
+		match_date_window=cint(doc.match_date_window),
+		match_amount_tolerance=flt(doc.match_amount_tolerance),
+		airwallex_clients=tuple(
+			AirwallexClientConfig(
+				airwallex_client_id=client.airwallex_client_id,
+				bank_account=client.bank_account,
+				airwallex_account_id=client.airwallex_account_id,
+				api_key=client.get_password("airwallex_api_key", raise_exception=False),
+			)
+			for client in doc.airwallex_clients
+		),
+		skript_api_url=doc.skript_api_url,
+		skript_access_token_url=doc.skript_access_token_url,
+		skript_api_scope=doc.skript_api_scope,
+		skript_consumer_id=doc.skript_consumer_id,
+		skript_sync_schedule=doc.skript_sync_schedule,
+		skript_accounts=tuple(
+			SkriptAccountConfig(
+				account_id=account.account_id,
+				bank_account=account.bank_account,
+				display_name=account.display_name,
+			)
+			for account in doc.skript_accounts
+		),
+		transaction_type_rules=MappingProxyType(rules),
+		skript_client_id=doc.get_password("skript_client_id", raise_exception=False),
+		skript_client_secret=doc.get_password("skript_client_secret", raise_exception=False),
+		airwallex_webhook_secret=doc.get_password("airwallex_webhook_secret", raise_exception=False),
+	)
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+import frappe
+from frappe.utils import now_datetime
+
+from bank_integration.common.correlation import log_error
+from bank_integration.common.providers import get_providers
+from bank_integration.common.sync_settings import get_sync_settings
+
+# Tokens expiring sooner than this are renewed. Cached tokens count as expired 5 minutes
+# early and the job runs every 5 minutes, so 15 keeps every lookup on a live token.
+PREWARM_LEAD_TIME = timedelta(minutes=15)
+
+# A credential whose login failed is not tried again for this long; syncs still retry on their own
+FAILURE_BACKOFF = 3600
+
+
+def prewarm_tokens():
+	"""Scheduled job: log in again for every cached token that is about to expire.
+
+	The first API call after expiry would otherwise wait for a login round trip and
+	a commit. Only credentials that already have a token are renewed; the new
+	token replaces the old one, which stays usable meanwhile.
+	"""
+	settings = get_sync_settings()
+	refresh_before = now_datetime() + PREWARM_LEAD_TIME
+	refreshed = []
+
+	for provider in get_providers():
+		if not provider.is_enabled(settings):
+			continue
+
+		for label, authenticator in provider.get_authenticators(settings):
+			expiry = authenticator.get_token_expiry()
+			if not expiry or expiry > refresh_before:
+				continue
+
+			backoff_key = f"bank_integration:token_prewarm_failed:{provider.name.lower()}:{label}"
+			if frappe.cache().get_value(backoff_key):
+				continue
+
+			try:
+				# Through the single-flight refresh, so a worker refreshing after a 401 is not raced
+				if not authenticator.refresh_token():
+					raise Exception("login returned no token")
+				refreshed.append(f"{provider.name}:{label}")
+			except Exception as e:
+				frappe.cache().set_value(backoff_key, 1, expires_in_sec=FAILURE_BACKOFF)
+				log_error(
+					f"Pre-warming the {provider.name} token of {label} failed: {getattr(e, 'message', None) or e}",
+					f"{provider.name} Token Pre-warm Error",
+				)
+
+	if refreshed:
+		frappe.logger().info(f"Pre-warmed bank tokens: {', '.join(refreshed)}")
+
+	return refreshed
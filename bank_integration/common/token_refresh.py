@@ -0,0 +1,66 @@
+import time
+
+import frappe
+
+from bank_integration.common.sync_lease import SyncLease
+
+# Held by the worker that logs in; longer than any login round trip, short enough
+# that a worker killed mid-login only delays the others briefly
+REFRESH_LEASE_TTL = 30
+
+# How long the other workers wait for the new token before logging in themselves
+WAIT_TIMEOUT = 20
+POLL_INTERVAL = 0.2
+
+# The new token is handed to waiters through redis: their open database
+# transaction may not see the row the refreshing worker committed
+HANDOFF_TTL = 60
+
+
+def single_flight_refresh(provider, credential, login, stale_token=None):
+	"""New token of one credential, logged in for by one worker at a time.
+
+	`login` requests and caches a new token and returns it (or None). The worker
+	that takes the refresh lease calls it; the others poll for the token it hands
+	over, and only log in themselves when it fails or takes too long. `stale_token`
+	is the token the caller saw rejected; a handed-over token equal to it is ignored.
+	"""
+	lease = SyncLease(provider, f"token_refresh:{credential}", ttl=REFRESH_LEASE_TTL)
+	deadline = time.monotonic() + WAIT_TIMEOUT
+
+	while time.monotonic() < deadline:
+		if lease.acquire():
+			with lease:
+				# Another worker may have refreshed between our rejected call and now
+				token = get_handoff_token(provider, credential, stale_token)
+				if token:
+					return token
+				return hand_off(provider, credential, login())
+
+		while time.monotonic() < deadline:
+			time.sleep(POLL_INTERVAL)
+			token = get_handoff_token(provider, credential, stale_token)
+			if token:
+				return token
+			if not lease.is_held():
+				# The refreshing worker gave up without a token; the next one in line tries
+				break
+
+	frappe.logger().warning(f"Timed out waiting for a {provider} token refresh of {credential}")
+	return hand_off(provider, credential, login())
+
+
+def get_handoff_token(provider, credential, stale_token=None):
+	token = frappe.cache().get(_handoff_key(provider, credential))
+	token = frappe.safe_decode(token) if token else None
+	return token if token and token != stale_token else None
+
+
+def hand_off(provider, credential, token):
+	if token:
+		frappe.cache().set(_handoff_key(provider, credential), token, ex=HANDOFF_TTL)
+	return token
+
+
+def _handoff_key(provider, credential):
+	return frappe.cache().make_key(f"bank_integration:token_handoff:{provider.lower()}:{credential}")
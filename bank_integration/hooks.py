@@ -145,28 +145,46 @@ app_license = "mit"
 # 	}
 # }
 
+doc_events = {
+	# Keep the per-account running totals the balance check compares against
+	"Bank Transaction": {
+		"on_submit": "bank_integration.bank_integration.doctype.bank_running_total.bank_running_total.on_bank_transaction_submit",
+		"on_cancel": "bank_integration.bank_integration.doctype.bank_running_total.bank_running_total.on_bank_transaction_cancel",
+	}
+}
+
 # Scheduled Tasks
 # ---------------
 
 scheduler_events = {
-	"hourly": [
-		"bank_integration.airwallex.scheduler.run_hourly_sync",
-		"bank_integration.skript.skript_scheduler.run_hourly_skript_sync",
-	],
-	"daily": [
-		"bank_integration.airwallex.scheduler.run_daily_sync",
-		"bank_integration.skript.skript_scheduler.run_daily_skript_sync",
+	"all": [
+		"bank_integration.airwallex.webhook.drain_queue",
+		"bank_integration.common.poll_scheduler.dispatch",
 	],
-	"weekly": [
-		"bank_integration.airwallex.scheduler.run_weekly_sync",
-		"bank_integration.skript.skript_scheduler.run_weekly_skript_sync",
+	"hourly_long": [
+		"bank_integration.common.balances.check_balances",
 	],
-	"monthly": [
-		"bank_integration.airwallex.scheduler.run_monthly_sync",
-		"bank_integration.skript.skript_scheduler.run_monthly_skript_sync",
+	"cron": {
+		# Renews tokens before they expire, so no sync waits for a login
+		"*/5 * * * *": [
+			"bank_integration.common.token_prewarm.prewarm_tokens",
+		],
+	},
+	"daily_long": [
+		"bank_integration.bank_integration.doctype.bank_integration_log.bank_integration_log.purge_expired_logs",
 	],
 }
 
+# Bank Providers
+# --------------
+# Provider name -> BankProvider class, imported when the provider is first used.
+# Other apps add bank feeds by declaring the same hook.
+
+bank_integration_providers = {
+	"Airwallex": "bank_integration.airwallex.provider.AirwallexProvider",
+	"Skript": "bank_integration.skript.provider.SkriptProvider",
+}
+
 # Testing
 # -------
 
@@ -253,6 +271,8 @@ fixtures = [
 				[
 					"Bank Transaction-custom_airwallex_source_type",
 					"Bank Transaction-custom_airwallex_source_id",
+					"Bank Transaction-content_hash",
+					"Bank Transaction-external_key",
 				],
 			]
 		],
@@ -0,0 +1,60 @@
+import frappe
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+from bank_integration.common.bank_transactions import external_key
+
+
+def execute():
+	"""Fill Bank Transaction.external_key for transactions synced before the key existed"""
+	# Fixtures sync after patches; the unique column has to exist before it can be backfilled.
+	# The definition matches the fixture, which then finds nothing to change.
+	create_custom_fields(
+		{
+			"Bank Transaction": [
+				{
+					"fieldname": "external_key",
+					"label": "External Key",
+					"fieldtype": "Data",
+					"insert_after": "transaction_id",
+					"description": "Provider-qualified transaction id (provider:id), unique per synced transaction",
+					"unique": 1,
+					"read_only": 1,
+					"no_copy": 1,
+					"print_hide": 1,
+					"module": "Bank Integration",
+				}
+			]
+		},
+		update=False,
+	)
+
+	settings = frappe.get_single("Bank Integration Setting")
+	airwallex_accounts = {row.bank_account for row in settings.airwallex_clients if row.bank_account}
+	skript_accounts = {row.bank_account for row in settings.skript_accounts if row.bank_account}
+
+	rows = frappe.get_all(
+		"Bank Transaction",
+		filters={"transaction_id": ["is", "set"], "external_key": ["is", "not set"]},
+		fields=["name", "transaction_id", "bank_account", "airwallex_source_type", "docstatus", "creation"],
+	)
+	# Submitted rows first, so a draft or cancelled duplicate never takes the key
+	rows.sort(key=lambda row: (row.docstatus != 1, row.creation))
+
+	taken = set(
+		frappe.get_all("Bank Transaction", filters={"external_key": ["is", "set"]}, pluck="external_key")
+	)
+	for row in rows:
+		if row.airwallex_source_type or row.bank_account in airwallex_accounts:
+			provider = "Airwallex"
+		elif row.bank_account in skript_accounts:
+			provider = "Skript"
+		else:
+			continue
+
+		key = external_key(provider, row.transaction_id)
+		# Existing duplicates stay unkeyed; the unique index only allows one holder
+		if key in taken:
+			continue
+
+		frappe.db.set_value("Bank Transaction", row.name, "external_key", key, update_modified=False)
+		taken.add(key)
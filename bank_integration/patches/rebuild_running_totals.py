@@ -0,0 +1,11 @@
+import frappe
+
+from bank_integration.bank_integration.doctype.bank_running_total.bank_running_total import (
+	rebuild_running_total,
+)
+
+
+def execute():
+	"""Recompute running totals so transactions the bank cancelled are left out"""
+	for row in frappe.get_all("Bank Running Total", fields=["bank_account", "currency"]):
+		rebuild_running_total(row.bank_account, row.currency)
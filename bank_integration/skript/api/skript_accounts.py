@@ -1,15 +1,26 @@
 import frappe
 
+from bank_integration.common.response_cache import ACCOUNTS_TTL
+
 from .skript_base_api import SkriptBase
 
 
 class SkriptAccounts(SkriptBase):
 	"""API wrapper for Skript accounts endpoint"""
 
-	def __init__(self, consumer_id, client_id, client_secret, api_url, api_scope="skript/ob-direct-data"):
-		super().__init__(consumer_id, client_id, client_secret, api_url, api_scope)
-
-	def get_list(self, size=100, ref=None, fields=None, filter=None):
+	def __init__(
+		self,
+		consumer_id,
+		client_id,
+		client_secret,
+		api_url,
+		api_scope="skript/ob-direct-data",
+		correlation_id=None,
+		settings=None,
+	):
+		super().__init__(consumer_id, client_id, client_secret, api_url, api_scope, correlation_id, settings)
+
+	def get_list(self, size=100, ref=None, fields=None, filter=None, use_cache=True):
 		"""
 		Get list of accounts for consumer
 		GET /consumers/{consumerId}/accounts
@@ -19,6 +30,7 @@ class SkriptAccounts(SkriptBase):
 		    ref: Pagination reference from Link header
 		    fields: Comma-separated field names for projection
 		    filter: SQL-like filter expression
+		    use_cache: Serve a response fetched in the last ACCOUNTS_TTL seconds; False always fetches
 
 		Returns:
 		    list or dict: Account data
@@ -33,20 +45,37 @@ class SkriptAccounts(SkriptBase):
 		if filter:
 			params["filter"] = filter
 
-		return self.get(endpoint=endpoint, params=params)
+		return self.get(endpoint=endpoint, params=params, cache_ttl=ACCOUNTS_TTL, use_cache=use_cache)
 
-	def get_by_id(self, account_id):
+	def get_by_id(self, account_id, use_cache=True):
 		"""
 		Get specific account detail
 		GET /consumers/{consumerId}/accounts/{accountId}
 
 		Args:
 		    account_id: Skript account ID
+		    use_cache: Serve a response fetched in the last ACCOUNTS_TTL seconds; False always fetches
 
 		Returns:
 		    dict: Account details
 		"""
 		endpoint = f"consumers/{self.consumer_id}/accounts/{account_id}"
+		return self.get(endpoint=endpoint, cache_ttl=ACCOUNTS_TTL, use_cache=use_cache)
+
+	def get_balance(self, account_id):
+		"""
+		Get current balance of an account
+		GET /consumers/{consumerId}/accounts/{accountId}/balance
+
+		Balances are compared against synced transactions, so they are never cached.
+
+		Args:
+		    account_id: Skript account ID
+
+		Returns:
+		    dict: currentBalance, availableBalance and currency (AUD when absent)
+		"""
+		endpoint = f"consumers/{self.consumer_id}/accounts/{account_id}/balance"
 		return self.get(endpoint=endpoint)
 
 
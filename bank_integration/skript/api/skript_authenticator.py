@@ -1,30 +1,56 @@
+import time
 from datetime import datetime, timedelta
 
 import frappe
 import requests
 
+from bank_integration.common.correlation import log_error
+from bank_integration.common.sync_settings import SETTINGS_DOCTYPE
+from bank_integration.common.token_refresh import single_flight_refresh
+
 from .skript_base_api import SkriptAPIError, SkriptBase
 
 
 class SkriptAuthenticator(SkriptBase):
 	"""OAuth 2.0 authenticator for Skript"""
 
-	def __init__(self, consumer_id, client_id, client_secret, api_url, api_scope="skript/ob-direct-data"):
-		super().__init__(consumer_id, client_id, client_secret, api_url, api_scope)
+	def __init__(
+		self,
+		consumer_id,
+		client_id,
+		client_secret,
+		api_url,
+		api_scope="skript/ob-direct-data",
+		correlation_id=None,
+		settings=None,
+	):
+		super().__init__(consumer_id, client_id, client_secret, api_url, api_scope, correlation_id, settings)
 		self.is_auth_instance = True
 
-	def authenticate(self):
-		"""Authenticate using OAuth 2.0 client credentials"""
-		try:
-			# Check cached token first
-			cached_token = self._get_cached_token_from_db()
-			if cached_token:
-				frappe.logger().info("Using cached Skript token")
-				return {"access_token": cached_token}
+	def authenticate(self, stale_token=None):
+		"""Authenticate using OAuth 2.0 client credentials.
+
+		A cached token equal to `stale_token` (one the API rejected) is not reused.
+		"""
+		# Check cached token first
+		cached_token = self._get_cached_token_from_db()
+		if cached_token and cached_token != stale_token:
+			frappe.logger().info("Using cached Skript token")
+			return {"access_token": cached_token}
 
-			# Get token URL from settings
-			settings = frappe.get_single("Bank Integration Setting")
-			token_url = settings.skript_access_token_url
+		# Concurrent workers share a single token request
+		return {"access_token": self.refresh_token(stale_token)}
+
+	def refresh_token(self, stale_token=None):
+		"""New token for the consumer; one worker requests it while the others wait for it"""
+		return single_flight_refresh(
+			"Skript", self.consumer_id, lambda: self.login().get("access_token"), stale_token
+		)
+
+	def login(self):
+		"""Request a new token and cache it; a cached token stays usable until it is replaced"""
+		try:
+			token_url = self.settings.skript_access_token_url
 
 			if not token_url:
 				raise SkriptAPIError("Token URL not configured", 400)
@@ -41,7 +67,9 @@ class SkriptAuthenticator(SkriptBase):
 
 			frappe.logger().info(f"Requesting new Skript token from {token_url}")
 
+			started = time.perf_counter()
 			response = requests.post(token_url, data=data, headers=headers, timeout=30)
+			duration_ms = int((time.perf_counter() - started) * 1000)
 
 			# LOG THE TOKEN REQUEST
 			try:
@@ -64,11 +92,12 @@ class SkriptAuthenticator(SkriptBase):
 				response=response_data,
 				url=token_url,
 				request_data=masked_data,
+				duration_ms=duration_ms,
 			)
 
 			if response.status_code != 200:
 				error_msg = f"OAuth failed ({response.status_code}): {response.text}"
-				frappe.log_error(error_msg, "Skript Auth Error")
+				log_error(error_msg, "Skript Auth Error", correlation_id=self.correlation_id)
 				raise SkriptAPIError(error_msg, response.status_code)
 
 			token_data = response.json()
@@ -83,116 +112,126 @@ class SkriptAuthenticator(SkriptBase):
 		except SkriptAPIError:
 			raise
 		except Exception as e:
-			frappe.log_error(f"Skript authentication error: {e!s}", "Skript Auth Error")
+			log_error(
+				f"Skript authentication error: {e!s}", "Skript Auth Error", correlation_id=self.correlation_id
+			)
 			raise SkriptAPIError(str(e), 500)
 
-	def _create_token_log(self, status, message, response=None, url=None, request_data=None):
+	def _create_token_log(
+		self, status, message, response=None, url=None, request_data=None, duration_ms=None
+	):
 		"""Create log entry for token requests"""
 		try:
-			settings = frappe.get_single("Bank Integration Setting")
-			if not settings.enable_log:
+			if not self.settings.enable_log:
 				return
 
-			import json
-
 			status_string = "Success" if str(status).startswith("2") else "Error"
 
-			# Format response
-			response_str = ""
-			if response:
-				if isinstance(response, dict | list):
-					# Mask access_token in response for security
-					if isinstance(response, dict) and "access_token" in response:
-						masked_response = response.copy()
-						masked_response["access_token"] = (
-							f"{response['access_token'][:10]}...{response['access_token'][-10:]}"
-						)
-						response_str = json.dumps(masked_response, indent=2, default=str)
-					else:
-						response_str = json.dumps(response, indent=2, default=str)
-				else:
-					response_str = str(response)
-
-			# Format request
-			request_str = ""
-			if request_data:
-				if isinstance(request_data, dict | list):
-					request_str = json.dumps(request_data, indent=2, default=str)
-				else:
-					request_str = str(request_data)
+			# Mask access_token in response for security
+			if isinstance(response, dict) and "access_token" in response:
+				response = {
+					**response,
+					"access_token": f"{response['access_token'][:10]}...{response['access_token'][-10:]}",
+				}
 
 			log = frappe.get_doc(
 				{
 					"doctype": "Bank Integration Log",
 					"status": status_string,
 					"message": f"Skript OAuth Token: {message}",
-					"response_data": response_str,
-					"request_data": request_str,
+					# Payloads are passed as-is; the log encodes them compactly on insert
+					"response_data": response or "",
+					"request_data": request_data or "",
 					"url": url or "",
 					"method": "POST",
 					"status_code": str(status),
+					"provider": "Skript",
+					"client_ref": self.consumer_id,
+					"duration_ms": duration_ms,
+					"correlation_id": self.correlation_id,
 				}
 			)
 			log.insert(ignore_permissions=True)
 
 		except Exception as e:
-			frappe.log_error(f"Token log creation error: {e!s}", "Skript Token Log Error")
+			log_error(
+				f"Token log creation error: {e!s}",
+				"Skript Token Log Error",
+				correlation_id=self.correlation_id,
+			)
+
+	def get_token_expiry(self):
+		"""Expiry of the cached token, or None when no token was cached"""
+		cached = frappe.db.get_value(
+			SETTINGS_DOCTYPE, None, ["skript_access_token", "skript_token_expiry"], as_dict=True
+		)
+		if not cached or not cached.skript_access_token or not cached.skript_token_expiry:
+			return None
+		return frappe.utils.get_datetime(cached.skript_token_expiry)
 
 	def _get_cached_token_from_db(self):
 		"""Get cached token from Bank Integration Setting"""
 		try:
-			settings = frappe.get_single("Bank Integration Setting")
+			# Tokens change mid-job, so they are read fresh rather than from the settings snapshot
+			cached = frappe.db.get_value(
+				SETTINGS_DOCTYPE, None, ["skript_access_token", "skript_token_expiry"], as_dict=True
+			)
 
-			if settings.skript_access_token and settings.skript_token_expiry:
-				token_expiry = frappe.utils.get_datetime(settings.skript_token_expiry)
+			if cached.skript_access_token and cached.skript_token_expiry:
+				token_expiry = frappe.utils.get_datetime(cached.skript_token_expiry)
 				current_time = frappe.utils.now_datetime()
 
 				# 5-minute buffer
 				buffer = timedelta(minutes=5)
 				if token_expiry > (current_time + buffer):
-					return settings.skript_access_token
+					return cached.skript_access_token
 
 			return None
 
 		except Exception as e:
-			frappe.log_error(f"Token cache retrieval error: {e!s}", "Skript Token Cache")
+			log_error(
+				f"Token cache retrieval error: {e!s}",
+				"Skript Token Cache",
+				correlation_id=self.correlation_id,
+			)
 			return None
 
 	def _cache_token_to_db(self, token_data):
 		"""Cache token to Bank Integration Setting"""
 		try:
-			settings = frappe.get_single("Bank Integration Setting")
-
 			# Calculate expiry
 			expires_in = token_data.get("expires_in", 3600)  # Default 1 hour
 			expiry_time = frappe.utils.now_datetime() + timedelta(seconds=expires_in)
 
-			# Update settings
-			settings.db_set("skript_access_token", token_data.get("access_token"))
-			settings.db_set("skript_token_expiry", expiry_time)
+			frappe.db.set_single_value(
+				SETTINGS_DOCTYPE,
+				{"skript_access_token": token_data.get("access_token"), "skript_token_expiry": expiry_time},
+			)
 			frappe.db.commit()
 
 		except Exception as e:
-			frappe.log_error(f"Token cache save error: {e!s}", "Skript Token Cache")
+			log_error(
+				f"Token cache save error: {e!s}", "Skript Token Cache", correlation_id=self.correlation_id
+			)
 
 	def clear_cached_token(self):
 		"""Clear cached token"""
 		try:
-			settings = frappe.get_single("Bank Integration Setting")
-			settings.db_set("skript_access_token", None)
-			settings.db_set("skript_token_expiry", None)
+			frappe.db.set_single_value(
+				SETTINGS_DOCTYPE, {"skript_access_token": None, "skript_token_expiry": None}
+			)
 			frappe.db.commit()
 		except Exception as e:
-			frappe.log_error(f"Token clear error: {e!s}", "Skript Token")
+			log_error(f"Token clear error: {e!s}", "Skript Token", correlation_id=self.correlation_id)
 
-	def get_valid_token(self):
+	def get_valid_token(self, stale_token=None):
 		"""Get valid token (cached or new)"""
-		auth_response = self.authenticate()
+		auth_response = self.authenticate(stale_token)
 		if auth_response and auth_response.get("access_token"):
 			return auth_response.get("access_token")
 		return None
 
 	def get_fresh_token(self):
 		"""Get a fresh token, bypassing cache"""
-		self.clear_cached_token()
-		return self.get_valid_token()
+		# The cached token stays usable by other workers until the new one replaces it
+		return self.get_valid_token(stale_token=self._get_cached_token_from_db())
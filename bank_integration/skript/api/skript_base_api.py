@@ -1,26 +1,54 @@
+import time
 from datetime import datetime, timedelta
 from urllib.parse import urljoin
 
 import frappe
 import requests
 
+from bank_integration.bank_integration.doctype.bank_integration_log.bank_integration_log import (
+	LOG_MESSAGE_LENGTH,
+	message_preview,
+)
+from bank_integration.common.json_stream import JSONItemStream
+from bank_integration.common.response_cache import get_response_cache
+from bank_integration.common.sync_metrics import track
+from bank_integration.common.sync_settings import get_sync_settings
+
+# Bytes read from the socket at a time when a list response is streamed
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class SkriptBase:
 	"""Base API client for Skript"""
 
-	def __init__(self, consumer_id, client_id, client_secret, api_url, api_scope="skript/ob-direct-data"):
+	def __init__(
+		self,
+		consumer_id,
+		client_id,
+		client_secret,
+		api_url,
+		api_scope="skript/ob-direct-data",
+		correlation_id=None,
+		settings=None,
+	):
+		# Settings snapshot of the job; built on first use when the caller has none
+		self.settings = settings or get_sync_settings()
 		self.consumer_id = consumer_id
 		self.client_id = client_id
 		self.client_secret = client_secret
 		self.api_url = api_url
 		self.enable_api_log = True
 		self.skript_api_scope = api_scope
+		# Optional SyncMetrics collector attached by the sync loop
+		self.metrics = None
+		# Sync run correlation id stamped on every log row and error this client writes
+		self.correlation_id = correlation_id
 
 		# Standard headers
 		self.headers = {"Content-Type": "application/json"}
 		self.is_auth_instance = False
 
-	def get_valid_token(self, force_fresh=False):
+	def get_valid_token(self, force_fresh=False, stale_token=None):
 		"""Get a valid bearer token"""
 		from bank_integration.skript.api.skript_authenticator import SkriptAuthenticator
 
@@ -30,34 +58,66 @@ class SkriptBase:
 			client_secret=self.client_secret,
 			api_url=self.api_url,
 			api_scope=self.skript_api_scope,
+			correlation_id=self.correlation_id,
+			settings=self.settings,
 		)
 
 		if force_fresh:
-			auth.clear_cached_token()
+			# The rejected token stays cached until the single-flight refresh replaces it
+			return auth.get_valid_token(stale_token=stale_token or auth._get_cached_token_from_db())
 
 		return auth.get_valid_token()
 
 	def ensure_authenticated_headers(self, force_fresh=False):
 		"""Ensure headers have valid bearer token"""
 		if force_fresh or "Authorization" not in self.headers:
-			token = self.get_valid_token(force_fresh=force_fresh)
+			with track(self.metrics, "token"):
+				token = self.get_valid_token(force_fresh=force_fresh, stale_token=self._bearer_token())
 			if token:
 				self.headers["Authorization"] = f"Bearer {token}"
 			else:
 				raise SkriptAPIError("Authentication failed", 401)
 
-	def get(self, endpoint, params=None, headers=None):
-		"""GET request"""
+	def _bearer_token(self):
+		"""Token this client currently sends, or None"""
+		return (self.headers.get("Authorization") or "").removeprefix("Bearer ") or None
+
+	def get(self, endpoint, params=None, headers=None, stream=False, cache_ttl=None, use_cache=True):
+		"""GET request; with stream=True a list response is returned as a JSONItemStream.
+
+		With cache_ttl the response is cached for that many seconds per consumer, URL and
+		params; use_cache=False skips the cached copy and fetches a fresh one.
+		"""
 		if not self.is_auth_instance:
 			self.ensure_authenticated_headers()
 
+		cache = None
+		if not stream:
+			# Tokens are per client, data per consumer; both identify the credential
+			cache = get_response_cache(
+				"Skript",
+				[self.consumer_id, self.client_id],
+				self._build_url(endpoint),
+				params,
+				cache_ttl,
+				use_cache,
+			)
+			if cache and cache.fresh:
+				if self.metrics:
+					self.metrics.incr("cache_hits")
+				return cache.data
+
 		try:
-			return self._make_request("GET", endpoint, params=params, headers=headers)
+			return self._make_request(
+				"GET", endpoint, params=params, headers=headers, stream=stream, cache=cache
+			)
 		except SkriptAPIError as e:
 			if e.status_code == 401 and not self.is_auth_instance:
 				# Token expired, refresh and retry
 				self.ensure_authenticated_headers(force_fresh=True)
-				return self._make_request("GET", endpoint, params=params, headers=headers)
+				return self._make_request(
+					"GET", endpoint, params=params, headers=headers, stream=stream, cache=cache
+				)
 			raise
 
 	def post(self, endpoint, json=None, params=None, headers=None):
@@ -73,37 +133,67 @@ class SkriptBase:
 				return self._make_request("POST", endpoint, json=json, params=params, headers=headers)
 			raise
 
-	def _make_request(self, method, endpoint, params=None, json=None, headers=None):
+	def _make_request(self, method, endpoint, params=None, json=None, headers=None, stream=False, cache=None):
 		"""Make HTTP request"""
 		url = self._build_url(endpoint)
 		request_headers = {**self.headers, **(headers or {})}
+		if cache and cache.etag:
+			# A stale cached copy is revalidated rather than downloaded again
+			request_headers["If-None-Match"] = cache.etag
 
 		response = None
 
 		try:
-			response = requests.request(
-				method, url, params=params, json=json, headers=request_headers, timeout=30
-			)
-
-			try:
-				response_data = response.json()
-			except ValueError:
-				response_data = response.text
+			started = time.perf_counter()
+			with track(self.metrics, "http"):
+				response = requests.request(
+					method, url, params=params, json=json, headers=request_headers, timeout=30, stream=stream
+				)
+
+			# Error bodies are small; only successful list bodies are streamed
+			if stream and response.status_code < 400:
+				return self._stream_items(response, method, url, params if json is None else json, started)
+
+			duration_ms = int((time.perf_counter() - started) * 1000)
+
+			if cache and cache.etag and response.status_code == 304:
+				if self.metrics:
+					self.metrics.incr("not_modified")
+				with track(self.metrics, "logging"):
+					self.create_connection_log(
+						status="304",
+						message="Not Modified, served from cache",
+						duration_ms=duration_ms,
+						method=method,
+						url=url,
+						payload=params,
+					)
+				return cache.revalidated()
+
+			with track(self.metrics, "json_decode"):
+				try:
+					response_data = response.json()
+				except ValueError:
+					response_data = response.text
 
 			# Log the request
-			self.create_connection_log(
-				status=str(response.status_code),
-				message=str(response.text),
-				response=response_data,
-				method=method,
-				url=url,
-				payload=str(params) if json is None else str(json),
-			)
+			with track(self.metrics, "logging"):
+				self.create_connection_log(
+					status=str(response.status_code),
+					message=message_preview(response.text),
+					duration_ms=duration_ms,
+					response=response_data,
+					method=method,
+					url=url,
+					payload=params if json is None else json,
+				)
 
 			if response.status_code >= 400:
 				error_msg = f"HTTP {response.status_code}: {response.text}"
 				raise SkriptAPIError(error_msg, response.status_code)
 
+			if cache:
+				cache.store(response_data, response.headers.get("ETag"))
 			return response_data
 
 		except SkriptAPIError:
@@ -116,10 +206,35 @@ class SkriptBase:
 				response=error_response,
 				method=method,
 				url=url,
-				payload=str(params) if json is None else str(json),
+				payload=params if json is None else json,
 			)
 			raise SkriptAPIError(str(e), getattr(response, "status_code", 500))
 
+	def _stream_items(self, response, method, url, payload, started):
+		"""Items of a list response, decoded while they are read; logged once fully read"""
+
+		def log_stream(stream, error):
+			response.close()
+			with track(self.metrics, "logging"):
+				self.create_connection_log(
+					status=str(response.status_code),
+					message=f"Stream failed after {stream.count} items: {error}"
+					if error
+					else message_preview(stream.preview),
+					duration_ms=int((time.perf_counter() - started) * 1000),
+					# Only the bounded prefix of the body is kept, never the whole page
+					response={**stream.meta, "items_read": stream.count, "body_prefix": stream.preview},
+					method=method,
+					url=url,
+					payload=payload,
+				)
+
+		return JSONItemStream(
+			response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+			preview_length=LOG_MESSAGE_LENGTH,
+			on_complete=log_stream,
+		)
+
 	def _build_url(self, endpoint):
 		"""Build full URL with consumer_id"""
 		# Replace {consumerId} placeholder
@@ -131,24 +246,32 @@ class SkriptBase:
 
 		return f"{base_url}/{endpoint}"
 
-	def create_connection_log(self, status, message, response=None, method=None, url=None, payload=None):
+	def create_connection_log(
+		self, status, message, response=None, method=None, url=None, payload=None, duration_ms=None
+	):
 		"""Create log entry"""
 		try:
 			if not self.enable_api_log:
 				return
 
-			status_string = "Success" if str(status).startswith("2") else "Error"
+			# 304 answers a conditional request whose cached copy is still current
+			status_string = "Success" if str(status).startswith("2") or str(status) == "304" else "Error"
 
 			log = frappe.get_doc(
 				{
 					"doctype": "Bank Integration Log",
 					"status": status_string,
 					"message": str(message),
-					"response_data": str(response) if response else "",
-					"request_data": str(payload) if payload else "",
+					# Payloads are passed as-is; the log encodes them compactly on insert
+					"response_data": response or "",
+					"request_data": payload or "",
 					"url": url or "",
 					"method": str(method) if method else "",
 					"status_code": str(status),
+					"provider": "Skript",
+					"client_ref": self.consumer_id,
+					"duration_ms": duration_ms,
+					"correlation_id": self.correlation_id,
 				}
 			)
 			log.insert(ignore_permissions=True)
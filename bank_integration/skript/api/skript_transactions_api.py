@@ -1,15 +1,28 @@
 import frappe
 
+from bank_integration.common.response_cache import DETAIL_TTL, LIST_TTL
+
 from .skript_base_api import SkriptBase
 
 
 class SkriptTransactions(SkriptBase):
 	"""API wrapper for Skript transactions endpoint"""
 
-	def __init__(self, consumer_id, client_id, client_secret, api_url, api_scope="skript/ob-direct-data"):
-		super().__init__(consumer_id, client_id, client_secret, api_url, api_scope)
-
-	def get_list_by_account(self, account_id, filter=None, size=100, ref=None, fields=None):
+	def __init__(
+		self,
+		consumer_id,
+		client_id,
+		client_secret,
+		api_url,
+		api_scope="skript/ob-direct-data",
+		correlation_id=None,
+		settings=None,
+	):
+		super().__init__(consumer_id, client_id, client_secret, api_url, api_scope, correlation_id, settings)
+
+	def get_list_by_account(
+		self, account_id, filter=None, size=100, ref=None, fields=None, stream=False, use_cache=True
+	):
 		"""
 		Get transactions for specific account
 		GET /consumers/{consumerId}/accounts/{accountId}/transactions
@@ -20,9 +33,11 @@ class SkriptTransactions(SkriptBase):
 		    size: Page size (default 100, max 1000)
 		    ref: Pagination reference
 		    fields: Comma-separated field names
+		    stream: Decode the page while it is read; streamed pages are never cached
+		    use_cache: Serve a page fetched in the last LIST_TTL seconds; False always fetches
 
 		Returns:
-		    list or dict: Transaction data
+		    list or dict: Transaction data; a JSONItemStream of the transactions with stream=True
 		"""
 		endpoint = f"consumers/{self.consumer_id}/accounts/{account_id}/transactions"
 
@@ -34,9 +49,11 @@ class SkriptTransactions(SkriptBase):
 		if filter:
 			params["filter"] = filter
 
-		return self.get(endpoint=endpoint, params=params)
+		return self.get(
+			endpoint=endpoint, params=params, stream=stream, cache_ttl=LIST_TTL, use_cache=use_cache
+		)
 
-	def get_list_all(self, filter=None, size=100, ref=None, fields=None):
+	def get_list_all(self, filter=None, size=100, ref=None, fields=None, use_cache=True):
 		"""
 		Get all transactions for consumer (includes accountId in response)
 		GET /consumers/{consumerId}/transactions
@@ -46,6 +63,7 @@ class SkriptTransactions(SkriptBase):
 		    size: Page size (default 100, max 1000)
 		    ref: Pagination reference
 		    fields: Comma-separated field names
+		    use_cache: Serve a page fetched in the last LIST_TTL seconds; False always fetches
 
 		Returns:
 		    list or dict: Transaction data with accountId
@@ -60,9 +78,9 @@ class SkriptTransactions(SkriptBase):
 		if filter:
 			params["filter"] = filter
 
-		return self.get(endpoint=endpoint, params=params)
+		return self.get(endpoint=endpoint, params=params, cache_ttl=LIST_TTL, use_cache=use_cache)
 
-	def get_by_id(self, account_id, transaction_id):
+	def get_by_id(self, account_id, transaction_id, use_cache=True):
 		"""
 		Get specific transaction detail
 		GET /consumers/{consumerId}/accounts/{accountId}/transactions/{transactionId}
@@ -70,26 +88,28 @@ class SkriptTransactions(SkriptBase):
 		Args:
 		    account_id: Skript account ID
 		    transaction_id: Transaction ID
+		    use_cache: Serve a response fetched in the last DETAIL_TTL seconds; False always fetches
 
 		Returns:
 		    dict: Transaction details with extended data
 		"""
 		endpoint = f"consumers/{self.consumer_id}/accounts/{account_id}/transactions/{transaction_id}"
-		return self.get(endpoint=endpoint)
+		return self.get(endpoint=endpoint, cache_ttl=DETAIL_TTL, use_cache=use_cache)
 
-	def get_by_id_direct(self, transaction_id):
+	def get_by_id_direct(self, transaction_id, use_cache=True):
 		"""
 		Get specific transaction detail without account
 		GET /consumers/{consumerId}/transactions/{transactionId}
 
 		Args:
 		    transaction_id: Transaction ID
+		    use_cache: Serve a response fetched in the last DETAIL_TTL seconds; False always fetches
 
 		Returns:
 		    dict: Transaction details
 		"""
 		endpoint = f"consumers/{self.consumer_id}/transactions/{transaction_id}"
-		return self.get(endpoint=endpoint)
+		return self.get(endpoint=endpoint, cache_ttl=DETAIL_TTL, use_cache=use_cache)
 
 
 def test_get_transactions():
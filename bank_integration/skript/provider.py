@@ -0,0 +1,127 @@
+from itertools import islice
+
+import frappe
+from frappe.utils import flt
+
+from bank_integration.bank_integration.doctype.bank_integration_setting.bank_integration_setting import (
+	update_skript_sync_progress,
+)
+from bank_integration.common.providers import BankBalance, BankProvider, SyncSource
+from bank_integration.skript.api.skript_accounts import SkriptAccounts
+from bank_integration.skript.api.skript_authenticator import SkriptAuthenticator
+from bank_integration.skript.api.skript_transactions_api import SkriptTransactions
+from bank_integration.skript.skript_utils import format_datetime_for_skript_filter, map_skript_page
+
+
+class SkriptProvider(BankProvider):
+	"""Skript (open banking) accounts of the configured consumer, one source per account"""
+
+	name = "Skript"
+	# Largest page the transactions endpoint serves
+	page_size = 1000
+
+	def is_enabled(self, settings):
+		return settings.enable_skript
+
+	def get_sources(self, settings):
+		return [
+			SyncSource(
+				provider=self.name,
+				scope=account.account_id,
+				# Account ids are only unique within a consumer
+				lease_scope=f"{settings.skript_consumer_id}:{account.account_id}",
+				bank_account=account.bank_account,
+				label=account.display_name or account.account_id,
+				schedule=settings.skript_sync_schedule,
+			)
+			for account in settings.skript_accounts
+		]
+
+	def validate_sources(self, settings, sources):
+		unmapped = [source.label for source in sources if not source.bank_account]
+		if unmapped:
+			error_msg = f"Cannot sync - unmapped accounts: {', '.join(unmapped)}"
+			frappe.logger().error(error_msg)
+			update_skript_sync_progress(0, 0, "Failed")
+			frappe.throw(error_msg)
+
+	def get_client(self, settings, source, correlation_id=None):
+		# The token is cached on the Settings single, so all accounts of the consumer share it
+		return SkriptTransactions(
+			consumer_id=settings.skript_consumer_id,
+			client_id=settings.skript_client_id,
+			client_secret=settings.skript_client_secret,
+			api_url=settings.skript_api_url,
+			api_scope=settings.skript_api_scope,
+			correlation_id=correlation_id,
+			settings=settings,
+		)
+
+	def get_authenticators(self, settings):
+		# One token for the consumer, shared by all of its accounts
+		if not settings.skript_consumer_id or not settings.skript_client_id:
+			return []
+		return [
+			(
+				settings.skript_consumer_id,
+				SkriptAuthenticator(
+					consumer_id=settings.skript_consumer_id,
+					client_id=settings.skript_client_id,
+					client_secret=settings.skript_client_secret,
+					api_url=settings.skript_api_url,
+					api_scope=settings.skript_api_scope,
+					settings=settings,
+				),
+			)
+		]
+
+	def fetch_pages(self, client, source, from_date, to_date):
+		from_date_str = format_datetime_for_skript_filter(from_date)
+		to_date_str = format_datetime_for_skript_filter(to_date)
+		filter_expr = f"postingDateTime BETWEEN {{ts '{from_date_str}'}} AND {{ts '{to_date_str}'}}"
+
+		ref = None
+		while True:
+			# Transactions are decoded while the page is read, so a full page is never in memory
+			stream = client.get_list_by_account(
+				source.scope, filter=filter_expr, size=self.page_size, ref=ref, stream=True
+			)
+			items = iter(stream)
+			while batch := list(islice(items, self.batch_size)):
+				yield batch
+
+			# A short page is the last one; a repeated ref would loop forever
+			next_ref = stream.meta.get("ref")
+			if stream.count < self.page_size or not next_ref or next_ref == ref:
+				return
+			ref = next_ref
+
+	def fetch_balances(self, settings, source, correlation_id=None):
+		api = SkriptAccounts(
+			consumer_id=settings.skript_consumer_id,
+			client_id=settings.skript_client_id,
+			client_secret=settings.skript_client_secret,
+			api_url=settings.skript_api_url,
+			api_scope=settings.skript_api_scope,
+			correlation_id=correlation_id,
+			settings=settings,
+		)
+		response = api.get_balance(source.scope)
+		# Open banking responses may wrap the balance in `data`
+		data = response.get("data", response) if isinstance(response, dict) else {}
+		if data.get("currentBalance") is None:
+			return []
+
+		return [
+			BankBalance(
+				currency=data.get("currency") or "AUD",
+				balance=flt(data.get("currentBalance")),
+				available_balance=flt(data.get("availableBalance")),
+			)
+		]
+
+	def map_page(self, page, bank_account, correlation_id=None):
+		return map_skript_page(page, bank_account, correlation_id)
+
+	def update_settings_progress(self, processed, total, status="In Progress"):
+		update_skript_sync_progress(processed, total, status)
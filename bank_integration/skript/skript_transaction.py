@@ -1,188 +1,26 @@
-import traceback
-from datetime import datetime, timedelta
-
 import frappe
 
-from bank_integration.skript.api.skript_base_api import SkriptAPIError
-from bank_integration.skript.api.skript_transactions_api import SkriptTransactions
-from bank_integration.skript.skript_utils import format_datetime_for_skript_filter, map_skript_to_erpnext
+from bank_integration.common.sync_engine import sync_provider
 
 
-def sync_skript_transactions(setting_name, from_date=None, to_date=None):
-	"""
-	Sync Skript transactions for the configured consumer
+def sync_skript_transactions(
+	setting_name=None,
+	from_date=None,
+	to_date=None,
+	sync_type="Manual",
+	account_ids=None,
+	fresh=False,
+	dry_run=False,
+):
 	"""
-	settings = frappe.get_doc("Bank Integration Setting", setting_name)
-
-	if not settings.enable_skript:
-		frappe.logger().info("Skript integration is not enabled")
-		return
-
-	# Validate account mapping
-	unmapped = []
-	for row in settings.skript_accounts:
-		if not row.bank_account:
-			unmapped.append(row.display_name or row.account_id)
-
-	if unmapped:
-		error_msg = f"Cannot sync - unmapped accounts: {', '.join(unmapped)}"
-		frappe.logger().error(error_msg)
-		settings.update_skript_sync_progress(0, 0, "Failed")
-		frappe.throw(error_msg)
-		return 0, 0
-
-	# Build account mapping dictionary
-	account_map = {}
-	for row in settings.skript_accounts:
-		account_map[row.account_id] = row.bank_account
-
-	try:
-		# Initialize API
-		api = SkriptTransactions(
-			consumer_id=settings.skript_consumer_id,
-			client_id=settings.get_password("skript_client_id"),
-			client_secret=settings.get_password("skript_client_secret"),
-			api_url=settings.skript_api_url,
-			api_scope=settings.skript_api_scope,
-		)
-
-		# Format dates
-		from_date_str = format_datetime_for_skript_filter(from_date)
-		to_date_str = format_datetime_for_skript_filter(to_date)
-		filter_expr = f"postingDateTime BETWEEN {{ts '{from_date_str}'}} AND {{ts '{to_date_str}'}}"
-
-		frappe.logger().info(f"Skript sync starting: {from_date_str} to {to_date_str}")
-
-		# Fetch transactions
-		response = api.get_list_all(filter=filter_expr, size=100)
-
-		if isinstance(response, dict):
-			transactions = response.get("items", response.get("data", []))
-		else:
-			transactions = response if isinstance(response, list) else []
-
-		if not transactions:
-			frappe.logger().info("No Skript transactions found")
-			settings.update_skript_sync_progress(0, 0, "Completed")
-			return 0, 0
-
-		processed = 0
-		created = 0
-		skipped = 0
-		errors = 0
-
-		for txn in transactions:
-			try:
-				transaction_id = txn.get("id")
-				account_id = txn.get("accountId")
-
-				if not account_id:
-					skipped += 1
-					processed += 1
-					continue
-
-				bank_account = account_map.get(account_id)
-
-				if not bank_account:
-					skipped += 1
-					processed += 1
-					continue
-
-				if transaction_exists(transaction_id):
-					skipped += 1
-					processed += 1
-					continue
-
-				bank_txn = map_skript_to_erpnext(txn, bank_account)
-				bank_txn_doc = frappe.get_doc(bank_txn)
-
-				bank_txn_doc.insert()
-				bank_txn_doc.submit()
+	Sync Skript transactions for every mapped account of the configured consumer,
+	or only the given account ids
 
-				created += 1
-				processed += 1
-
-				# Update progress every 10 transactions
-				if processed % 10 == 0:
-					settings.update_skript_sync_progress(processed, len(transactions))
-
-			except Exception as txn_error:
-				errors += 1
-				frappe.log_error(
-					f"Failed to process Skript transaction {txn.get('id', 'unknown')}: {txn_error!s}\n{traceback.format_exc()}",
-					"Skript Transaction Error",
-				)
-				processed += 1
-
-		# Final update
-		final_status = "Completed" if errors == 0 else "Completed with Errors"
-		settings.update_skript_sync_progress(processed, len(transactions), final_status)
-		settings.db_set("skript_last_sync_date", frappe.utils.now())
-
-		frappe.logger().info(
-			f"Skript sync completed: Processed {processed}, Created {created}, "
-			f"Skipped {skipped}, Errors {errors}"
-		)
-
-		return processed, created
-
-	except Exception as e:
-		settings.update_skript_sync_progress(0, 0, "Failed")
-		error_msg = f"Skript sync failed: {e!s}"
-		frappe.log_error(f"{error_msg}\n{traceback.format_exc()}", "Skript Sync Error")
-		frappe.logger().error(error_msg)
-		return 0, 0
-
-
-def sync_scheduled_transactions_skript(setting_name, schedule_type):
-	"""Sync transactions based on schedule type"""
-	try:
-		setting = frappe.get_single("Bank Integration Setting")
-
-		# Check if sync is already in progress
-		if setting.skript_sync_status == "In Progress":
-			frappe.logger().info("Skript sync already in progress")
-			return
-
-		if not setting.enable_skript:
-			frappe.logger().info("Skript integration disabled")
-			return
-
-		# Check if schedule matches
-		if setting.skript_sync_schedule != schedule_type:
-			return
-
-		# Set status
-		setting.db_set("skript_sync_status", "In Progress")
-
-		# Calculate date range
-		end_date = frappe.utils.now_datetime()
-
-		if setting.skript_last_sync_date:
-			start_date = frappe.utils.get_datetime(setting.skript_last_sync_date)
-		else:
-			# Default to last 24 hours if no previous sync
-			start_date = end_date - timedelta(hours=24)
-
-		frappe.logger().info(f"Scheduled Skript {schedule_type} sync: {start_date} to {end_date}")
-
-		# Sync
-		sync_skript_transactions("Bank Integration Setting", start_date, end_date)
-
-		# Update status to completed
-		setting.db_set("skript_sync_status", "Completed")
-
-	except Exception as e:
-		try:
-			setting = frappe.get_single("Bank Integration Setting")
-			setting.db_set("skript_sync_status", "Failed")
-		except Exception:
-			pass
-
-		error_msg = f"Scheduled Skript {schedule_type} sync failed: {e!s}"
-		frappe.log_error(
-			title="Skript Scheduled Sync Error", message=f"{error_msg}\n{traceback.format_exc()}"
-		)
+	With dry_run=True nothing is written; returns the projected counts, API calls and time.
+	"""
+	return sync_provider(
+		"Skript", from_date, to_date, sync_type=sync_type, scopes=account_ids, fresh=fresh, dry_run=dry_run
+	)
 
 
 def transaction_exists(transaction_id):
@@ -2,39 +2,86 @@ from datetime import datetime
 
 import frappe
 
+from bank_integration.common.bank_transactions import MappedTransaction, external_key
+from bank_integration.common.correlation import log_error
 
-def map_skript_to_erpnext(skript_txn, bank_account):
+
+def map_skript_to_erpnext(skript_txn, bank_account, correlation_id=None):
 	"""
 	Map Skript transaction to ERPNext Bank Transaction
 
 	Args:
 	    skript_txn: Transaction dict from Skript API
 	    bank_account: ERPNext Bank Account name
+	    correlation_id: Sync run correlation id for error logs
 
 	Returns:
 	    dict: Bank Transaction document dict
 	"""
-	amount = float(skript_txn.get("amount", 0))
-
-	return {
-		"doctype": "Bank Transaction",
-		"bank_account": bank_account,
-		"transaction_id": skript_txn.get("id"),
-		"date": parse_skript_date(skript_txn.get("postingDateTime")),
-		"deposit": amount if amount > 0 else 0,
-		"withdrawal": abs(amount) if amount < 0 else 0,
-		"currency": skript_txn.get("currency", "AUD"),
-		"description": skript_txn.get("description", ""),
-		"reference_number": skript_txn.get("reference", ""),
-		"transaction_type": skript_txn.get("type", ""),
-		# Note: If you add custom fields to Bank Transaction for Skript metadata,
-		# uncomment and use these:
-		# "skript_account_id": skript_txn.get('accountId'),
-		# "skript_data_holder": skript_txn.get('dataHolderName'),
-	}
-
-
-def parse_skript_date(date_string):
+	return map_skript_page([skript_txn], bank_account, correlation_id)[0].as_doc()
+
+
+def map_skript_page(transactions, bank_account, correlation_id=None):
+	"""
+	Map a page of Skript transactions in one pass
+
+	Args:
+	    transactions: Transaction dicts from Skript API
+	    bank_account: ERPNext Bank Account name
+	    correlation_id: Sync run correlation id for error logs
+
+	Returns:
+	    list[MappedTransaction]: One mapped record per well-formed transaction, in order
+	"""
+	mapped = []
+
+	for skript_txn in transactions:
+		# A malformed record is logged and left out; the rest of the page is still synced
+		try:
+			amount = float(skript_txn.get("amount", 0))
+			transaction_id = skript_txn.get("id")
+
+			mapped.append(
+				MappedTransaction(
+					transaction_id=transaction_id,
+					external_key=external_key("Skript", transaction_id),
+					date=skript_posting_date(skript_txn.get("postingDateTime"), correlation_id),
+					bank_account=bank_account,
+					currency=skript_txn.get("currency", "AUD"),
+					description=skript_txn.get("description", ""),
+					reference_number=skript_txn.get("reference", ""),
+					transaction_type=skript_txn.get("type", ""),
+					deposit=amount if amount > 0 else 0,
+					withdrawal=abs(amount) if amount < 0 else 0,
+					# Note: If you add custom fields to Bank Transaction for Skript metadata,
+					# pass them here, e.g. extra={"skript_account_id": skript_txn.get("accountId")}
+				)
+			)
+		except Exception as e:
+			transaction_id = skript_txn.get("id", "unknown") if isinstance(skript_txn, dict) else "unknown"
+			log_error(
+				f"Failed to map Skript transaction {transaction_id}: {str(e)[:300]}",
+				"Skript Mapping Error",
+				correlation_id=correlation_id,
+			)
+
+	return mapped
+
+
+def skript_posting_date(date_string, correlation_id=None):
+	"""
+	Posting date as YYYY-MM-DD
+
+	Bank Transaction.date is a Date, and the local date is the first ten characters
+	of Skript's ISO8601 timestamp, so well-formed values skip datetime parsing.
+	"""
+	if date_string and len(date_string) >= 10 and date_string[4] == "-" and date_string[7] == "-":
+		return date_string[:10]
+
+	return parse_skript_date(date_string, correlation_id=correlation_id)
+
+
+def parse_skript_date(date_string, correlation_id=None):
 	"""
 	Parse Skript date to ERPNext datetime (timezone-naive)
 	Preserves the local date/time from the original timezone
@@ -53,7 +100,9 @@ def parse_skript_date(date_string):
 		return naive_dt
 
 	except Exception as e:
-		frappe.log_error(title="Skript Date Parse", message=f"Date parse error for '{date_string}': {e}")
+		log_error(
+			f"Date parse error for '{date_string}': {e}", "Skript Date Parse", correlation_id=correlation_id
+		)
 		return frappe.utils.now()
 
 
@@ -0,0 +1,168 @@
+import os
+from itertools import islice
+
+import frappe
+
+from bank_integration.airwallex.utils import get_bank_account_currency
+from bank_integration.bank_integration.doctype.bank_sync_run.bank_sync_run import start_run
+from bank_integration.common.bank_transactions import MappedTransaction, TransactionWriter, external_key
+from bank_integration.common.correlation import log_error, new_correlation_id
+from bank_integration.common.providers import get_provider
+from bank_integration.common.sync_lease import SyncLease
+from bank_integration.common.sync_metrics import SyncMetrics, is_profiling_enabled, track
+from bank_integration.common.sync_settings import get_sync_settings
+from bank_integration.statement.parsers import (
+	parse_airwallex_csv,
+	parse_camt053,
+	parse_generic_csv,
+	parse_ofx,
+	parse_skript_csv,
+)
+
+# Rows mapped, deduplicated and committed together
+CHUNK_ROWS = 500
+
+
+def map_statement_page(rows, bank_account, correlation_id=None):
+	"""
+	Map a chunk of normalized statement rows (generic CSV, OFX, CAMT.053)
+
+	Args:
+	    rows: Row dicts from the statement parsers
+	    bank_account: ERPNext Bank Account the statement belongs to
+	    correlation_id: Import run correlation id for error logs
+
+	Returns:
+	    list[MappedTransaction]: One mapped record per row, in order
+	"""
+	account_currency = get_bank_account_currency(bank_account, correlation_id)
+	mapped = []
+
+	for row in rows:
+		amount = row["amount"]
+		transaction_id = row["id"]
+
+		mapped.append(
+			MappedTransaction(
+				transaction_id=transaction_id,
+				# Bank statement ids are only unique within one account
+				external_key=external_key("Statement", f"{bank_account}:{transaction_id}"),
+				date=row["date"],
+				status="Pending" if row.get("pending") else "Unreconciled",
+				bank_account=bank_account,
+				currency=row["currency"] or account_currency,
+				description=row["description"],
+				reference_number=row["reference"],
+				transaction_type=row["type"],
+				deposit=amount if amount > 0 else 0,
+				withdrawal=abs(amount) if amount < 0 else 0,
+			)
+		)
+
+	return mapped
+
+
+# Statement Format -> (provider, parser). Provider exports keep their provider, and
+# are mapped and filtered by it, so rows dedupe against transactions already synced
+# through the API.
+STATEMENT_FORMATS = {
+	"Generic CSV": ("Statement", parse_generic_csv),
+	"OFX": ("Statement", parse_ofx),
+	"CAMT.053": ("Statement", parse_camt053),
+	"Airwallex CSV": ("Airwallex", parse_airwallex_csv),
+	"Skript CSV": ("Skript", parse_skript_csv),
+}
+
+
+def run_statement_import(setting_name, file_url, statement_format, bank_account, user=None):
+	"""Stream an uploaded statement into Bank Transactions, one chunk per commit"""
+	settings = get_sync_settings()
+	provider, parser = STATEMENT_FORMATS[statement_format]
+	mapper = map_statement_page if provider == "Statement" else get_provider(provider).map_page
+
+	# One import per bank account at a time; API syncs of the same source use their own lease
+	lease = SyncLease("Statement", bank_account)
+	if not lease.acquire():
+		frappe.logger().info(f"Statement import for {bank_account} already running, skipping")
+		return
+
+	correlation_id = new_correlation_id()
+	file_doc = frappe.get_doc("File", {"file_url": file_url})
+
+	try:
+		run = start_run(
+			"Statement",
+			source=file_doc.file_name,
+			bank_account=bank_account,
+			sync_type="Statement Import",
+			correlation_id=correlation_id,
+		)
+		metrics = SyncMetrics(
+			f"Statement import {file_doc.file_name}", profile=is_profiling_enabled(settings)
+		)
+
+		writer = TransactionWriter(
+			provider,
+			metrics=metrics,
+			correlation_id=correlation_id,
+			should_insert=_insert_filter(provider, settings, bank_account, correlation_id),
+			error_title="Statement Import Error",
+		)
+
+		try:
+			import_file(file_doc.get_full_path(), parser, mapper, bank_account, writer, run=run, lease=lease)
+			writer.record_metrics()
+			run.finish(writer.status, metrics=metrics, **writer.counts())
+		except Exception as e:
+			log_error(
+				f"Statement import of {file_doc.file_name} failed: {e}\n{frappe.get_traceback()}",
+				"Statement Import Error",
+				correlation_id=correlation_id,
+			)
+			run.finish("Failed", metrics=metrics, error_message=e, **writer.counts())
+
+		frappe.logger().info(f"[{correlation_id}] Statement {file_doc.file_name}: {writer.summary()}")
+		frappe.publish_realtime(
+			"statement_import_complete",
+			{"run": run.name, "status": run.status, **writer.counts()},
+			user=user,
+		)
+
+	finally:
+		lease.release()
+
+
+def import_file(path, parser, mapper, bank_account, writer, run=None, lease=None):
+	"""Feed the parsed rows of one file through the writer in fixed-size chunks"""
+	size = os.path.getsize(path) or 1
+
+	with open(path, "rb") as fileobj:
+		rows = parser(fileobj)
+		while chunk := list(islice(rows, CHUNK_ROWS)):
+			with track(writer.metrics, "mapping"):
+				records = mapper(chunk, bank_account, writer.correlation_id)
+			writer.write_page(records)
+
+			if lease:
+				lease.heartbeat()
+			if run:
+				# Row count is unknown up front; estimate it from how far into the file we are
+				position = max(fileobj.tell(), 1)
+				with track(writer.metrics, "progress"):
+					run.update_progress(
+						writer.processed, max(writer.processed * size // position, writer.processed)
+					)
+			else:
+				frappe.db.commit()
+
+	if run:
+		run.update_progress(writer.processed, writer.processed)
+
+
+def _insert_filter(provider, settings, bank_account, correlation_id=None):
+	"""New-row filter matching the one the provider's API sync applies"""
+	if provider == "Statement":
+		account_currency = get_bank_account_currency(bank_account, correlation_id)
+		return lambda record: not account_currency or record.currency == account_currency
+
+	return get_provider(provider).get_insert_filter(settings)
@@ -0,0 +1,364 @@
+import csv
+import hashlib
+import html
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from frappe.utils import flt, get_user_date_format, getdate
+
+# Every parser is a generator over an open binary file, so memory stays flat no matter
+# how large the export is. Generic formats yield rows in one normalized shape; the
+# provider-native CSV parsers yield API-shaped dicts for the provider page mappers.
+
+CHUNK_SIZE = 64 * 1024
+
+# Normalized header -> statement field, for bank CSV exports
+CSV_COLUMNS = {
+	"id": ("id", "transaction id", "fitid", "bank reference", "unique id"),
+	"date": ("date", "transaction date", "posting date", "posted date", "booking date", "value date"),
+	"amount": ("amount", "transaction amount", "value", "net"),
+	"debit": ("debit", "debit amount", "withdrawal", "withdrawals", "money out", "paid out"),
+	"credit": ("credit", "credit amount", "deposit", "deposits", "money in", "paid in"),
+	"currency": ("currency", "ccy", "currency code"),
+	"description": (
+		"description",
+		"narrative",
+		"details",
+		"transaction details",
+		"memo",
+		"payee",
+		"particulars",
+	),
+	"reference": ("reference", "ref", "reference number", "cheque number", "check number"),
+	"type": ("type", "transaction type"),
+}
+
+# Airwallex "Financial transactions" export -> GET /financial_transactions fields
+AIRWALLEX_CSV_COLUMNS = {
+	"id": ("id", "transaction id", "financial transaction id"),
+	"created_at": ("created at", "created", "time", "date"),
+	"net": ("net", "net amount"),
+	"amount": ("amount", "gross amount"),
+	"fee": ("fee", "fees"),
+	"currency": ("currency",),
+	"status": ("status",),
+	"transaction_type": ("transaction type", "type"),
+	"source_type": ("source type",),
+	"source_id": ("source id",),
+	"batch_id": ("batch id",),
+	"description": ("description",),
+}
+
+# Skript data holder export -> Skript transactions API fields
+SKRIPT_CSV_COLUMNS = {
+	"id": ("id", "transaction id"),
+	"postingDateTime": ("posting date time", "posting date", "date"),
+	"amount": ("amount",),
+	"currency": ("currency",),
+	"description": ("description",),
+	"reference": ("reference",),
+	"type": ("type", "transaction type"),
+}
+
+_HEADER_NOISE = re.compile(r"[^a-z0-9]+")
+_CAMEL_CASE = re.compile(r"(?<=[a-z])(?=[A-Z])")
+_AMOUNT_NOISE = re.compile(r"[^0-9.\-]")
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+_OFX_TAG = re.compile(r"<([A-Z0-9.]+)>([^<\r\n]*)")
+_OFX_CURRENCY = re.compile(r"<CURDEF>\s*([A-Z]{3})")
+_OFX_OPEN = "<STMTTRN>"
+_OFX_CLOSE = "</STMTTRN>"
+
+
+def parse_generic_csv(fileobj):
+	"""Bank CSV export with a header row; single signed amount or debit/credit columns"""
+	day_first = _is_day_first()
+	occurrences = _Occurrences()
+
+	for values in _iter_csv(fileobj, CSV_COLUMNS):
+		date = values.get("date")
+		if not date:
+			continue
+
+		if values.get("amount"):
+			amount = parse_amount(values["amount"])
+		else:
+			amount = parse_amount(values.get("credit")) - abs(parse_amount(values.get("debit")))
+
+		row = {
+			"date": str(getdate(date, parse_day_first=day_first)),
+			"amount": amount,
+			"currency": (values.get("currency") or "").upper(),
+			"description": values.get("description", ""),
+			"reference": values.get("reference", ""),
+			"type": values.get("type", ""),
+		}
+		row["id"] = values.get("id") or occurrences.row_id(row)
+		yield row
+
+
+def parse_ofx(fileobj):
+	"""OFX 1.x (SGML) and 2.x (XML) statements, scanned for STMTTRN blocks chunk by chunk"""
+	occurrences = _Occurrences()
+	currency = ""
+	buffer = ""
+
+	for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+		buffer += chunk.decode("utf-8", errors="replace")
+
+		while True:
+			start = buffer.find(_OFX_OPEN)
+			# CURDEF precedes the transaction list of each statement
+			currencies = _OFX_CURRENCY.findall(buffer, 0, start if start != -1 else len(buffer))
+			if currencies:
+				currency = currencies[-1]
+
+			if start == -1:
+				# Keep enough of the tail for a tag split across chunks
+				buffer = buffer[-32:]
+				break
+
+			end = buffer.find(_OFX_CLOSE, start)
+			if end == -1:
+				buffer = buffer[start:]
+				break
+
+			row = _ofx_row(buffer[start + len(_OFX_OPEN) : end], currency, occurrences)
+			if row:
+				yield row
+			buffer = buffer[end + len(_OFX_CLOSE) :]
+
+
+def parse_camt053(fileobj):
+	"""ISO 20022 camt.053 statements; each Ntry is dropped from the tree once read"""
+	occurrences = _Occurrences()
+	stack = []
+
+	for event, elem in ET.iterparse(fileobj, events=("start", "end")):
+		if event == "start":
+			stack.append(elem)
+			continue
+
+		stack.pop()
+		if _local_name(elem.tag) != "Ntry":
+			continue
+
+		row = _camt_row(elem, occurrences)
+		if row:
+			yield row
+		if stack:
+			stack[-1].remove(elem)
+		elem.clear()
+
+
+def parse_airwallex_csv(fileobj):
+	"""Airwallex financial transactions export, shaped like the API payload"""
+	for values in _iter_csv(fileobj, AIRWALLEX_CSV_COLUMNS):
+		if not values.get("id"):
+			continue
+
+		net = values.get("net")
+		if net:
+			net = parse_amount(net)
+		else:
+			net = parse_amount(values.get("amount")) - parse_amount(values.get("fee"))
+
+		yield {
+			"id": values["id"],
+			"created_at": _iso_date(values.get("created_at")),
+			"net": net,
+			"currency": (values.get("currency") or "").upper(),
+			"status": (values.get("status") or "SETTLED").upper(),
+			"transaction_type": (values.get("transaction_type") or "").upper(),
+			"source_type": values.get("source_type", ""),
+			"source_id": values.get("source_id", ""),
+			"batch_id": values.get("batch_id", ""),
+			"description": values.get("description", ""),
+		}
+
+
+def parse_skript_csv(fileobj):
+	"""Skript data holder export, shaped like the transactions API payload"""
+	for values in _iter_csv(fileobj, SKRIPT_CSV_COLUMNS):
+		if not values.get("id"):
+			continue
+
+		yield {
+			"id": values["id"],
+			"postingDateTime": _iso_date(values.get("postingDateTime")),
+			"amount": parse_amount(values.get("amount")),
+			"currency": (values.get("currency") or "AUD").upper(),
+			"description": values.get("description", ""),
+			"reference": values.get("reference", ""),
+			"type": values.get("type", ""),
+		}
+
+
+def parse_amount(value):
+	"""Amount from bank formatting: thousands separators, symbols, (negatives), CR/DR suffixes"""
+	if value is None:
+		return 0.0
+	if isinstance(value, int | float):
+		return float(value)
+
+	value = value.strip().upper()
+	if not value:
+		return 0.0
+
+	negative = (value.startswith("(") and value.endswith(")")) or value.endswith("DR")
+	value = _AMOUNT_NOISE.sub("", value)
+	amount = flt(value)
+	return -abs(amount) if negative else amount
+
+
+def _iter_csv(fileobj, columns):
+	"""Rows of a CSV export as {field: value}, with header synonyms resolved once"""
+	lines = (line.decode("utf-8-sig", errors="replace") for line in fileobj)
+	reader = csv.reader(lines)
+	header = next(reader, None)
+	if not header:
+		return
+
+	synonyms = {synonym: field for field, names in columns.items() for synonym in names}
+	positions = {}
+	for position, name in enumerate(header):
+		field = synonyms.get(_normalize_header(name))
+		if field and field not in positions:
+			positions[field] = position
+
+	for values in reader:
+		if not any(values):
+			continue
+		yield {
+			field: values[position].strip() for field, position in positions.items() if position < len(values)
+		}
+
+
+def _ofx_row(block, currency, occurrences):
+	values = {tag: html.unescape(value.strip()) for tag, value in _OFX_TAG.findall(block)}
+	posted = values.get("DTPOSTED", "")
+	if len(posted) < 8:
+		return None
+
+	row = {
+		"date": f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}",
+		"amount": parse_amount(values.get("TRNAMT")),
+		"currency": values.get("CURRENCY") or currency,
+		"description": " ".join(filter(None, (values.get("NAME"), values.get("MEMO")))),
+		"reference": values.get("CHECKNUM") or values.get("REFNUM", ""),
+		"type": values.get("TRNTYPE", ""),
+	}
+	row["id"] = values.get("FITID") or occurrences.row_id(row)
+	return row
+
+
+def _camt_row(entry, occurrences):
+	amount = _child(entry, "Amt")
+	booked = _text(entry, "BookgDt", "Dt") or _text(entry, "BookgDt", "DtTm") or _text(entry, "ValDt", "Dt")
+	if amount is None or len(booked) < 10:
+		return None
+
+	value = abs(flt(amount.text))
+	status = _text(entry, "Sts") or _text(entry, "Sts", "Cd")
+	reference = _descendant_text(entry, "EndToEndId")
+	if reference == "NOTPROVIDED":
+		reference = ""
+
+	row = {
+		"date": booked[:10],
+		"amount": -value if _text(entry, "CdtDbtInd") == "DBIT" else value,
+		"currency": amount.get("Ccy", ""),
+		"description": _descendant_text(entry, "Ustrd")
+		or _text(entry, "AddtlNtryInf")
+		or _descendant_text(entry, "Nm"),
+		"reference": reference or _text(entry, "NtryRef"),
+		"type": _text(entry, "BkTxCd", "Prtry", "Cd") or _text(entry, "BkTxCd", "Domn", "Cd"),
+		"pending": status == "PDNG",
+	}
+	row["id"] = (
+		_text(entry, "AcctSvcrRef") or _descendant_text(entry, "AcctSvcrRef") or occurrences.row_id(row)
+	)
+	return row
+
+
+class _Occurrences:
+	"""Stable ids for rows the bank exports without one.
+
+	Identical rows on the same day are told apart by their position among each
+	other, so re-importing an overlapping export yields the same ids. Counters are
+	kept per date for the OPEN_DATES dates seen most recently, so memory stays flat
+	for exports sorted either way and for dates interleaved within that window.
+	A date that comes back after more dates than that were seen in between starts
+	counting again, and its repeated rows get ids already taken.
+	"""
+
+	OPEN_DATES = 31
+
+	def __init__(self):
+		# date -> {fingerprint: count}, least recently seen date first
+		self.counts = OrderedDict()
+
+	def row_id(self, row):
+		fingerprint = hashlib.blake2b(
+			"|".join(
+				str(row[field]) for field in ("date", "amount", "currency", "description", "reference")
+			).encode(),
+			digest_size=8,
+		).hexdigest()
+
+		counts = self.counts.get(row["date"])
+		if counts is None:
+			counts = self.counts[row["date"]] = {}
+			if len(self.counts) > self.OPEN_DATES:
+				self.counts.popitem(last=False)
+		else:
+			self.counts.move_to_end(row["date"])
+
+		counts[fingerprint] = counts.get(fingerprint, 0) + 1
+		return f"{fingerprint}-{counts[fingerprint]}"
+
+
+def _iso_date(value):
+	"""Provider exports carry ISO8601 timestamps; anything else is parsed as a user-format date"""
+	value = (value or "").strip()
+	if not value or _ISO_DATE.match(value):
+		return value.replace(" ", "T", 1)
+	return str(getdate(value, parse_day_first=_is_day_first()))
+
+
+def _normalize_header(name):
+	"""'Posting Date', 'posting_date' and 'postingDate' all become 'posting date'"""
+	return _HEADER_NOISE.sub(" ", _CAMEL_CASE.sub(" ", name).lower()).strip()
+
+
+def _local_name(tag):
+	return tag.rpartition("}")[2]
+
+
+def _child(elem, name):
+	for child in elem:
+		if _local_name(child.tag) == name:
+			return child
+	return None
+
+
+def _text(elem, *path):
+	"""Text at a path of direct children, matched by local name"""
+	for name in path:
+		elem = _child(elem, name)
+		if elem is None:
+			return ""
+	return (elem.text or "").strip()
+
+
+def _descendant_text(elem, name):
+	for descendant in elem.iter():
+		if _local_name(descendant.tag) == name and descendant.text and descendant.text.strip():
+			return descendant.text.strip()
+	return ""
+
+
+def _is_day_first():
+	return get_user_date_format().lower().startswith("dd")
@@ -0,0 +1,84 @@
+# Copyright (c) 2026, Akhilam Inc and Contributors
+# See license.txt
+
+import unittest
+from datetime import date
+
+from bank_integration.common.auto_match import (
+	DEPOSIT,
+	WITHDRAWAL,
+	Voucher,
+	VoucherIndex,
+	amount_key,
+	normalize_reference,
+)
+from bank_integration.common.bank_transactions import MappedTransaction
+
+DAY = date(2026, 3, 10)
+
+
+def transaction(deposit=0, withdrawal=0, day=DAY):
+	return MappedTransaction(deposit=deposit, withdrawal=withdrawal, date=day)
+
+
+def voucher(name, amount, direction=DEPOSIT, day=DAY, references=()):
+	return Voucher("Payment Entry", name, direction, amount, day, references)
+
+
+class TestVoucherIndex(unittest.TestCase):
+	def test_reference_match(self):
+		index = VoucherIndex([voucher("ACC-PAY-1", 100, references=("inv-7",))], date_window=3)
+
+		self.assertEqual(index.match(transaction(deposit=100), [" INV-7 "]).name, "ACC-PAY-1")
+		# The voucher name counts as a reference
+		self.assertEqual(index.match(transaction(deposit=100), ["acc-pay-1"]).name, "ACC-PAY-1")
+		self.assertIsNone(index.match(transaction(deposit=100), ["INV-8"]))
+
+	def test_reference_match_checks_direction_amount_and_date(self):
+		index = VoucherIndex([voucher("PE-1", 100, references=("R1",))], date_window=3)
+
+		self.assertIsNone(index.match(transaction(withdrawal=100), ["R1"]))
+		self.assertIsNone(index.match(transaction(deposit=99), ["R1"]))
+		self.assertIsNone(index.match(transaction(deposit=100, day=date(2026, 3, 14)), ["R1"]))
+		self.assertIsNotNone(index.match(transaction(deposit=100, day=date(2026, 3, 13)), ["R1"]))
+
+	def test_reference_match_within_tolerance(self):
+		index = VoucherIndex([voucher("PE-1", 100, references=("R1",))], amount_tolerance=1.5)
+		self.assertIsNotNone(index.match(transaction(deposit=98.5), ["R1"]))
+		self.assertIsNone(index.match(transaction(deposit=98.49), ["R1"]))
+
+	def test_amount_match_needs_the_setting(self):
+		index = VoucherIndex([voucher("PE-1", 25.1)])
+		self.assertIsNone(index.match(transaction(deposit=25.1), []))
+		self.assertEqual(index.match(transaction(deposit=25.1), [], on_amount=True).name, "PE-1")
+
+	def test_amount_match_must_be_unambiguous(self):
+		index = VoucherIndex([voucher("PE-1", 40), voucher("PE-2", 40)])
+		self.assertIsNone(index.match(transaction(deposit=40), [], on_amount=True))
+
+		# A voucher already used in the batch no longer competes
+		index.used.add(("Payment Entry", "PE-1"))
+		self.assertEqual(index.match(transaction(deposit=40), [], on_amount=True).name, "PE-2")
+
+	def test_amount_match_within_tolerance(self):
+		vouchers = [voucher("PE-1", 100), voucher("PE-2", 100.5), voucher("PE-3", 100, WITHDRAWAL)]
+
+		exact = VoucherIndex(vouchers)
+		self.assertIsNone(exact.match(transaction(deposit=99.98), [], on_amount=True))
+
+		close = VoucherIndex(vouchers, amount_tolerance=0.05)
+		self.assertEqual(close.match(transaction(deposit=99.98), [], on_amount=True).name, "PE-1")
+		self.assertEqual(close.match(transaction(withdrawal=100.03), [], on_amount=True).name, "PE-3")
+
+		# Both deposits are within a wide tolerance, so neither is trusted
+		wide = VoucherIndex(vouchers, amount_tolerance=1)
+		self.assertIsNone(wide.match(transaction(deposit=100.2), [], on_amount=True))
+
+
+class TestKeys(unittest.TestCase):
+	def test_amount_key_ignores_float_representation(self):
+		self.assertEqual(amount_key(0.1 + 0.2), amount_key(0.3))
+		self.assertEqual(amount_key("12.50"), 1250)
+
+	def test_normalize_reference(self):
+		self.assertEqual(normalize_reference("  ab-1 "), "AB-1")
@@ -0,0 +1,79 @@
+# Copyright (c) 2026, Akhilam Inc and Contributors
+# See license.txt
+
+import json
+import random
+import unittest
+
+from bank_integration.common.json_stream import JSONItemStream
+
+BODY = {
+	"has_more": True,
+	"items": [
+		{"id": "a", "amount": 1.5e-3, "net": -12, "description": "café"},
+		3.25,
+		-7,
+		1e10,
+		12345678901234567890,
+		True,
+		None,
+		"plain",
+		[1, [2.5, {"x": -0.0}]],
+	],
+	"ref": "next",
+}
+
+
+def split(body, cuts):
+	return [body[start:end] for start, end in zip([0, *cuts], [*cuts, len(body)], strict=True)]
+
+
+class TestJSONItemStream(unittest.TestCase):
+	def test_number_split_across_chunks(self):
+		self.assertEqual(list(JSONItemStream([b"[1,2", b"3, 4.", b"5]"])), [1, 23, 4.5])
+		self.assertEqual(list(JSONItemStream([b"[1e", b"3, -", b"2.5E", b"-2]"])), [1000.0, -0.025])
+		self.assertEqual(list(JSONItemStream([b'{"items": [10', b"0]}"])), [100])
+
+	def test_every_single_cut(self):
+		body = json.dumps(BODY, ensure_ascii=False).encode()
+		for cut in range(1, len(body)):
+			stream = JSONItemStream(split(body, [cut]))
+			self.assertEqual(list(stream), BODY["items"], f"cut at {cut}")
+			self.assertEqual(stream.meta, {"has_more": True, "ref": "next"})
+
+	def test_random_chunking(self):
+		body = json.dumps(BODY, ensure_ascii=False).encode()
+		rng = random.Random(42)
+		for _ in range(2000):
+			cuts = sorted(rng.sample(range(1, len(body)), rng.randint(1, 20)))
+			stream = JSONItemStream(split(body, cuts))
+			self.assertEqual(list(stream), BODY["items"], f"cuts at {cuts}")
+			self.assertEqual(stream.count, len(BODY["items"]))
+
+	def test_one_byte_chunks(self):
+		body = json.dumps(BODY, ensure_ascii=False).encode()
+		stream = JSONItemStream([body[i : i + 1] for i in range(len(body))])
+		self.assertEqual(list(stream), BODY["items"])
+
+	def test_data_key_fallback(self):
+		stream = JSONItemStream([b'{"data": [{"id": 1}, {"id": 2}], "ref": null}'])
+		self.assertEqual(list(stream), [{"id": 1}, {"id": 2}])
+		self.assertEqual(stream.meta, {"ref": None})
+
+	def test_bare_array_and_meta_after_items(self):
+		self.assertEqual(list(JSONItemStream([b" [ ] "])), [])
+		stream = JSONItemStream([b'{"items": [1], "has_more": false}'])
+		self.assertEqual(list(stream), [1])
+		self.assertFalse(stream.meta["has_more"])
+
+	def test_truncated_body_raises(self):
+		with self.assertRaises(ValueError):
+			list(JSONItemStream([b'{"items": [1, 2']))
+		with self.assertRaises(ValueError):
+			list(JSONItemStream([b'{"items": [1, 2.']))
+
+	def test_on_complete_receives_error(self):
+		calls = []
+		with self.assertRaises(ValueError):
+			list(JSONItemStream([b"[1, oops]"], on_complete=lambda stream, error: calls.append(error)))
+		self.assertIsInstance(calls[0], ValueError)
@@ -0,0 +1,170 @@
+# Copyright (c) 2026, Akhilam Inc and Contributors
+# See license.txt
+
+import io
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from bank_integration.statement import parsers
+from bank_integration.statement.parsers import (
+	_Occurrences,
+	parse_airwallex_csv,
+	parse_amount,
+	parse_camt053,
+	parse_generic_csv,
+	parse_ofx,
+	parse_skript_csv,
+)
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>AUD
+<BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260105120000<TRNAMT>-42.50<FITID>F1<NAME>Coffee &amp; Co<MEMO>Card</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260106<TRNAMT>1,000.00<NAME>Salary</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260106<TRNAMT>1,000.00<NAME>Salary</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+CAMT = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt><Stmt>
+<Ntry><Amt Ccy="EUR">12.30</Amt><CdtDbtInd>DBIT</CdtDbtInd><Sts>BOOK</Sts>
+<BookgDt><Dt>2026-02-01</Dt></BookgDt><AcctSvcrRef>REF-1</AcctSvcrRef>
+<NtryDtls><TxDtls><Refs><EndToEndId>E2E-1</EndToEndId></Refs>
+<RmtInf><Ustrd>Invoice 7</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+<Ntry><Amt Ccy="EUR">5</Amt><CdtDbtInd>CRDT</CdtDbtInd><Sts>PDNG</Sts>
+<BookgDt><DtTm>2026-02-02T10:00:00</DtTm></BookgDt><AddtlNtryInf>Refund</AddtlNtryInf>
+<NtryDtls><TxDtls><Refs><EndToEndId>NOTPROVIDED</EndToEndId></Refs></TxDtls></NtryDtls></Ntry>
+<Ntry><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><Dt>2026-02-03</Dt></BookgDt></Ntry>
+</Stmt></BkToCstmrStmt></Document>
+"""
+
+
+def as_file(text):
+	return io.BytesIO(text.encode())
+
+
+def statement_row(day, amount=10):
+	return {"date": day, "amount": amount, "currency": "AUD", "description": "Fee", "reference": ""}
+
+
+class TestParseAmount(unittest.TestCase):
+	def test_bank_formatting(self):
+		self.assertEqual(parse_amount("$1,234.50"), 1234.5)
+		self.assertEqual(parse_amount("(12.00)"), -12)
+		self.assertEqual(parse_amount("15.00 DR"), -15)
+		self.assertEqual(parse_amount("15.00 CR"), 15)
+		self.assertEqual(parse_amount("-3"), -3)
+
+	def test_empty_values(self):
+		self.assertEqual(parse_amount(None), 0)
+		self.assertEqual(parse_amount("  "), 0)
+		self.assertEqual(parse_amount(7), 7)
+
+
+class TestGenericCSV(unittest.TestCase):
+	@patch.object(parsers, "_is_day_first", return_value=True)
+	def test_signed_and_split_amount_columns(self, _is_day_first):
+		signed = list(
+			parse_generic_csv(
+				as_file("Transaction Date,Amount,Narrative,FITID\n05/01/2026,-9.99,Netflix,A1\n")
+			)
+		)
+		self.assertEqual(signed[0]["date"], "2026-01-05")
+		self.assertEqual(signed[0]["amount"], -9.99)
+		self.assertEqual(signed[0]["id"], "A1")
+
+		split = list(
+			parse_generic_csv(as_file("Date,Money Out,Money In\n05/01/2026,20.00,\n06/01/2026,,35.00\n"))
+		)
+		self.assertEqual([row["amount"] for row in split], [-20, 35])
+
+	@patch.object(parsers, "_is_day_first", return_value=False)
+	def test_rows_without_date_are_skipped(self, _is_day_first):
+		rows = list(parse_generic_csv(as_file("Date,Amount\n,5\n\n2026-01-05,5\n")))
+		self.assertEqual(len(rows), 1)
+
+	@patch.object(parsers, "_is_day_first", return_value=False)
+	def test_identical_rows_get_distinct_stable_ids(self, _is_day_first):
+		export = "Date,Amount,Description\n2026-01-05,5,Fee\n2026-01-05,5,Fee\n"
+		first = [row["id"] for row in parse_generic_csv(as_file(export))]
+		again = [row["id"] for row in parse_generic_csv(as_file(export))]
+		self.assertEqual(len(set(first)), 2)
+		self.assertEqual(first, again)
+
+
+class TestOFX(unittest.TestCase):
+	def test_transactions(self):
+		rows = list(parse_ofx(as_file(OFX)))
+		self.assertEqual(len(rows), 3)
+		self.assertEqual(rows[0]["date"], "2026-01-05")
+		self.assertEqual(rows[0]["amount"], -42.5)
+		self.assertEqual(rows[0]["currency"], "AUD")
+		self.assertEqual(rows[0]["description"], "Coffee & Co Card")
+		self.assertEqual(rows[0]["id"], "F1")
+		# Identical rows without FITID are told apart
+		self.assertNotEqual(rows[1]["id"], rows[2]["id"])
+
+	def test_blocks_split_across_chunks(self):
+		expected = list(parse_ofx(as_file(OFX)))
+		for chunk_size in (1, 7, 31):
+			with patch.object(parsers, "CHUNK_SIZE", chunk_size):
+				self.assertEqual(list(parse_ofx(as_file(OFX))), expected, chunk_size)
+
+
+class TestCamt053(unittest.TestCase):
+	def test_entries(self):
+		rows = list(parse_camt053(as_file(CAMT)))
+		self.assertEqual(len(rows), 2)
+
+		debit, pending = rows
+		self.assertEqual(debit["amount"], -12.3)
+		self.assertEqual(debit["currency"], "EUR")
+		self.assertEqual(debit["id"], "REF-1")
+		self.assertEqual(debit["reference"], "E2E-1")
+		self.assertEqual(debit["description"], "Invoice 7")
+		self.assertFalse(debit["pending"])
+
+		self.assertEqual(pending["date"], "2026-02-02")
+		self.assertEqual(pending["amount"], 5)
+		self.assertEqual(pending["description"], "Refund")
+		self.assertEqual(pending["reference"], "")
+		self.assertTrue(pending["pending"])
+
+
+class TestProviderCSV(unittest.TestCase):
+	def test_airwallex_export(self):
+		rows = list(
+			parse_airwallex_csv(
+				as_file(
+					"ID,Created At,Amount,Fee,Currency,Transaction Type\n"
+					"t1,2026-01-05 10:00:00,100,2.5,usd,deposit\n"
+					",2026-01-05,1,0,USD,FEE\n"
+				)
+			)
+		)
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(rows[0]["net"], 97.5)
+		self.assertEqual(rows[0]["created_at"], "2026-01-05T10:00:00")
+		self.assertEqual(rows[0]["currency"], "USD")
+		self.assertEqual(rows[0]["status"], "SETTLED")
+		self.assertEqual(rows[0]["transaction_type"], "DEPOSIT")
+
+	def test_skript_export(self):
+		rows = list(parse_skript_csv(as_file("postingDateTime,id,amount\n2026-01-05,s1,-4\n")))
+		self.assertEqual(rows[0]["postingDateTime"], "2026-01-05")
+		self.assertEqual(rows[0]["amount"], -4)
+		self.assertEqual(rows[0]["currency"], "AUD")
+
+
+class TestOccurrences(unittest.TestCase):
+	def test_interleaved_dates_within_the_window(self):
+		occurrences = _Occurrences()
+		ids = [occurrences.row_id(statement_row(day)) for day in ("2026-01-01", "2026-01-02") * 2]
+		self.assertEqual(len(set(ids)), 4)
+
+	def test_counters_are_bounded(self):
+		occurrences = _Occurrences()
+		for day in range(100):
+			occurrences.row_id(statement_row(str(date(2026, 1, 1) + timedelta(days=day))))
+		self.assertEqual(len(occurrences.counts), _Occurrences.OPEN_DATES)
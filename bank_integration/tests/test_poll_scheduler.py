@@ -0,0 +1,43 @@
+# Copyright (c) 2026, Akhilam Inc and Contributors
+# See license.txt
+
+import unittest
+from types import SimpleNamespace
+
+from bank_integration.common.poll_scheduler import (
+	DEFAULT_MAX_INTERVAL,
+	DEFAULT_MIN_INTERVAL,
+	clamp,
+	get_interval_bounds,
+	next_interval,
+)
+
+
+class TestNextInterval(unittest.TestCase):
+	def test_activity_halves_the_interval(self):
+		self.assertEqual(next_interval(60, 3, 15, 1440), 30)
+
+	def test_empty_poll_doubles_the_interval(self):
+		self.assertEqual(next_interval(60, 0, 15, 1440), 120)
+
+	def test_interval_stays_within_bounds(self):
+		self.assertEqual(next_interval(20, 1, 15, 1440), 15)
+		self.assertEqual(next_interval(1000, 0, 15, 1440), 1440)
+
+	def test_interval_is_whole_minutes(self):
+		self.assertEqual(next_interval(45, 1, 15, 1440), 22)
+
+
+class TestIntervalBounds(unittest.TestCase):
+	def test_defaults(self):
+		settings = SimpleNamespace(poll_min_interval=0, poll_max_interval=0)
+		self.assertEqual(get_interval_bounds(settings), (DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL))
+
+	def test_max_never_below_min(self):
+		settings = SimpleNamespace(poll_min_interval=120, poll_max_interval=60)
+		self.assertEqual(get_interval_bounds(settings), (120, 120))
+
+	def test_clamp(self):
+		self.assertEqual(clamp(5, 10, 20), 10)
+		self.assertEqual(clamp(25, 10, 20), 20)
+		self.assertEqual(clamp(15, 10, 20), 15)